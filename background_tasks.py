@@ -0,0 +1,89 @@
+"""Fire-and-forget background work (cache refreshes) that must stay off the request path."""
+
+import asyncio
+import contextvars
+from typing import Awaitable, Dict, List, Optional
+
+from logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_tasks: Dict[str, asyncio.Task] = {}
+# Context variables that describe the scheduling task itself (e.g. the speculation marker);
+# tasks inherit a copy of the scheduler's context, so these are reset in every new task
+_task_local: List[contextvars.ContextVar] = []
+
+
+def task_local(var: contextvars.ContextVar) -> contextvars.ContextVar:
+    """Register ``var`` to be reset to ``None`` in scheduled tasks; returns it."""
+    _task_local.append(var)
+    return var
+
+
+def schedule(name: str, coro: Awaitable, context: Optional[contextvars.Context] = None) -> bool:
+    """
+    Start ``coro`` as a background task identified by ``name``.
+
+    Returns ``False`` (and closes ``coro``) when a task with the same name is already
+    pending, so repeated stale hits on one key only trigger a single refresh.
+    ``context`` defaults to a copy of the current one with the ``task_local`` variables reset.
+    """
+    if name in _tasks and not _tasks[name].done():
+        coro.close()
+        return False
+
+    if context is None:
+        context = contextvars.copy_context()
+        for var in _task_local:
+            context.run(var.set, None)
+    task = asyncio.get_running_loop().create_task(coro, name=name, context=context)
+    _tasks[name] = task
+
+    def _done(t: asyncio.Task) -> None:
+        if _tasks.get(name) is t:
+            _tasks.pop(name, None)
+        if not t.cancelled() and t.exception() is not None:
+            logger.error(f"Background task {name} failed: {t.exception()}")
+
+    task.add_done_callback(_done)
+    return True
+
+
+async def wait_for(name: str, timeout: Optional[float]) -> bool:
+    """
+    Wait up to ``timeout`` seconds (``None``: no limit) for the task ``name`` without
+    cancelling it; ``True`` if it is done.
+    """
+    task = _tasks.get(name)
+    if task is None or task.done():
+        return True
+    if timeout is None or timeout > 0:
+        await asyncio.wait([task], timeout=timeout)
+    return task.done()
+
+
+def pending_count() -> int:
+    return sum(1 for t in _tasks.values() if not t.done())
+
+
+async def drain(timeout: float) -> int:
+    """
+    Wait up to ``timeout`` seconds for pending background tasks, then cancel the rest.
+
+    Lambda freezes the process once the handler returns, so anything not finished here
+    is abandoned; callers must treat background work as best-effort. Returns the number
+    of tasks that were cancelled.
+    """
+    pending = [t for t in _tasks.values() if not t.done()]
+    if not pending:
+        return 0
+    logger.info(f"Draining {len(pending)} background task(s) for up to {timeout:.1f}s")
+    if timeout > 0:
+        await asyncio.wait(pending, timeout=timeout)
+    leftover = [t for t in pending if not t.done()]
+    for t in leftover:
+        t.cancel()
+    if leftover:
+        await asyncio.gather(*leftover, return_exceptions=True)
+        logger.warning(f"Cancelled {len(leftover)} unfinished background task(s)")
+    return len(leftover)
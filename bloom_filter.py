@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Bloom filter of populated ``skill:`` / ``location_alt_names:`` keys.
+
+For long-tail entities the Redis lookup almost always misses, so the request pays a full
+Upstash round trip just to learn it must call the LLM. A key the filter has never seen is
+a *definite* miss, so generation can start immediately while the (still performed)
+confirming lookup runs in parallel. A stale filter only ever causes false "definite
+misses", which waste a generation but never serve wrong data.
+
+Redis layout:
+    bloom:cache_keys          snapshot JSON {"m", "k", "bits" (zlib+base64), "log_len"}
+    bloom:cache_keys:log      list of keys written since the snapshot (RPUSH by writers)
+    bloom:cache_keys:version  bumped on every rebuild so containers reload the snapshot
+
+Warm containers load the snapshot once and then tail the log every
+``BLOOM_REFRESH_SECONDS`` in the background.
+
+Writers do nothing until a snapshot exists. Recorded keys are buffered and pushed in one
+RPUSH off the request path. When the log grows past ``LOG_MAX_ENTRIES``, the writer that
+notices folds it into the snapshot (``fold_log``), so cold containers never replay more than
+that. Offline writers (``prewarm.py``, ``cache_migrate.py``) append their keys with
+``log_keys``.
+
+Usage:
+    python bloom_filter.py rebuild      # build the snapshot from a SCAN of the keyspace
+    python bloom_filter.py stats
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import (
+    BLOOM_CAPACITY,
+    BLOOM_ERROR_RATE,
+    BLOOM_FILTER_ENABLED,
+    BLOOM_REFRESH_SECONDS,
+)
+from logging_config import setup_logger
+import background_tasks
+
+logger = setup_logger(__name__)
+
+SNAPSHOT_KEY = "bloom:cache_keys"
+LOG_KEY = "bloom:cache_keys:log"
+VERSION_KEY = "bloom:cache_keys:version"
+FOLD_LOCK_KEY = "bloom:cache_keys:fold_lock"
+TRACKED_FAMILIES = ("skill", "location_alt_names")
+_LOG_PAGE = 5000
+# Log length at which a writer folds the log into the snapshot
+LOG_MAX_ENTRIES = 20000
+FOLD_LOCK_SECONDS = 120
+# Recorded keys buffered per container before the oldest are dropped (flushes keep it small)
+_MAX_PENDING = 5000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using Kirsch-Mitzenmacher double hashing."""
+
+    __slots__ = ("m", "k", "bits", "count")
+
+    def __init__(self, m: int, k: int, bits: Optional[bytearray] = None):
+        self.m = m
+        self.k = k
+        self.bits = bits if bits is not None else bytearray((m + 7) // 8)
+        self.count = 0
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float) -> "BloomFilter":
+        m = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        k = max(1, int(round(m / capacity * math.log(2))))
+        return cls(m, k)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def add(self, key: str) -> None:
+        bits = self.bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def to_snapshot(self, log_len: int) -> str:
+        return json.dumps({
+            "m": self.m,
+            "k": self.k,
+            "bits": base64.b64encode(zlib.compress(bytes(self.bits), 6)).decode("ascii"),
+            "log_len": log_len,
+        })
+
+    @classmethod
+    def from_snapshot(cls, raw: str) -> Tuple["BloomFilter", int]:
+        data = json.loads(raw)
+        bits = bytearray(zlib.decompress(base64.b64decode(data["bits"])))
+        return cls(data["m"], data["k"], bits), int(data.get("log_len", 0))
+
+
+class CacheKeyFilter:
+    """
+    Container-local view of the shared key filter. Until a snapshot has been loaded the
+    filter is not authoritative and ``definitely_missing`` always returns ``False``.
+    """
+
+    def __init__(self, redis_client: Any, enabled: bool = BLOOM_FILTER_ENABLED,
+                 refresh_seconds: float = BLOOM_REFRESH_SECONDS):
+        self.redis = redis_client
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self.bloom: Optional[BloomFilter] = None
+        self._log_pos = 0
+        self._version: Optional[str] = None
+        self._last_refresh = 0.0
+        self._pending: List[str] = []
+        self._pending_lock = threading.Lock()
+        self.stats = {"definite_misses": 0, "checks": 0, "recorded": 0}
+
+    @property
+    def loaded(self) -> bool:
+        return self.bloom is not None
+
+    def definitely_missing(self, key: str) -> bool:
+        if not self.enabled or self.bloom is None:
+            return False
+        self.stats["checks"] += 1
+        missing = key not in self.bloom
+        if missing:
+            self.stats["definite_misses"] += 1
+        return missing
+
+    def record(self, key: str) -> None:
+        """
+        Register a freshly written key locally and queue it for the shared log. Without a
+        snapshot (none loaded, none in Redis) nothing is logged.
+        """
+        if not self.enabled or (self.bloom is None and self._last_refresh):
+            return
+        if self.bloom is not None:
+            self.bloom.add(key)
+        with self._pending_lock:
+            self._pending.append(key)
+            del self._pending[:-_MAX_PENDING]
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No running loop (offline tools): push inline
+            self.flush()
+            return
+        background_tasks.schedule("bloom_log_flush", asyncio.to_thread(self.flush))
+
+    def flush(self) -> int:
+        """Push the queued keys in one RPUSH (folding the log when it is too long); returns the count."""
+        if self.bloom is None and not self._last_refresh:
+            # First write before the first refresh: find out whether there is a snapshot
+            self._safe_refresh()
+        with self._pending_lock:
+            keys, self._pending = self._pending, []
+        if not keys or self.bloom is None:
+            return 0
+        try:
+            log_len = int(self.redis.rpush(LOG_KEY, *keys) or 0)
+            self.stats["recorded"] += len(keys)
+        except Exception as e:
+            logger.warning(f"Failed to append {len(keys)} key(s) to bloom log: {e}")
+            return 0
+        _fold_if_long(self.redis, log_len)
+        return len(keys)
+
+    def _tail_log(self) -> None:
+        while True:
+            entries = self.redis.lrange(LOG_KEY, self._log_pos, self._log_pos + _LOG_PAGE - 1) or []
+            for key in entries:
+                self.bloom.add(key)
+            self._log_pos += len(entries)
+            if len(entries) < _LOG_PAGE:
+                break
+
+    def refresh(self) -> None:
+        """Load the snapshot if it changed (or was never loaded), then replay the log tail."""
+        version = self.redis.get(VERSION_KEY)
+        if self.bloom is None or version != self._version:
+            raw = self.redis.get(SNAPSHOT_KEY)
+            if not raw:
+                logger.info("No bloom snapshot in Redis yet; key filter stays disabled")
+                self._last_refresh = time.monotonic()
+                return
+            self.bloom, self._log_pos = BloomFilter.from_snapshot(raw)
+            self._version = version
+            logger.info(f"Loaded bloom snapshot version {version} (m={self.bloom.m}, k={self.bloom.k})")
+        self._tail_log()
+        self._last_refresh = time.monotonic()
+
+    def ensure_fresh(self) -> None:
+        """Schedule a background load/refresh when due; never blocks the caller."""
+        if not self.enabled or time.monotonic() - self._last_refresh < self.refresh_seconds:
+            return
+        self._last_refresh = time.monotonic()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No running loop (offline tools): refresh inline
+            self._safe_refresh()
+            return
+        background_tasks.schedule("bloom_refresh", asyncio.to_thread(self._safe_refresh))
+
+    def _safe_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Bloom filter refresh failed: {e}")
+
+
+def rebuild(redis_client: Any, families: Iterable[str] = TRACKED_FAMILIES,
+            capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE) -> Dict[str, Any]:
+    """
+    Rebuild the snapshot from a SCAN of the tracked families and compact the log.
+    Keys written while the scan runs stay in the log tail and are replayed by containers.
+    """
+    log_len_before = int(redis_client.llen(LOG_KEY) or 0)
+    bloom = BloomFilter.for_capacity(capacity, error_rate)
+    for family in families:
+        cursor = 0
+        while True:
+            cursor, keys = redis_client.scan(int(cursor), match=f"{family}:*", count=1000)
+            for key in keys:
+                bloom.add(key)
+            if int(cursor) == 0:
+                break
+    if log_len_before:
+        redis_client.ltrim(LOG_KEY, log_len_before, -1)
+    redis_client.set(SNAPSHOT_KEY, bloom.to_snapshot(log_len=0))
+    version = redis_client.incr(VERSION_KEY)
+    if bloom.count > capacity:
+        logger.warning(f"Bloom filter holds {bloom.count} keys, above capacity {capacity}; raise BLOOM_CAPACITY")
+    return {"keys": bloom.count, "m": bloom.m, "k": bloom.k, "bytes": len(bloom.bits), "version": version}
+
+
+def fold_log(redis_client: Any) -> Dict[str, Any]:
+    """
+    Add the logged keys to the snapshot and trim them from the log (no keyspace SCAN).
+    Keys pushed while folding stay in the log tail; containers reload the new version.
+    """
+    raw = redis_client.get(SNAPSHOT_KEY)
+    if not raw:
+        return {"folded": 0}
+    bloom, _ = BloomFilter.from_snapshot(raw)
+    log_len = int(redis_client.llen(LOG_KEY) or 0)
+    for start in range(0, log_len, _LOG_PAGE):
+        for key in redis_client.lrange(LOG_KEY, start, min(start + _LOG_PAGE, log_len) - 1) or []:
+            bloom.add(key)
+    redis_client.set(SNAPSHOT_KEY, bloom.to_snapshot(log_len=0))
+    redis_client.ltrim(LOG_KEY, log_len, -1)
+    version = redis_client.incr(VERSION_KEY)
+    return {"folded": log_len, "version": version}
+
+
+def _fold_if_long(redis_client: Any, log_len: int) -> None:
+    """Fold the log into the snapshot once it passes LOG_MAX_ENTRIES (one writer at a time)."""
+    if log_len <= LOG_MAX_ENTRIES:
+        return
+    try:
+        if redis_client.set(FOLD_LOCK_KEY, "1", nx=True, ex=FOLD_LOCK_SECONDS):
+            logger.info(f"Bloom log holds {log_len} keys; folding it into the snapshot")
+            fold_log(redis_client)
+    except Exception as e:
+        logger.warning(f"Failed to fold bloom log: {e}")
+
+
+def log_keys(redis_client: Any, keys: List[str]) -> int:
+    """
+    Append keys written outside the request path (pre-warm, migrations) to the log, in
+    pages of ``_LOG_PAGE``; returns the count. Without a snapshot nothing is logged, as
+    for ``CacheKeyFilter.record``.
+    """
+    if not keys or not redis_client.exists(SNAPSHOT_KEY):
+        return 0
+    log_len = 0
+    for start in range(0, len(keys), _LOG_PAGE):
+        log_len = int(redis_client.rpush(LOG_KEY, *keys[start:start + _LOG_PAGE]) or 0)
+    _fold_if_long(redis_client, log_len)
+    return len(keys)
+
+
+def _default_filter() -> CacheKeyFilter:
+    from config import redis_client
+    return CacheKeyFilter(redis_client)
+
+
+# Shared per-container instance used by the cache helpers in hyde_logic
+key_filter = _default_filter()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the Bloom filter of populated cache keys")
+    parser.add_argument("command", choices=["rebuild", "stats"])
+    args = parser.parse_args()
+
+    from config import redis_client
+
+    if args.command == "rebuild":
+        print(json.dumps(rebuild(redis_client), indent=2))
+    else:
+        raw = redis_client.get(SNAPSHOT_KEY)
+        snapshot = BloomFilter.from_snapshot(raw)[0] if raw else None
+        print(json.dumps({
+            "snapshot": bool(snapshot),
+            "m": snapshot.m if snapshot else None,
+            "k": snapshot.k if snapshot else None,
+            "version": redis_client.get(VERSION_KEY),
+            "log_len": redis_client.llen(LOG_KEY),
+        }, indent=2))
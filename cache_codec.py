@@ -0,0 +1,153 @@
+"""
+Versioned value codec for cached skill descriptions and location alt names.
+
+Encoded values are text (Upstash's REST API only carries strings) with a 3-character header:
+
+    "~" + VERSION + CODEC + base64(payload)
+
+``~`` can never start a JSON document, so values written before the codec existed (plain
+JSON) are still decoded transparently. The v1 payload is compact JSON for everything except
+``embeddings``, which are packed as little-endian float32 after the JSON block:
+
+    uint32 json_length | json bytes | float32 embeddings...
+
+and the whole payload is compressed with zlib (always available) or zstd (when the optional
+``zstandard`` package is installed).
+"""
+
+import base64
+import json
+import struct
+import zlib
+from array import array
+from typing import Any, Optional
+
+from config import get_env_var
+
+try:  # Optional dependency; zlib is used when it is not installed
+    import zstandard
+except ImportError:  # pragma: no cover - depends on deployment package
+    zstandard = None
+
+MAGIC = "~"
+VERSION = "1"
+CODEC_ZLIB = "z"
+CODEC_ZSTD = "s"
+
+# "json" keeps writing plain JSON values (readable by consumers without this codec),
+# "zlib" / "zstd" enable the compact encoding.
+CACHE_VALUE_CODEC = (get_env_var("CACHE_VALUE_CODEC", required=False) or "json").lower()
+# Small values (e.g. alt-name lists) gain nothing from compression + base64
+CACHE_CODEC_MIN_BYTES = int(get_env_var("CACHE_CODEC_MIN_BYTES", required=False) or 256)
+
+_LEN = struct.Struct("<I")
+
+
+class CacheCodecError(ValueError):
+    """Raised when a cached value cannot be decoded."""
+
+
+def _is_flat_floats(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(x, (float, int)) for x in value)
+
+
+def _pack(obj: Any) -> bytes:
+    embeddings = None
+    if isinstance(obj, dict) and _is_flat_floats(obj.get("embeddings")):
+        embeddings = obj["embeddings"]
+        obj = {k: v for k, v in obj.items() if k != "embeddings"}
+    json_bytes = json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    payload = _LEN.pack(len(json_bytes)) + json_bytes
+    if embeddings is not None:
+        payload += array("f", embeddings).tobytes()
+    return payload
+
+
+def _unpack(payload: bytes) -> Any:
+    (json_len,) = _LEN.unpack_from(payload)
+    obj = json.loads(payload[_LEN.size:_LEN.size + json_len])
+    tail = payload[_LEN.size + json_len:]
+    if tail:
+        floats = array("f")
+        floats.frombytes(tail)
+        obj["embeddings"] = floats.tolist()
+    return obj
+
+
+def encode_value(obj: Any, codec: Optional[str] = None) -> str:
+    """Encode ``obj`` for storage in Redis using ``codec`` (defaults to ``CACHE_VALUE_CODEC``)."""
+    codec = (codec or CACHE_VALUE_CODEC).lower()
+    plain = json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+    if codec == "json" or len(plain) < CACHE_CODEC_MIN_BYTES:
+        return plain
+
+    payload = _pack(obj)
+    if codec == "zstd" and zstandard is not None:
+        header, compressed = CODEC_ZSTD, zstandard.ZstdCompressor(level=6).compress(payload)
+    else:
+        header, compressed = CODEC_ZLIB, zlib.compress(payload, 6)
+    encoded = MAGIC + VERSION + header + base64.b64encode(compressed).decode("ascii")
+    # Never store an encoding that is larger than the plain JSON it replaces
+    return encoded if len(encoded) < len(plain) else plain
+
+
+def decode_value(raw: Any) -> Any:
+    """Decode a Redis value written either as plain JSON (legacy) or with ``encode_value``."""
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8")
+    if not raw.startswith(MAGIC):
+        return json.loads(raw)
+
+    if len(raw) < 3 or raw[1] != VERSION:
+        raise CacheCodecError(f"Unsupported cache value version: {raw[1:2]!r}")
+    try:
+        compressed = base64.b64decode(raw[3:])
+        if raw[2] == CODEC_ZLIB:
+            payload = zlib.decompress(compressed)
+        elif raw[2] == CODEC_ZSTD:
+            if zstandard is None:
+                raise CacheCodecError("zstd-encoded cache value but 'zstandard' is not installed")
+            payload = zstandard.ZstdDecompressor().decompress(compressed)
+        else:
+            raise CacheCodecError(f"Unknown cache value codec: {raw[2]!r}")
+        return _unpack(payload)
+    except CacheCodecError:
+        raise
+    except Exception as e:
+        raise CacheCodecError(f"Corrupt cache value: {e}") from e
+
+
+###############################################################################
+# BENCHMARK
+###############################################################################
+if __name__ == "__main__":
+    import random
+    import time
+
+    random.seed(7)
+    words = ("data pipeline model training deployment analysis system design stakeholder "
+             "framework engineering optimization cloud infrastructure testing monitoring").split()
+
+    def make_value(with_embeddings: bool) -> dict:
+        value = {"description": " ".join(random.choice(words) for _ in range(300))}
+        if with_embeddings:
+            value["embeddings"] = [random.uniform(-1, 1) for _ in range(1536)]
+        return value
+
+    codecs = ["json", "zlib"] + (["zstd"] if zstandard is not None else [])
+    print(f"{'batch':>5} {'embeddings':>10} {'codec':>5} {'bytes/batch':>12} {'ratio':>6} "
+          f"{'encode ms':>10} {'decode ms':>10}")
+    for with_embeddings in (False, True):
+        for batch_size in (10, 50, 200):
+            values = [make_value(with_embeddings) for _ in range(batch_size)]
+            baseline = sum(len(json.dumps(v)) for v in values)
+            for codec in codecs:
+                t0 = time.perf_counter()
+                encoded = [encode_value(v, codec) for v in values]
+                t1 = time.perf_counter()
+                for raw in encoded:
+                    decode_value(raw)
+                t2 = time.perf_counter()
+                size = sum(len(e) for e in encoded)
+                print(f"{batch_size:>5} {str(with_embeddings):>10} {codec:>5} {size:>12} "
+                      f"{size / baseline:>6.2f} {(t1 - t0) * 1000:>10.2f} {(t2 - t1) * 1000:>10.2f}")
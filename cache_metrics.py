@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Structured cache counters per key family.
+
+Counters accumulate in-process during an invocation. The lambda handler then writes the
+snapshot into the search document's metrics and merges it into hourly Redis hashes
+(``cache_stats:{family}:{YYYYMMDDHH}``) in the background. The report command reads those
+hashes back as an hourly hit-rate trend.
+
+Families:
+    skill               skill descriptions requested by the HyDE response
+    role                related-role descriptions (stored under ``skill:`` keys)
+    location_alt_names  location alternative names
+    org_aliases         organisation alias sets (see ``org_aliases``; ``hinted`` counts
+                        aliases offered to the HyDE prompt)
+    speculation         speculative enrichment started during HyDE step 1 (see ``speculation``)
+    step1               how HyDE step 1 was answered: fast_path (``query_lexicon``) and
+                        fast_path_fallbacks to the LLM; per-provider calls, latency and
+                        rejections (``provider_router`` learns from these)
+    db_field            dbQueryDetails fields checked against ``profile_schema`` (valid,
+                        mapped, unknown and dropped counts rather than hits/misses)
+    jobs                out-of-band jobs (see ``jobs``): ``{kind}_handed_off`` to the worker,
+                        ``{kind}_handoff_failures``, ``{kind}_in_process`` and ``{kind}_runs``;
+                        ``related_roles_patched`` / ``related_roles_dropped`` count late patches
+
+Usage:
+    python cache_metrics.py report --hours 24
+    python cache_metrics.py report --family skill --hours 168
+"""
+
+import asyncio
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from logging_config import setup_logger
+import background_tasks
+
+logger = setup_logger(__name__)
+
+SKILL = "skill"
+ROLE = "role"
+LOCATION = "location_alt_names"
+DB_FIELD = "db_field"
+SPECULATION = "speculation"
+STEP1 = "step1"
+ORG_ALIASES = "org_aliases"
+JOBS = "jobs"
+FAMILIES = (SKILL, ROLE, LOCATION, ORG_ALIASES, DB_FIELD, SPECULATION, STEP1, JOBS)
+
+# hits = local_hits + remote hits; misses include decode errors (they regenerate too)
+FIELDS = ("hits", "local_hits", "misses", "stale", "decode_errors", "writes",
+          "bytes_read", "bytes_written", "lookup_ms")
+STATS_TTL_SECONDS = 30 * 24 * 3600
+
+
+def _hour_key(family: str, when: datetime) -> str:
+    return f"cache_stats:{family}:{when.strftime('%Y%m%d%H')}"
+
+
+def _with_rates(counts: Dict[str, int]) -> Dict[str, Any]:
+    lookups = counts.get("hits", 0) + counts.get("misses", 0)
+    return {**counts, "lookups": lookups,
+            "hit_rate": round(counts.get("hits", 0) / lookups, 4) if lookups else None}
+
+
+class CacheMetrics:
+    """Thread-safe per-family counters for the current invocation."""
+
+    def __init__(self):
+        self._counts: Dict[str, Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def incr(self, family: str, field: str, amount: int = 1) -> None:
+        if amount:
+            with self._lock:
+                self._counts[family][field] += int(amount)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {family: _with_rates(dict(counts)) for family, counts in self._counts.items()}
+
+    def take(self) -> Dict[str, Dict[str, int]]:
+        """Return the raw counters and reset them (one call per invocation)."""
+        with self._lock:
+            counts = {family: dict(c) for family, c in self._counts.items()}
+            self._counts.clear()
+        return counts
+
+
+def flush(redis_client: Any, counts: Dict[str, Dict[str, int]], when: Optional[datetime] = None) -> int:
+    """Merge ``counts`` into the hourly hashes; returns the number of HINCRBY calls issued."""
+    when = when or datetime.now(timezone.utc)
+    issued = 0
+    for family, fields in counts.items():
+        key = _hour_key(family, when)
+        for field, value in fields.items():
+            if value:
+                redis_client.hincrby(key, field, int(value))
+                issued += 1
+        redis_client.expire(key, STATS_TTL_SECONDS)
+    return issued
+
+
+def report(redis_client: Any, families: List[str], hours: int = 24) -> Dict[str, Any]:
+    """Hourly trend plus window totals for each family, oldest hour first."""
+    now = datetime.now(timezone.utc)
+    result = {}
+    for family in families:
+        totals: Counter = Counter()
+        trend = []
+        for offset in range(hours - 1, -1, -1):
+            when = now - timedelta(hours=offset)
+            raw = redis_client.hgetall(_hour_key(family, when)) or {}
+            if isinstance(raw, list):
+                # Some clients return HGETALL as a flat [field, value, ...] list
+                raw = dict(zip(raw[::2], raw[1::2]))
+            counts = {field: int(value) for field, value in raw.items()}
+            if counts:
+                totals.update(counts)
+                trend.append({"hour": when.strftime("%Y-%m-%dT%H:00Z"), **_with_rates(counts)})
+        summary = _with_rates(dict(totals))
+        if summary["lookups"]:
+            summary["avg_lookup_ms"] = round(totals["lookup_ms"] / summary["lookups"], 2)
+        result[family] = {"totals": summary, "hourly": trend}
+    return result
+
+
+# Shared per-container instance; reset by the handler at the end of each invocation
+metrics = CacheMetrics()
+
+
+def publish(redis_client: Any) -> Dict[str, Dict[str, Any]]:
+    """Take this invocation's counters, queue the Redis merge and return the snapshot."""
+    counts = metrics.take()
+
+    def _run() -> None:
+        try:
+            flush(redis_client, counts)
+        except Exception as e:
+            logger.warning(f"Failed to flush cache metrics: {e}")
+
+    if counts:
+        background_tasks.schedule("cache_metrics_flush", asyncio.to_thread(_run))
+    return {family: _with_rates(fields) for family, fields in counts.items()}
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Show cache hit-rate trends per key family")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--family", choices=FAMILIES, action="append", help="Restrict to one family (repeatable)")
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--trend", action="store_true", help="Include the hourly breakdown")
+    args = parser.parse_args()
+
+    from config import redis_client
+
+    data = report(redis_client, args.family or list(FAMILIES), args.hours)
+    if not args.trend:
+        data = {family: entry["totals"] for family, entry in data.items()}
+    print(json.dumps(data, indent=2))
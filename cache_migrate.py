@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Report on and upgrade cached entries after a prompt or provider-family change.
+
+Entries are upgraded lazily on the request path anyway (a prompt-version mismatch marks
+an entry stale, it is served and refreshed in the background). This tool shows how much
+of the keyspace is behind and lets the rollout upgrade it ahead of traffic, throttled
+so it never competes with production for provider quota.
+
+The ``rekey`` command copies entries written under the old ASCII-only key normalisation
+(``utils.legacy_normalize_text``) to their Unicode-aware key. Original names cannot be
+recovered from legacy keys ("s o paulo"), so it needs a list of names; anything not listed
+is still copied lazily the first time the request path reads it.
+
+For the same reason ``upgrade`` regenerates an entry only from the display name recorded in
+its metadata (``meta.name``). Entries without one (legacy entries, entries written before
+names were recorded) are skipped and left to the lazy refresh on the request path. A new
+skill description is merged into the stored value, so embeddings survive the upgrade.
+
+Usage:
+    python cache_migrate.py report
+    python cache_migrate.py upgrade --family skill --limit 500 --rps 1
+    python cache_migrate.py rekey --family location_alt_names --names cities.txt
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bloom_filter import log_keys
+from cache_codec import decode_value
+from cache_policy import (CANONICAL_PROVIDER, LOCATION_FAMILY, SKILL_FAMILY, SOFT_TTL_SECONDS, join_meta, meta_key,
+                          prompt_version, unwrap_value)
+from logging_config import setup_logger
+from utils import legacy_normalize_text, normalize_text
+
+logger = setup_logger(__name__)
+
+FAMILIES = (SKILL_FAMILY, LOCATION_FAMILY)
+
+
+def scan_entries(redis_client: Any, family: str, page_size: int = 500) -> Iterator[Tuple[str, Any, Any]]:
+    """
+    Yield ``(key, raw_value, raw_meta)`` for every key of ``family`` using SCAN + MGET pages
+    (``raw_meta`` is the sibling metadata of a location entry, else ``None``).
+    """
+    cursor = 0
+    while True:
+        cursor, keys = redis_client.scan(int(cursor), match=f"{family}:*", count=page_size)
+        if keys:
+            meta_keys = [meta_key(family, key) for key in keys if meta_key(family, key)]
+            values = redis_client.mget(*keys, *meta_keys)
+            metas = values[len(keys):] or [None] * len(keys)
+            for key, raw, raw_meta in zip(keys, values, metas):
+                if raw is not None:
+                    yield key, raw, raw_meta
+        if int(cursor) == 0:
+            break
+
+
+def entry_meta(family: str, raw: Any, raw_meta: Any = None) -> Optional[Dict[str, Any]]:
+    """Metadata of a stored entry (``None`` for legacy entries); raises ``ValueError`` when unreadable."""
+    stored = join_meta(family, decode_value(raw), decode_value(raw_meta) if raw_meta else None)
+    return unwrap_value(family, stored)[1]
+
+
+def classify(family: str, raw: Any, provider: str, now: float, raw_meta: Any = None) -> str:
+    """Bucket an entry as ``current``, ``outdated_prompt``, ``past_soft_ttl``, ``legacy`` or ``undecodable``."""
+    try:
+        meta = entry_meta(family, raw, raw_meta)
+    except ValueError:
+        return "undecodable"
+    if not meta:
+        return "legacy"
+    if meta.get("prompt_version") != prompt_version(family, provider):
+        return "outdated_prompt"
+    if now - (meta.get("generated_at") or 0) > SOFT_TTL_SECONDS:
+        return "past_soft_ttl"
+    return "current"
+
+
+def report(redis_client: Any, families: List[str], provider: str) -> Dict[str, Dict[str, int]]:
+    now = time.time()
+    summary = {}
+    for family in families:
+        counts, sizes = Counter(), Counter()
+        for _, raw, raw_meta in scan_entries(redis_client, family):
+            bucket = classify(family, raw, provider, now, raw_meta)
+            counts[bucket] += 1
+            sizes[bucket] += len(raw)
+        summary[family] = {
+            "total": sum(counts.values()),
+            "current_prompt_version": prompt_version(family, provider),
+            **{bucket: counts[bucket] for bucket in sorted(counts)},
+            "bytes": sum(sizes.values()),
+        }
+    return summary
+
+
+def outdated_names(redis_client: Any, family: str, provider: str, limit: int = 0) -> List[str]:
+    """
+    Display names (``meta.name``) of entries that are not ``current``. Entries without a
+    recorded name, or whose name no longer maps to their key, are skipped: the key suffix
+    is a lossy normalisation and regenerating from it would cache a garbled name.
+    """
+    now = time.time()
+    names, skipped = [], 0
+    for key, raw, raw_meta in scan_entries(redis_client, family):
+        if classify(family, raw, provider, now, raw_meta) in ("current", "undecodable"):
+            continue
+        name = (entry_meta(family, raw, raw_meta) or {}).get("name")
+        if not name or f"{family}:{normalize_text(name)}" != key:
+            skipped += 1
+            continue
+        names.append(name)
+        if limit and len(names) >= limit:
+            break
+    if skipped:
+        logger.info(f"{family}: {skipped} outdated entries have no display name; left to the lazy refresh")
+    return names
+
+
+def rekey(redis_client: Any, family: str, names: List[str], dry_run: bool = False,
+          page_size: int = 500) -> Dict[str, int]:
+    """
+    Copy legacy-normalised entries of ``names`` to their current key (never overwrites) and
+    log the copied keys for the Bloom filter, which would otherwise report them missing.
+    """
+    pairs = {}
+    for name in names:
+        old_norm, new_norm = legacy_normalize_text(name), normalize_text(name)
+        # Empty legacy keys were shared by every non-Latin name; their value belongs to none of them
+        if old_norm and new_norm and old_norm != new_norm:
+            pairs[f"{family}:{old_norm}"] = f"{family}:{new_norm}"
+    counts = Counter(candidates=len(pairs))
+    items = list(pairs.items())
+    for start in range(0, len(items), page_size):
+        page = items[start:start + page_size]
+        old_values = redis_client.mget(*[old for old, _ in page])
+        new_values = redis_client.mget(*[new for _, new in page])
+        copied = []
+        for (old_key, new_key), raw, existing in zip(page, old_values, new_values):
+            if raw is None:
+                counts["legacy_missing"] += 1
+            elif existing is not None:
+                counts["already_present"] += 1
+            else:
+                counts["copied"] += 1
+                if not dry_run:
+                    ttl = redis_client.ttl(old_key)
+                    if redis_client.set(new_key, raw, nx=True, ex=ttl if ttl and ttl > 0 else None):
+                        copied.append(new_key)
+        log_keys(redis_client, copied)
+    return dict(counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report on / upgrade cached entries to the current prompt version")
+    parser.add_argument("command", choices=["report", "upgrade", "rekey"])
+    parser.add_argument("--provider", default=CANONICAL_PROVIDER,
+                        help="Description provider whose prompt version is current (default: CACHE_CANONICAL_PROVIDER)")
+    parser.add_argument("--family", choices=FAMILIES, action="append", help="Restrict to one key family (repeatable)")
+    parser.add_argument("--limit", type=int, default=0, help="Max entries to upgrade per family (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--rps", type=float, default=1.0)
+    parser.add_argument("--dry-run", action="store_true", help="List what would be upgraded without calling the LLM")
+    parser.add_argument("--names", help="rekey: file with one entity name per line")
+    args = parser.parse_args()
+
+    from config import redis_client
+
+    families = args.family or list(FAMILIES)
+    if args.command == "report":
+        print(json.dumps(report(redis_client, families, args.provider), indent=2))
+    elif args.command == "rekey":
+        if not args.names:
+            parser.error("rekey requires --names")
+        from prewarm import load_names
+
+        names = load_names(args.names)
+        print(json.dumps({family: rekey(redis_client, family, names, args.dry_run) for family in families}, indent=2))
+    else:
+        from hyde_logic import get_chat_completion_description, get_chat_completion_location_alt_names
+        from prewarm import Checkpoint, Prewarmer, RateLimiter
+
+        targets = {family: outdated_names(redis_client, family, args.provider, args.limit) for family in families}
+        if args.dry_run:
+            print(json.dumps({family: names for family, names in targets.items()}, indent=2, ensure_ascii=False))
+        else:
+            prewarmer = Prewarmer(
+                redis_client,
+                get_chat_completion_description,
+                get_chat_completion_location_alt_names,
+                provider=args.provider,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                rate_limiter=RateLimiter(args.rps),
+                checkpoint=Checkpoint(),
+                refresh_stale=True,
+            )
+
+            async def _upgrade() -> Dict[str, int]:
+                await asyncio.gather(*[prewarmer.fill(family, names) for family, names in targets.items()])
+                return prewarmer.stats
+
+            print(json.dumps(asyncio.run(_upgrade()), indent=2))
@@ -0,0 +1,147 @@
+"""
+Freshness metadata and TTL policy for generated cache entries.
+
+Every value written to ``skill:`` / ``location_alt_names:`` carries a ``meta`` block::
+
+    {"generated_at": <unix seconds>, "prompt_version": "...", "provider": "..."}
+
+Skill values are dicts, so ``meta`` is added alongside ``description``/``embeddings``.
+Location values stay a bare JSON list of alt names, the shape the Fetch lambda and older
+deployments of this one read. Their ``meta`` lives in the sibling key
+``location_alt_names_meta:{norm}`` with the same expiry (``redis_values`` / ``join_meta``).
+In process, and in entries written as ``{"alt_names": [...], "meta": {...}}`` before the
+sibling key existed, a location entry is that object; ``unwrap_value`` reads every shape.
+
+Entries older than the soft TTL (or produced by another prompt version, or legacy
+entries without metadata) are served as-is and regenerated in the background; the hard
+TTL is applied as the Redis expiry so abandoned entries are eventually evicted.
+
+``prompt_version`` is a content hash of the prompt template plus the provider family
+(see ``prompt_version``). Entries are compared with the version of ``CANONICAL_PROVIDER``
+(``CACHE_CANONICAL_PROVIDER``), not with the provider of the request that reads them, so
+editing ``keyword_message`` / ``location_message`` or moving the canonical provider to
+another model family upgrades entries lazily instead of needing a flush.
+Keys themselves are not namespaced by version: the Fetch lambda reads ``skill:{norm}``.
+"""
+
+import hashlib
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from config import CACHE_CANONICAL_PROVIDER, CACHE_HARD_TTL_SECONDS, CACHE_SOFT_TTL_SECONDS
+from model_config import MODEL_CONFIGS
+from prompts.descriptionForKeyword import keyword_message
+from prompts.descriptionForLocationNew import location_message
+
+SKILL_FAMILY = "skill"
+LOCATION_FAMILY = "location_alt_names"
+LOCATION_META_FAMILY = "location_alt_names_meta"
+
+PROMPT_TEMPLATES = {
+    SKILL_FAMILY: keyword_message,
+    LOCATION_FAMILY: location_message,
+}
+
+SOFT_TTL_SECONDS = CACHE_SOFT_TTL_SECONDS
+HARD_TTL_SECONDS = CACHE_HARD_TTL_SECONDS
+# Staleness is judged against this provider, not the one a request happens to use, so two
+# description providers in use at once do not keep regenerating each other's entries
+CANONICAL_PROVIDER = CACHE_CANONICAL_PROVIDER
+
+
+def provider_family(provider: str) -> str:
+    """
+    Collapse a MODEL_CONFIGS provider name to its model family (e.g. ``gemini``,
+    ``openai``, ``anthropic``, ``groq``) so equivalent configs share cache entries.
+    """
+    model = str(MODEL_CONFIGS.get(provider, {}).get("model", provider)).lower()
+    if "/" in model:
+        return model.split("/", 1)[0]
+    if model.startswith(("gpt", "o1", "o3", "o4")):
+        return "openai"
+    if model.startswith("claude"):
+        return "anthropic"
+    if model.startswith("anthropic."):
+        return "bedrock"
+    return model
+
+
+@lru_cache(maxsize=64)
+def prompt_version(family: str, provider: str) -> str:
+    """Short content hash of the family's prompt template and the provider family."""
+    digest = hashlib.sha256(
+        f"{PROMPT_TEMPLATES[family]}\0{provider_family(provider)}".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def build_meta(family: str, provider: str, now: Optional[float] = None, name: Optional[str] = None) -> Dict[str, Any]:
+    meta = {
+        "generated_at": int(now if now is not None else time.time()),
+        "prompt_version": prompt_version(family, provider),
+        "provider": provider,
+    }
+    if name:
+        # The key is a lossy normalisation; offline upgrades regenerate from this name
+        meta["name"] = name
+    return meta
+
+
+def wrap_value(family: str, value: Any, provider: str, now: Optional[float] = None,
+               name: Optional[str] = None) -> Dict[str, Any]:
+    """Attach metadata to a freshly generated value (``redis_values`` splits it for writing)."""
+    meta = build_meta(family, provider, now, name)
+    if family == LOCATION_FAMILY:
+        return {"alt_names": list(value), "meta": meta}
+    stored = {k: v for k, v in value.items() if k != "meta"}
+    stored["meta"] = meta
+    return stored
+
+
+def meta_key(family: str, cache_key: str) -> Optional[str]:
+    """Sibling key holding the metadata of a location entry; ``None`` for families that store it inline."""
+    if family != LOCATION_FAMILY:
+        return None
+    return f"{LOCATION_META_FAMILY}:{cache_key.split(':', 1)[1]}"
+
+
+def redis_values(family: str, cache_key: str, stored: Any) -> Dict[str, Any]:
+    """The Redis keys and values of a wrapped entry (a location's alt names stay a bare list)."""
+    if family == LOCATION_FAMILY and isinstance(stored, dict):
+        return {cache_key: stored["alt_names"], meta_key(family, cache_key): stored.get("meta")}
+    return {cache_key: stored}
+
+
+def join_meta(family: str, stored: Any, meta: Any) -> Any:
+    """Attach the decoded sibling ``meta`` to a location list read from Redis (other values unchanged)."""
+    if family == LOCATION_FAMILY and isinstance(stored, list) and isinstance(meta, dict):
+        return {"alt_names": stored, "meta": meta}
+    return stored
+
+
+def unwrap_value(family: str, stored: Any) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """Split a stored entry into ``(value, meta)``; ``meta`` is ``None`` for legacy entries."""
+    if family == LOCATION_FAMILY:
+        if isinstance(stored, list):
+            return stored, None
+        if isinstance(stored, dict) and isinstance(stored.get("alt_names"), list):
+            return stored["alt_names"], stored.get("meta")
+        raise ValueError("Unexpected location alt names entry shape")
+    if not isinstance(stored, dict):
+        raise ValueError("Unexpected skill entry shape")
+    return stored, stored.get("meta")
+
+
+def is_stale(family: str, meta: Optional[Dict[str, Any]], now: Optional[float] = None) -> bool:
+    """
+    True when the entry should be regenerated in the background (it is still served):
+    no metadata, a prompt version other than the one CANONICAL_PROVIDER would produce now,
+    or older than the soft TTL. Refreshes use CANONICAL_PROVIDER, so an entry written by
+    another provider is regenerated once and then stays current.
+    """
+    if not meta:
+        return True
+    if meta.get("prompt_version") != prompt_version(family, CANONICAL_PROVIDER):
+        return True
+    generated_at = meta.get("generated_at") or 0
+    return (now if now is not None else time.time()) - generated_at > SOFT_TTL_SECONDS
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Replay a query log through candidate cache policies and estimate their effect on LLM calls.
+
+Each record goes through up to three tiers, in the same order as the request path:
+
+    query_result  whole HyDE output keyed by the canonical query (no such tier ships today;
+                  simulate one to see what it would save)
+    skill         skill + related-role descriptions, ``batch_size`` names per LLM call
+    location      location alt names, one LLM call per query with any miss
+
+Entities come from the record's recorded HyDE ``result`` (the same JSONL format that
+``prewarm.py`` reads); records without one only exercise the query tier.
+
+Policies are given as ``name[:param=value,...]`` specs, e.g.::
+
+    none
+    unbounded:ttl=30d
+    lru:bytes=32M,ttl=15m
+    lru:entries=5000,canon=exact
+
+``canon`` selects the key canonicalisation rule (see ``CANONICALIZERS``). New policies are
+added with ``@register_policy("name")``.
+
+Usage:
+    python cache_simulator.py --queries queries.jsonl --policy lru:bytes=32M,ttl=15m --policy unbounded
+    python cache_simulator.py --queries queries.jsonl --tier query_result --policy lru:entries=1000 --interval 30
+"""
+
+import argparse
+import json
+import math
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+from prewarm import extract_entities, load_query_records
+from utils import legacy_normalize_text, normalize_text
+
+TIERS = ("query_result", "skill", "location")
+
+CANONICALIZERS: Dict[str, Callable[[str], str]] = {
+    "default": normalize_text,
+    "legacy": legacy_normalize_text,
+    "lower": lambda text: " ".join((text or "").lower().split()),
+    "exact": lambda text: text or "",
+}
+
+_SIZE_SUFFIXES = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+_DURATION_SUFFIXES = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower().rstrip("b")
+    if value and value[-1] in _SIZE_SUFFIXES:
+        return int(float(value[:-1]) * _SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def parse_duration(value: str) -> float:
+    value = value.strip().lower()
+    if value and value[-1] in _DURATION_SUFFIXES:
+        return float(value[:-1]) * _DURATION_SUFFIXES[value[-1]]
+    return float(value)
+
+
+###############################################################################
+# POLICIES
+###############################################################################
+_POLICIES: Dict[str, Type["CachePolicy"]] = {}
+
+
+def register_policy(name: str):
+    def _register(cls):
+        _POLICIES[name] = cls
+        cls.kind = name
+        return cls
+    return _register
+
+
+class CachePolicy:
+    """Base policy: tracks bytes and peak bytes; subclasses decide residency."""
+
+    kind = "base"
+
+    def __init__(self, canon: str = "default"):
+        if canon not in CANONICALIZERS:
+            raise ValueError(f"Unknown canonicalisation '{canon}'. Choose from {sorted(CANONICALIZERS)}")
+        self.canonicalize = CANONICALIZERS[canon]
+        self.bytes = 0
+        self.peak_bytes = 0
+
+    def lookup(self, key: str, now: float) -> bool:
+        raise NotImplementedError
+
+    def insert(self, key: str, size: int, now: float) -> None:
+        raise NotImplementedError
+
+    def entries(self) -> int:
+        return 0
+
+    def _track(self, delta: int) -> None:
+        self.bytes += delta
+        self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+
+@register_policy("none")
+class NoCache(CachePolicy):
+    def lookup(self, key: str, now: float) -> bool:
+        return False
+
+    def insert(self, key: str, size: int, now: float) -> None:
+        pass
+
+
+@register_policy("lru")
+class LRUPolicy(CachePolicy):
+    """LRU bounded by bytes and/or entries, with an optional TTL (mirrors ``LocalCache``)."""
+
+    def __init__(self, bytes: str = "0", entries: str = "0", ttl: str = "0", canon: str = "default"):
+        super().__init__(canon)
+        self.max_bytes = parse_size(bytes)
+        self.max_entries = int(entries)
+        self.ttl = parse_duration(ttl)
+        self._data: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    def lookup(self, key: str, now: float) -> bool:
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        if self.ttl and entry[1] <= now:
+            self._track(-self._data.pop(key)[0])
+            return False
+        self._data.move_to_end(key)
+        return True
+
+    def insert(self, key: str, size: int, now: float) -> None:
+        if key in self._data:
+            self._track(-self._data.pop(key)[0])
+        if self.max_bytes and size > self.max_bytes:
+            return
+        # Evict before counting the new entry so peak_bytes reflects residency, not the overshoot
+        while self._data and ((self.max_bytes and self.bytes + size > self.max_bytes)
+                              or (self.max_entries and len(self._data) >= self.max_entries)):
+            self._track(-self._data.popitem(last=False)[1][0])
+        self._data[key] = (size, now + self.ttl if self.ttl else math.inf)
+        self._track(size)
+
+    def entries(self) -> int:
+        return len(self._data)
+
+
+@register_policy("unbounded")
+class UnboundedPolicy(LRUPolicy):
+    """Shared Redis-style tier: no size bound, entries expire after ``ttl`` (0 = never)."""
+
+    def __init__(self, ttl: str = "0", canon: str = "default"):
+        super().__init__(ttl=ttl, canon=canon)
+
+
+def parse_policy(spec: str) -> CachePolicy:
+    """Build a policy from ``name[:param=value,...]``."""
+    name, _, params = spec.partition(":")
+    if name not in _POLICIES:
+        raise ValueError(f"Unknown policy '{name}'. Choose from {sorted(_POLICIES)}")
+    kwargs = {}
+    for part in filter(None, params.split(",")):
+        key, _, value = part.partition("=")
+        kwargs[key.strip()] = value.strip()
+    try:
+        return _POLICIES[name](**kwargs)
+    except TypeError as e:
+        raise ValueError(f"Bad parameters for policy '{spec}': {e}") from e
+
+
+###############################################################################
+# REPLAY
+###############################################################################
+def _timestamp(record: Dict[str, Any], index: int, interval: float) -> float:
+    raw = record.get("timestamp", record.get("ts"))
+    if isinstance(raw, (int, float)):
+        return float(raw)
+    if isinstance(raw, str):
+        try:
+            return datetime.fromisoformat(raw.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return index * interval
+
+
+def _new_tier_stats() -> Dict[str, Any]:
+    return {"lookups": 0, "hits": 0, "llm_calls": 0, "baseline_llm_calls": 0}
+
+
+def simulate(records: List[Dict[str, Any]], policies: Dict[str, CachePolicy], *, include_roles: bool = True,
+             batch_size: int = 3, interval: float = 60.0, skill_bytes: int = 700,
+             location_bytes: int = 250) -> Dict[str, Any]:
+    """
+    Replay ``records`` through one policy per tier (missing tiers default to ``none``).
+    Baseline LLM calls are what the same traffic costs with no cache at all.
+    """
+    policies = {tier: policies.get(tier) or NoCache() for tier in TIERS}
+    stats = {tier: _new_tier_stats() for tier in TIERS}
+    records = sorted(enumerate(records), key=lambda item: _timestamp(item[1], item[0], interval))
+
+    for index, record in records:
+        now = _timestamp(record, index, interval)
+        result = record.get("result") if isinstance(record.get("result"), dict) else None
+
+        query_policy, query_stats = policies["query_result"], stats["query_result"]
+        query_key = query_policy.canonicalize(record["query"])
+        query_stats["lookups"] += 1
+        query_stats["baseline_llm_calls"] += 1
+        if query_key and query_policy.lookup(query_key, now):
+            query_stats["hits"] += 1
+            hit_query = True
+        else:
+            query_stats["llm_calls"] += 1
+            size = len(json.dumps(result, ensure_ascii=False)) if result else 4096
+            if query_key:
+                query_policy.insert(query_key, size, now)
+            hit_query = False
+
+        if result is None:
+            continue
+        entities = extract_entities(result, include_roles)
+
+        for tier, names, size in (("skill", entities["skills"] + entities["roles"], skill_bytes),
+                                  ("location", entities["locations"], location_bytes)):
+            policy, tier_stats = policies[tier], stats[tier]
+            keys = list(dict.fromkeys(k for k in (policy.canonicalize(n) for n in names) if k))
+            if not keys:
+                continue
+            baseline = math.ceil(len(keys) / batch_size) if tier == "skill" else 1
+            tier_stats["baseline_llm_calls"] += baseline
+            if hit_query:
+                # A query-result hit never reaches the entity tiers
+                continue
+            misses = 0
+            for key in keys:
+                tier_stats["lookups"] += 1
+                if policy.lookup(key, now):
+                    tier_stats["hits"] += 1
+                else:
+                    misses += 1
+                    policy.insert(key, size, now)
+            if misses:
+                tier_stats["llm_calls"] += math.ceil(misses / batch_size) if tier == "skill" else 1
+
+    report = {}
+    for tier in TIERS:
+        tier_stats, policy = stats[tier], policies[tier]
+        lookups = tier_stats["lookups"]
+        report[tier] = {
+            **tier_stats,
+            "hit_rate": round(tier_stats["hits"] / lookups, 4) if lookups else None,
+            "llm_calls_saved": tier_stats["baseline_llm_calls"] - tier_stats["llm_calls"],
+            "peak_bytes": policy.peak_bytes,
+            "final_entries": policy.entries(),
+        }
+    report["total"] = {
+        "llm_calls": sum(report[t]["llm_calls"] for t in TIERS),
+        "baseline_llm_calls": sum(report[t]["baseline_llm_calls"] for t in TIERS),
+        "peak_bytes": sum(report[t]["peak_bytes"] for t in TIERS),
+    }
+    report["total"]["llm_calls_saved"] = report["total"]["baseline_llm_calls"] - report["total"]["llm_calls"]
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a query log through candidate cache policies")
+    parser.add_argument("--queries", required=True, help="JSONL/text query log (records may carry a recorded 'result')")
+    parser.add_argument("--policy", action="append", required=True,
+                        help="Policy spec, e.g. 'lru:bytes=32M,ttl=15m' (repeatable; each is simulated separately)")
+    parser.add_argument("--tier", action="append", choices=TIERS,
+                        help="Tier(s) the policy applies to (default: skill and location)")
+    parser.add_argument("--no-roles", action="store_true", help="Ignore related roles")
+    parser.add_argument("--batch-size", type=int, default=3, help="Skill descriptions per LLM call")
+    parser.add_argument("--interval", type=float, default=60.0,
+                        help="Seconds between records that carry no timestamp")
+    parser.add_argument("--skill-bytes", type=int, default=700, help="Assumed size of a skill description entry")
+    parser.add_argument("--location-bytes", type=int, default=250, help="Assumed size of an alt-names entry")
+    args = parser.parse_args()
+
+    records = load_query_records(args.queries)
+    tiers = args.tier or ["skill", "location"]
+    results = {}
+    for spec in args.policy:
+        try:
+            tier_policies = {tier: parse_policy(spec) for tier in tiers}
+        except ValueError as e:
+            parser.error(str(e))
+        results[spec] = simulate(
+            records, tier_policies,
+            include_roles=not args.no_roles,
+            batch_size=args.batch_size,
+            interval=args.interval,
+            skill_bytes=args.skill_bytes,
+            location_bytes=args.location_bytes,
+        )
+    print(json.dumps({"records": len(records), "tiers": tiers, "policies": results}, indent=2))
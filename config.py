@@ -25,6 +25,83 @@ DATA_API_BASE_URL = get_env_var("BASE_URL")
 DATA_API_KEY = get_env_var("ADMIN_KEY", required=False)
 SEARCH_API_TIMEOUT = float(get_env_var("SEARCH_API_TIMEOUT", required=False) or 10)
 
+# In-process cache tier in front of Upstash (per warm container)
+LOCAL_CACHE_MAX_BYTES = int(get_env_var("LOCAL_CACHE_MAX_BYTES", required=False) or 32 * 1024 * 1024)
+LOCAL_CACHE_MAX_ENTRIES = int(get_env_var("LOCAL_CACHE_MAX_ENTRIES", required=False) or 5000)
+LOCAL_CACHE_TTL_SECONDS = float(get_env_var("LOCAL_CACHE_TTL_SECONDS", required=False) or 900)
+
+# Freshness policy for generated cache entries (descriptions, alt names)
+CACHE_SOFT_TTL_SECONDS = int(get_env_var("CACHE_SOFT_TTL_SECONDS", required=False) or 30 * 24 * 3600)
+CACHE_HARD_TTL_SECONDS = int(get_env_var("CACHE_HARD_TTL_SECONDS", required=False) or 180 * 24 * 3600)
+# Description provider whose prompt version counts as current; stale entries are refreshed with it
+CACHE_CANONICAL_PROVIDER = get_env_var("CACHE_CANONICAL_PROVIDER", required=False) or "gemini"
+# Upper bound the handler waits for background work after publishing results; LLM work goes to the
+# worker (jobs.py), so only Redis writes and job hand-offs are left to finish
+BACKGROUND_DRAIN_SECONDS = float(get_env_var("BACKGROUND_DRAIN_SECONDS", required=False) or 0.05)
+# Lambda function that runs out-of-band jobs (stale refreshes, related roles), invoked asynchronously;
+# defaults to this function, "none" runs jobs in-process (bounded by the drain above)
+HYDE_WORKER_FUNCTION = (get_env_var("HYDE_WORKER_FUNCTION", required=False)
+                        or os.getenv("AWS_LAMBDA_FUNCTION_NAME") or "none")
+
+# Bloom filter of populated cache keys (skips futile lookups for long-tail entities)
+BLOOM_FILTER_ENABLED = (get_env_var("BLOOM_FILTER_ENABLED", required=False) or "true").lower() == "true"
+BLOOM_CAPACITY = int(get_env_var("BLOOM_CAPACITY", required=False) or 200000)
+BLOOM_ERROR_RATE = float(get_env_var("BLOOM_ERROR_RATE", required=False) or 0.01)
+BLOOM_REFRESH_SECONDS = float(get_env_var("BLOOM_REFRESH_SECONDS", required=False) or 60)
+
+# Heavy-hitter tracking of hot entities (prefetched and pinned in the local tier)
+HEAVY_HITTER_TOP_K = int(get_env_var("HEAVY_HITTER_TOP_K", required=False) or 50)
+HEAVY_HITTER_PREFETCH = (get_env_var("HEAVY_HITTER_PREFETCH", required=False) or "true").lower() == "true"
+LOCAL_CACHE_PINNED_MAX_BYTES = int(get_env_var("LOCAL_CACHE_PINNED_MAX_BYTES", required=False) or 8 * 1024 * 1024)
+LOCAL_CACHE_PIN_TTL_SECONDS = float(get_env_var("LOCAL_CACHE_PIN_TTL_SECONDS", required=False) or 3600)
+
+# Answer location alternative names for well-known places from the bundled gazetteer.txt
+GAZETTEER_ENABLED = (get_env_var("GAZETTEER_ENABLED", required=False) or "true").lower() == "true"
+
+# Reuse organisation aliases across queries (org_aliases:{norm}); hints offer them to the HyDE prompt
+ORG_ALIAS_CACHE = (get_env_var("ORG_ALIAS_CACHE", required=False) or "true").lower() == "true"
+ORG_ALIAS_HINTS = (get_env_var("ORG_ALIAS_HINTS", required=False) or "true").lower() == "true"
+
+# Speculative enrichment of known entity names in the query while HyDE step 1 runs
+SPECULATION_ENABLED = (get_env_var("SPECULATION_ENABLED", required=False) or "false").lower() == "true"
+SPECULATION_MAX_NAMES = int(get_env_var("SPECULATION_MAX_NAMES", required=False) or 8)
+# Longest the enrichment stages wait for a speculative batch before generating the names themselves
+SPECULATION_WAIT_SECONDS = float(get_env_var("SPECULATION_WAIT_SECONDS", required=False) or 2.0)
+
+# Answer simple queries from the query_lexicon lexicons instead of the HyDE LLM (per-request flag: fast_path)
+HYDE_FAST_PATH = (get_env_var("HYDE_FAST_PATH", required=False) or "false").lower() == "true"
+FAST_PATH_MIN_CONFIDENCE = float(get_env_var("FAST_PATH_MIN_CONFIDENCE", required=False) or 0.9)
+
+# Step-1 engine: "monolithic" (single logicalHyde prompt) or "parallel" (per-dimension prompts)
+HYDE_ENGINE = (get_env_var("HYDE_ENGINE", required=False) or "monolithic").lower()
+
+# Cheap-first step-1 cascade: comma-separated providers tried before hyde_provider (per-request
+# flag: hyde_cascade); a tier's output is escalated when it has more than CASCADE_MAX_ISSUES repairs
+HYDE_CASCADE = [p.strip() for p in (get_env_var("HYDE_CASCADE", required=False) or "").split(",") if p.strip()]
+CASCADE_MAX_ISSUES = int(get_env_var("CASCADE_MAX_ISSUES", required=False) or 2)
+
+# Step-1 provider when a request names none (unknown names resolve to the closest MODEL_CONFIGS key)
+HYDE_DEFAULT_PROVIDER = get_env_var("HYDE_DEFAULT_PROVIDER", required=False) or "azure-gpt-4.1-mini"
+# Route step 1 per query by complexity (per-request flag: hyde_provider "auto"); HYDE_ROUTER_TIERS
+# lists the providers from the simplest to the most complex queries
+HYDE_ROUTER = (get_env_var("HYDE_ROUTER", required=False) or "false").lower() == "true"
+HYDE_ROUTER_TIERS = [p.strip() for p in (get_env_var("HYDE_ROUTER_TIERS", required=False)
+                                         or "openainano,azure-gpt-4.1-mini,openai4o").split(",") if p.strip()]
+
+# Step-1 output format for the monolithic engine: "full" or "lean" (compact, expanded by hyde_lean)
+HYDE_OUTPUT = (get_env_var("HYDE_OUTPUT", required=False) or "full").lower()
+
+# Publish the step-1 structure as HYDE_PARTIAL before enrichment (per-request flag: progressive)
+HYDE_PROGRESSIVE = (get_env_var("HYDE_PROGRESSIVE", required=False) or "false").lower() == "true"
+# How long the request waits for background related-role descriptions before returning without them
+RELATED_ROLES_WAIT_SECONDS = float(get_env_var("RELATED_ROLES_WAIT_SECONDS", required=False) or 1.0)
+# How long the worker waits for the search document to reach HYDE_COMPLETE before dropping a
+# related-role patch
+RELATED_ROLES_PATCH_WAIT_SECONDS = float(get_env_var("RELATED_ROLES_PATCH_WAIT_SECONDS", required=False) or 30)
+
+# dbQueryDetails fields that resolve to no known profile field: "drop" (default) or "keep"
+DB_FIELD_UNKNOWN_ACTION = (get_env_var("DB_FIELD_UNKNOWN_ACTION", required=False) or "drop").lower()
+
 # Redis Configuration (Upstash REST)
 UPSTASH_REDIS_REST_URL = get_env_var("UPSTASH_REDIS_REST_URL")
 UPSTASH_REDIS_REST_TOKEN = get_env_var("UPSTASH_REDIS_REST_TOKEN")
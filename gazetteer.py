@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Bundled gazetteer for location alternative names.
+
+``get_chat_completion_location_alt_names`` asks an LLM for alternative names even for
+Bangalore, NYC or SF, which never change. ``gazetteer.txt`` lists well-known places with
+their current, historical and abbreviated names (one place per line, names separated by
+``|``). ``process_location_alt_names`` consults it before the local tier, Redis and the
+LLM, so only unknown places reach the LLM.
+
+The index is built on first use. It is a sorted list of normalised names with a parallel
+``array`` of row numbers: exact lookups and prefix completions are a bisect, and rows stay
+as the raw ``|``-joined lines until a hit splits one. A form listed under two places is
+ambiguous and never answered from here.
+
+Gazetteer answers are not written to Redis; the response carries them as usual.
+
+Usage:
+    python gazetteer.py lookup Bangalore NYC "Ho Chi Minh City"
+    python gazetteer.py complete ban
+    python gazetteer.py bench
+"""
+
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from typing import List, Optional
+
+from utils import normalize_text
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.txt")
+
+# The LLM prompt asks for 2-4 alternatives; allow a little more for well-known places
+MAX_ALT_NAMES = 6
+
+
+class Gazetteer:
+    def __init__(self, rows: List[str]):
+        self._rows = rows
+        pairs = sorted((normalize_text(name), row_id)
+                       for row_id, row in enumerate(rows) for name in row.split("|"))
+        keys: List[str] = []
+        ids = array("I")
+        ambiguous = set()
+        for key, row_id in pairs:
+            if not key:
+                continue
+            if keys and keys[-1] == key:
+                if ids[-1] != row_id:
+                    ambiguous.add(key)
+                continue
+            keys.append(key)
+            ids.append(row_id)
+        self._keys = keys
+        self._ids = ids
+        self._ambiguous = frozenset(ambiguous)
+
+    @classmethod
+    def load(cls, path: str = GAZETTEER_PATH) -> "Gazetteer":
+        with open(path, encoding="utf-8") as f:
+            rows = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _row(self, key: str) -> Optional[int]:
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key and key not in self._ambiguous:
+            return self._ids[i]
+        return None
+
+    def lookup(self, name: str) -> Optional[List[str]]:
+        """Alternative names for ``name`` (excluding ``name`` itself), or ``None`` if unknown."""
+        key = normalize_text(name)
+        row = self._row(key)
+        if row is None:
+            return None
+        return [alt for alt in self._rows[row].split("|") if normalize_text(alt) != key][:MAX_ALT_NAMES]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Canonical names of places with a name starting with ``prefix``."""
+        key = normalize_text(prefix)
+        found: List[str] = []
+        i = bisect_left(self._keys, key)
+        while i < len(self._keys) and self._keys[i].startswith(key) and len(found) < limit:
+            canonical = self._rows[self._ids[i]].split("|", 1)[0]
+            if canonical not in found:
+                found.append(canonical)
+            i += 1
+        return found
+
+
+_gazetteer: Optional[Gazetteer] = None
+_lock = threading.Lock()
+
+
+def get() -> Gazetteer:
+    """The process-wide gazetteer, loaded on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer.load()
+    return _gazetteer
+
+
+def lookup(name: str) -> Optional[List[str]]:
+    return get().lookup(name)
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+    import tracemalloc
+
+    parser = argparse.ArgumentParser(description="Inspect and benchmark the bundled gazetteer")
+    sub = parser.add_subparsers(dest="command", required=True)
+    lookup_parser = sub.add_parser("lookup", help="Alternative names for places")
+    lookup_parser.add_argument("names", nargs="+")
+    complete_parser = sub.add_parser("complete", help="Places with a name starting with a prefix")
+    complete_parser.add_argument("prefix")
+    bench_parser = sub.add_parser("bench", help="Load and lookup timings")
+    bench_parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.command == "lookup":
+        for name in args.names:
+            print(f"{name:<30} -> {lookup(name)}")
+    elif args.command == "complete":
+        print(get().complete(args.prefix))
+    else:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        gazetteer = Gazetteer.load()
+        load_ms = (time.perf_counter() - t0) * 1000
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        names = [row.split("|")[random.randrange(row.count("|") + 1)] for row in gazetteer._rows]
+        misses = [f"{name} Township" for name in names]
+        timings = {}
+        for label, pool in (("hit", names), ("miss", misses)):
+            sample = [random.choice(pool) for _ in range(args.lookups)]
+            t0 = time.perf_counter()
+            for name in sample:
+                gazetteer.lookup(name)
+            timings[label] = (time.perf_counter() - t0) * 1e6 / args.lookups
+        t0 = time.perf_counter()
+        for _ in range(args.lookups // 10):
+            gazetteer.complete("san")
+        complete_us = (time.perf_counter() - t0) * 1e6 / (args.lookups // 10)
+        print(f"places {len(gazetteer)}, names {len(gazetteer._keys)}, ambiguous {len(gazetteer._ambiguous)}")
+        print(f"load {load_ms:.2f} ms, resident {current / 1024:.1f} KiB (peak {peak / 1024:.1f} KiB)")
+        print(f"lookup hit {timings['hit']:.2f} us, miss {timings['miss']:.2f} us, complete {complete_us:.2f} us")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Heavy-hitter tracking for skills and locations.
+
+Each container keeps a count-min sketch per cache family (fed by ``_enrich_skills`` and
+``_enrich_locations``) plus a small candidate set of the items whose estimated count puts
+them in the local top-K. After each invocation the candidates' new counts are merged into a
+daily Redis sorted set per family, so the fleet-wide top-K is available to every container
+at the cost of one pipelined request per flush (at most K ``ZINCRBY`` per family).
+
+Warm containers prefetch the fleet-wide top entities from Redis and pin them in the local
+tier, so the most common lookups never leave the process.
+
+Usage:
+    python heavy_hitters.py top --family skill --k 20 --days 7
+"""
+
+import asyncio
+import hashlib
+import time
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import HEAVY_HITTER_PREFETCH, HEAVY_HITTER_TOP_K, LOCAL_CACHE_PIN_TTL_SECONDS
+from logging_config import setup_logger
+import background_tasks
+
+logger = setup_logger(__name__)
+
+FAMILIES = ("skill", "location_alt_names")
+WINDOW_TTL_SECONDS = 14 * 24 * 3600
+# Members kept per daily sorted set; the tail beyond this is trimmed on flush
+WINDOW_MAX_MEMBERS = 2000
+
+
+class CountMinSketch:
+    """Count-min sketch with ``depth`` rows of ``width`` 32-bit counters."""
+
+    __slots__ = ("width", "depth", "rows")
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("I", bytes(4 * width)) for _ in range(depth)]
+
+    def _indexes(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Increment ``item`` and return its new estimated count."""
+        estimate = None
+        for row, idx in zip(self.rows, self._indexes(item)):
+            row[idx] = min(row[idx] + count, 0xFFFFFFFF)
+            estimate = row[idx] if estimate is None else min(estimate, row[idx])
+        return estimate
+
+    def estimate(self, item: str) -> int:
+        return min(row[idx] for row, idx in zip(self.rows, self._indexes(item)))
+
+
+class HeavyHitterTracker:
+    """Per-container sketch plus top-K candidate set for one cache family."""
+
+    def __init__(self, family: str, k: int = HEAVY_HITTER_TOP_K, width: int = 2048, depth: int = 4):
+        self.family = family
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates: Dict[str, int] = {}
+        # Exact counts observed since the last flush, only for current candidates
+        self._unflushed: Counter = Counter()
+
+    def observe(self, items: Iterable[str]) -> None:
+        for item in items:
+            if not item:
+                continue
+            estimate = self.sketch.add(item)
+            if item in self.candidates or len(self.candidates) < self.k:
+                self.candidates[item] = estimate
+            else:
+                weakest = min(self.candidates, key=self.candidates.get)
+                if estimate > self.candidates[weakest]:
+                    del self.candidates[weakest]
+                    self._unflushed.pop(weakest, None)
+                    self.candidates[item] = estimate
+            if item in self.candidates:
+                self._unflushed[item] += 1
+
+    def local_top_k(self, k: Optional[int] = None) -> List[Tuple[str, int]]:
+        return sorted(self.candidates.items(), key=lambda kv: kv[1], reverse=True)[:k or self.k]
+
+    def take_unflushed(self) -> Dict[str, int]:
+        pending, self._unflushed = dict(self._unflushed), Counter()
+        return pending
+
+
+def _window_key(family: str, day: datetime) -> str:
+    return f"hh:{family}:{day.strftime('%Y%m%d')}"
+
+
+def flush(redis_client: Any, trackers: Dict[str, HeavyHitterTracker]) -> int:
+    """
+    Merge unflushed candidate counts into today's Redis sorted sets in one pipelined
+    request (one HTTP round trip to Upstash); returns members updated.
+    """
+    today = datetime.now(timezone.utc)
+    pipeline = redis_client.pipeline()
+    updated = 0
+    for family, tracker in trackers.items():
+        pending = tracker.take_unflushed()
+        if not pending:
+            continue
+        key = _window_key(family, today)
+        for member, count in pending.items():
+            pipeline.zincrby(key, count, member)
+            updated += 1
+        pipeline.expire(key, WINDOW_TTL_SECONDS)
+        pipeline.zremrangebyrank(key, 0, -(WINDOW_MAX_MEMBERS + 1))
+    if updated:
+        pipeline.exec()
+    return updated
+
+
+def get_top_k(redis_client: Any, family: str, k: int = HEAVY_HITTER_TOP_K, days: int = 1) -> List[Tuple[str, float]]:
+    """Fleet-wide top-K ``(cache_key, count)`` for ``family`` over the last ``days`` daily windows."""
+    totals: Counter = Counter()
+    today = datetime.now(timezone.utc)
+    for offset in range(days):
+        key = _window_key(family, today - timedelta(days=offset))
+        for member, score in redis_client.zrevrange(key, 0, k * 2 - 1, withscores=True) or []:
+            totals[member] += float(score)
+    return totals.most_common(k)
+
+
+###############################################################################
+# PER-CONTAINER STATE
+###############################################################################
+trackers: Dict[str, HeavyHitterTracker] = {family: HeavyHitterTracker(family) for family in FAMILIES}
+_last_prefetch = 0.0
+
+
+def observe(family: str, cache_keys: Iterable[str]) -> None:
+    """Record lookups of ``cache_keys`` (full ``family:norm`` keys) for ``family``."""
+    tracker = trackers.get(family)
+    if tracker is not None:
+        tracker.observe(cache_keys)
+
+
+def prefetch_and_pin(redis_client: Any, local_cache: Any, k: int = HEAVY_HITTER_TOP_K) -> int:
+    """Load the fleet-wide top entities (and location metadata) with one MGET per family and pin them locally."""
+    from cache_codec import decode_value
+    from cache_policy import join_meta, meta_key
+
+    pinned = 0
+    for family in FAMILIES:
+        keys = [key for key, _ in get_top_k(redis_client, family, k, days=2)]
+        if not keys:
+            continue
+        meta_keys = [meta_key(family, key) for key in keys if meta_key(family, key)]
+        values = redis_client.mget(*keys, *meta_keys)
+        metas = values[len(keys):] or [None] * len(keys)
+        for key, raw, raw_meta in zip(keys, values, metas):
+            if not raw:
+                continue
+            try:
+                value = join_meta(family, decode_value(raw), decode_value(raw_meta) if raw_meta else None)
+                if local_cache.pin(key, value, size=len(raw)):
+                    pinned += 1
+            except ValueError:
+                logger.warning(f"Skipping undecodable hot entry {key}")
+    logger.info(f"Pinned {pinned} heavy-hitter entries in the local cache")
+    return pinned
+
+
+def ensure_prefetched(redis_client: Any, local_cache: Any) -> None:
+    """
+    Schedule a background prefetch on cold start and whenever pins are about to expire.
+    Runs in a worker thread alongside HyDE step 1, so it never adds request latency.
+    """
+    global _last_prefetch
+    if not HEAVY_HITTER_PREFETCH:
+        return
+    if _last_prefetch and time.monotonic() - _last_prefetch < LOCAL_CACHE_PIN_TTL_SECONDS * 0.9:
+        return
+    _last_prefetch = time.monotonic()
+
+    def _run() -> None:
+        try:
+            prefetch_and_pin(redis_client, local_cache)
+        except Exception as e:
+            logger.warning(f"Heavy-hitter prefetch failed: {e}")
+
+    background_tasks.schedule("heavy_hitter_prefetch", asyncio.to_thread(_run))
+
+
+def schedule_flush(redis_client: Any) -> None:
+    """Push this invocation's counts to Redis in the background."""
+    def _run() -> None:
+        try:
+            flush(redis_client, trackers)
+        except Exception as e:
+            logger.warning(f"Heavy-hitter flush failed: {e}")
+
+    background_tasks.schedule("heavy_hitter_flush", asyncio.to_thread(_run))
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Show fleet-wide heavy hitters")
+    parser.add_argument("command", choices=["top"])
+    parser.add_argument("--family", choices=FAMILIES, default="skill")
+    parser.add_argument("--k", type=int, default=HEAVY_HITTER_TOP_K)
+    parser.add_argument("--days", type=int, default=1)
+    args = parser.parse_args()
+
+    from config import redis_client
+
+    print(json.dumps(get_top_k(redis_client, args.family, args.k, args.days), indent=2, ensure_ascii=False))
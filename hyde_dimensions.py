@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Parallel per-dimension HyDE extraction.
+
+The monolithic ``logicalHyde`` prompt has one model write every section of the response in
+a single generation, so output tokens accumulate serially. This engine sends one short
+prompt per dimension (``prompts/hydeDimensions.py``) concurrently. Each prompt returns only
+its ``xBasedQuery`` flag and ``xDetails`` block, and the blocks are merged into the same
+response schema, so ``HydeResult`` validation and enrichment work unchanged. Latency becomes
+roughly that of the slowest dimension instead of the sum.
+
+A dimension whose call or JSON fails contributes an empty section; the others still count.
+
+Select it with ``HYDE_ENGINE=parallel`` or ``flags.hyde_engine``. Compare it with the
+monolithic prompt on a query set (needs provider credentials):
+    python hyde_dimensions.py --provider gemini --queries queries.txt
+"""
+
+import asyncio
+import time
+from datetime import datetime as dt
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from json_extract import JSONExtractionError, extract_json_object
+from logging_config import setup_logger
+from prompts.hydeDimensions import (
+    db_message,
+    location_message,
+    organisation_message,
+    sector_message,
+    skill_message,
+)
+
+logger = setup_logger(__name__)
+
+# dimension -> (prompt, flag key, details key, list key)
+DIMENSIONS = {
+    "location": (location_message, "regionBasedQuery", "locationDetails", "locations"),
+    "organisation": (organisation_message, "organisationBasedQuery", "organisationDetails", "organizations"),
+    "sector": (sector_message, "sectorBasedQuery", "sectorDetails", "sectors"),
+    "skill": (skill_message, "skillBasedQuery", "skillDetails", "skills"),
+    "db": (db_message, "dbBasedQuery", "dbQueryDetails", "queries"),
+}
+
+
+def usage_of(response: Any) -> Dict[str, int]:
+    usage = getattr(response, "usage", None)
+    return {
+        "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+        "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+    }
+
+
+async def _run_dimension(llm: Any, provider: str, name: str, query: str, current_date: str, hint: str = ""
+                         ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    prompt, flag_key, details_key, _ = DIMENSIONS[name]
+    started = time.perf_counter()
+    stats: Dict[str, Any] = {"ok": False, "prompt_tokens": 0, "completion_tokens": 0}
+    section: Dict[str, Any] = {}
+    try:
+        response = await llm.get_completion(
+            provider=provider,
+            messages=[{"role": "user", "content": prompt.replace("{{query}}", query).replace(
+                "{{current_date}}", current_date) + hint}],
+            response_format={"type": "json_object"},
+            temperature=0,
+        )
+        stats.update(usage_of(response))
+        parsed, _ = extract_json_object(response.choices[0].message.content or "")
+        if isinstance(parsed, dict):
+            section = {key: parsed[key] for key in (flag_key, details_key) if key in parsed}
+            stats["ok"] = True
+    except JSONExtractionError as e:
+        logger.warning(f"HyDE {name} dimension returned no JSON: {e}")
+    except Exception as e:
+        logger.warning(f"HyDE {name} dimension failed: {e}")
+    stats["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return section, stats
+
+
+async def extract(llm: Any, provider: str, query: str, dimensions: Optional[Iterable[str]] = None,
+                  hints: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Run the dimension prompts concurrently and merge them into a step-1 result dict.
+    ``hints`` maps a dimension to text appended to its prompt.
+    Returns ``(result, stats)`` with per-dimension ``ms``, token counts and ``ok``.
+    """
+    names = list(dimensions or DIMENSIONS)
+    hints = hints or {}
+    current_date = dt.now().strftime("%Y-%m-%d")
+    outcomes = await asyncio.gather(*(_run_dimension(llm, provider, name, query, current_date, hints.get(name, ""))
+                                      for name in names))
+
+    response: Dict[str, Any] = {}
+    key_components: List[str] = []
+    stats: Dict[str, Dict[str, Any]] = {}
+    for name, (section, dimension_stats) in zip(names, outcomes):
+        _, flag_key, details_key, list_key = DIMENSIONS[name]
+        response.update(section)
+        stats[name] = dimension_stats
+        details = section.get(details_key)
+        if section.get(flag_key) and isinstance(details, dict) and isinstance(details.get(list_key), list):
+            key_components += [item.get("name") if isinstance(item, dict) else item
+                               for item in details[list_key] if isinstance(item, (dict, str))]
+    result = {
+        "query_breakdown": {
+            "key_components": [c for c in key_components if isinstance(c, str)],
+            "analysis": "",
+        },
+        "response": response,
+    }
+    return result, stats
+
+
+def _item_key(item: Any) -> str:
+    if isinstance(item, dict):
+        return str(item.get("field") or item.get("name") or "").casefold()
+    return str(item).casefold()
+
+
+def agreement(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Per-section Jaccard similarity of item names (db queries: fields) between two results."""
+    scores: Dict[str, Optional[float]] = {}
+    for name, (_, flag_key, details_key, list_key) in DIMENSIONS.items():
+        sets = []
+        for result in (a, b):
+            response = result.get("response") or {}
+            items = ((response.get(details_key) or {}).get(list_key) or []) if response.get(flag_key) else []
+            sets.append({_item_key(item) for item in items})
+        union = sets[0] | sets[1]
+        scores[name] = round(len(sets[0] & sets[1]) / len(union), 3) if union else None
+    return scores
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import statistics
+
+    from hyde_logic import HydeReasoning
+
+    parser = argparse.ArgumentParser(description="Benchmark parallel per-dimension HyDE against the monolithic prompt")
+    parser.add_argument("--provider", default="gemini")
+    parser.add_argument("--queries", help="Text file with one query per line")
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    queries = ["Python developers in Berlin",
+               "ex-Google product managers now at fintech startups in Bangalore",
+               "AWS certified CTOs from FAANG companies",
+               "computer science students graduating next year from IIT"]
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    async def _bench():
+        hyde = HydeReasoning(args.provider, args.provider)
+        rows = []
+        for query in queries:
+            for _ in range(args.rounds):
+                t0 = time.perf_counter()
+                mono = await hyde._call_hyde_llm(query)
+                mono_ms = (time.perf_counter() - t0) * 1000
+                mono_usage = dict(hyde.last_usage or {})
+                t0 = time.perf_counter()
+                parallel, stats = await extract(hyde.llm, args.provider, query)
+                parallel_ms = (time.perf_counter() - t0) * 1000
+                rows.append({
+                    "query": query,
+                    "monolithic_ms": round(mono_ms), "parallel_ms": round(parallel_ms),
+                    "monolithic_completion_tokens": mono_usage.get("completion_tokens"),
+                    "parallel_completion_tokens": sum(s["completion_tokens"] for s in stats.values()),
+                    "parallel_slowest_completion_tokens": max(s["completion_tokens"] for s in stats.values()),
+                    "parallel_prompt_tokens": sum(s["prompt_tokens"] for s in stats.values()),
+                    "monolithic_prompt_tokens": mono_usage.get("prompt_tokens"),
+                    "agreement": agreement(mono, parallel),
+                })
+        return rows
+
+    rows = asyncio.run(_bench())
+    print(json.dumps(rows, indent=2))
+    print(json.dumps({
+        "median_monolithic_ms": statistics.median(r["monolithic_ms"] for r in rows),
+        "median_parallel_ms": statistics.median(r["parallel_ms"] for r in rows),
+    }, indent=2))
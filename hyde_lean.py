@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Lean HyDE output: a compact response format and its local expansion to the full schema.
+
+HyDE step-1 latency is dominated by output tokens, and much of the full response is
+boilerplate the pipeline discards or can derive itself: ``query_breakdown.analysis``
+prose, ``key_components``, the ``*BasedQuery`` flags, empty sections, default operators
+and temporals, ``dbQueryDetails`` descriptions and the ``regexPatterns.fields`` lists. With ``output="lean"`` the
+monolithic prompt (``messageKeywordLean``) asks for only the criteria::
+
+    {"locations": ["Bangalore", "Bengaluru"],
+     "organizations": [{"name": "Google", "temporal": "past", "aliases": ["Alphabet"]}],
+     "skills": [{"name": "Machine Learning", "keywords": ["\\\\bml\\\\b"], "match": "role"}],
+     "operators": {"skills": "OR"}}
+
+``expand`` rebuilds the full step-1 dict from it before ``HydeResult`` validation, so
+everything downstream is unchanged. The few-shot examples are the full-format examples
+converted with ``to_lean``, which keeps the two variants in step.
+
+Measure the reduction on a replay corpus (JSONL with recorded ``result`` for the offline
+size comparison; ``--live`` runs both prompts and compares tokens, latency and agreement):
+    python hyde_lean.py measure --queries queries.jsonl
+    python hyde_lean.py measure --queries queries.jsonl --live --provider gemini
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from hyde_models import HydeResult
+from prompts.logicalHyde import exampleKeyword
+
+# (lean list key, flag key, details key, default operator)
+SECTIONS = (
+    ("locations", "regionBasedQuery", "locationDetails", "OR"),
+    ("organizations", "organisationBasedQuery", "organisationDetails", "OR"),
+    ("sectors", "sectorBasedQuery", "sectorDetails", "AND"),
+    ("skills", "skillBasedQuery", "skillDetails", "AND"),
+    ("queries", "dbBasedQuery", "dbQueryDetails", "AND"),
+)
+
+ROLE_FIELDS = ["workExperience.title", "linkedinHeadline"]
+SKILL_FIELDS = ["workExperience.description", "bio", "education.description"]
+BOTH_FIELDS = ["workExperience.title", "linkedinHeadline", "workExperience.description", "bio"]
+MATCH_FIELDS = {"role": ROLE_FIELDS, "skill": SKILL_FIELDS}
+
+
+def _expand_item(list_key: str, item: Any) -> Any:
+    if not isinstance(item, dict):
+        return {"name": item} if list_key == "locations" and isinstance(item, str) else item
+    item = dict(item)
+    if list_key in ("organizations", "sectors"):
+        item.setdefault("temporal", "any")
+    if list_key == "sectors" and isinstance(item.get("companyStage"), dict):
+        stage = item["companyStage"]
+        item["companyStage"] = {"enabled": True, "sizeRange": {k: stage[k] for k in ("min", "max") if k in stage}}
+    if list_key == "skills":
+        item.setdefault("priority", "primary")
+        keywords, match, fields = item.pop("keywords", None), item.pop("match", None), item.pop("fields", None)
+        if keywords:
+            if not isinstance(fields, list):
+                fields = MATCH_FIELDS.get(match, BOTH_FIELDS)
+            item["regexPatterns"] = {"keywords": keywords, "fields": list(fields)}
+    return item
+
+
+def expand(lean: Dict[str, Any]) -> Dict[str, Any]:
+    """Full step-1 dict (query_breakdown + response) from a lean response."""
+    operators = lean.get("operators") if isinstance(lean.get("operators"), dict) else {}
+    # Omitted sections come out exactly as in an empty result
+    result = HydeResult.empty().to_dict()
+    response = result["response"]
+    key_components: List[str] = []
+    for list_key, flag_key, details_key, default_operator in SECTIONS:
+        items = lean.get(list_key)
+        if not isinstance(items, list) or not items:
+            continue
+        items = [_expand_item(list_key, item) for item in items]
+        response[flag_key] = 1
+        response[details_key] = {"operator": operators.get(list_key, default_operator), list_key: items}
+        if list_key != "queries":
+            key_components += [item["name"] for item in items if isinstance(item, dict) and isinstance(item.get("name"), str)]
+    result["query_breakdown"]["key_components"] = key_components
+    return result
+
+
+def _lean_item(list_key: str, item: Any) -> Any:
+    if not isinstance(item, dict):
+        return item
+    if list_key == "locations":
+        return item.get("name") if set(item) <= {"name"} else item
+    item = {k: v for k, v in item.items() if v not in (None, [], "")}
+    if item.get("temporal") == "any":
+        item.pop("temporal")
+    if list_key == "sectors" and isinstance(item.get("companyStage"), dict):
+        item["companyStage"] = dict(item["companyStage"].get("sizeRange") or {})
+    if list_key == "queries":
+        item.pop("description", None)
+    if list_key == "skills":
+        if item.get("priority") == "primary":
+            item.pop("priority")
+        patterns = item.pop("regexPatterns", None)
+        if isinstance(patterns, dict) and patterns.get("keywords"):
+            item["keywords"] = patterns["keywords"]
+            fields = patterns.get("fields") or []
+            match = next((code for code, known in MATCH_FIELDS.items() if set(fields) == set(known)), None)
+            if match:
+                item["match"] = match
+            elif set(fields) != set(BOTH_FIELDS):
+                item["fields"] = fields
+    return item
+
+
+def to_lean(full: Dict[str, Any]) -> Dict[str, Any]:
+    """The lean form of a full step-1 dict (used for the few-shot examples and measurement)."""
+    response = full.get("response") or {}
+    lean: Dict[str, Any] = {}
+    operators = {}
+    for list_key, flag_key, details_key, default_operator in SECTIONS:
+        details = response.get(details_key) or {}
+        items = details.get(list_key) or []
+        if not response.get(flag_key) or not items:
+            continue
+        lean[list_key] = [_lean_item(list_key, item) for item in items]
+        if details.get("operator", default_operator) != default_operator:
+            operators[list_key] = details["operator"]
+    if operators:
+        lean["operators"] = operators
+    return lean
+
+
+def is_lean(parsed: Any) -> bool:
+    return isinstance(parsed, dict) and "response" not in parsed and "query_breakdown" not in parsed
+
+
+@lru_cache(maxsize=1)
+def lean_examples() -> str:
+    """``exampleKeyword`` with every ideal output converted to the lean form (one line each)."""
+    from json_extract import extract_json_object
+
+    def _convert(match: "re.Match") -> str:
+        full, _ = extract_json_object(match.group(2))
+        return f"{match.group(1)}{json.dumps(to_lean(full), ensure_ascii=False)}</ideal_output>"
+
+    return re.sub(r"(<ideal_output>)(.*?)</ideal_output>", _convert, exampleKeyword, flags=re.S)
+
+
+@lru_cache(maxsize=1)
+def _encoder() -> Optional[Any]:
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:  # not installed, or the encoding file cannot be fetched
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Output token estimate: tiktoken's o200k encoding when available, else ~4 characters a token."""
+    encoder = _encoder()
+    return len(encoder.encode(text)) if encoder is not None else max(1, len(text) // 4)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import statistics
+    import time
+
+    parser = argparse.ArgumentParser(description="Measure the lean HyDE output against the full output")
+    sub = parser.add_subparsers(dest="command", required=True)
+    measure_parser = sub.add_parser("measure")
+    measure_parser.add_argument("--queries", help="Replay corpus (JSONL with recorded results, or text)")
+    measure_parser.add_argument("--live", action="store_true", help="Call the provider with both prompts")
+    measure_parser.add_argument("--provider", default="gemini")
+    sub.add_parser("examples", help="Print the lean few-shot examples")
+    args = parser.parse_args()
+
+    if args.command == "examples":
+        print(lean_examples())
+        raise SystemExit(0)
+
+    from hyde_dimensions import agreement
+    from prewarm import load_query_records
+
+    records = load_query_records(args.queries) if args.queries else []
+    if not args.live:
+        # Offline: size of each recorded result (the examples if no corpus) in both forms
+        if not records:
+            from json_extract import extract_json_object
+            records = [{"query": q, "result": extract_json_object(o)[0]} for q, o in re.findall(
+                r"<query>(.*?)</query>\s*<ideal_output>(.*?)</ideal_output>", exampleKeyword, re.S)]
+        rows = []
+        for record in records:
+            full = record.get("result")
+            if not isinstance(full, dict) or "response" not in full:
+                continue
+            # Each in the layout its prompt's examples use
+            lean = to_lean(full)
+            full_text, lean_text = json.dumps(full, indent=2), json.dumps(lean, ensure_ascii=False)
+            scores = [v for v in agreement(full, expand(lean)).values() if v is not None]
+            rows.append((estimate_tokens(full_text), estimate_tokens(lean_text), min(scores, default=1.0)))
+        if not rows:
+            raise SystemExit("No records with a recorded result")
+        full_total, lean_total = sum(r[0] for r in rows), sum(r[1] for r in rows)
+        print(json.dumps({
+            "results": len(rows),
+            "full_tokens_median": statistics.median(r[0] for r in rows),
+            "lean_tokens_median": statistics.median(r[1] for r in rows),
+            "reduction": round(1 - lean_total / full_total, 3),
+            # 1.0 when expand(to_lean(result)) keeps every item of every section
+            "roundtrip_agreement_min": min(r[2] for r in rows),
+        }, indent=2))
+    else:
+        from hyde_logic import HydeReasoning
+
+        async def _live():
+            rows = []
+            for record in records:
+                per_mode = {}
+                for mode in ("full", "lean"):
+                    hyde = HydeReasoning(args.provider, args.provider, engine="monolithic", output=mode)
+                    t0 = time.perf_counter()
+                    result = await hyde._call_hyde_llm(record["query"])
+                    per_mode[mode] = (result, (time.perf_counter() - t0) * 1000, dict(hyde.last_usage or {}))
+                rows.append({
+                    "query": record["query"],
+                    "full_ms": round(per_mode["full"][1]), "lean_ms": round(per_mode["lean"][1]),
+                    "full_completion_tokens": per_mode["full"][2].get("completion_tokens"),
+                    "lean_completion_tokens": per_mode["lean"][2].get("completion_tokens"),
+                    "agreement": agreement(per_mode["full"][0], per_mode["lean"][0]),
+                })
+            return rows
+
+        rows = asyncio.run(_live())
+        print(json.dumps(rows, indent=2))
+        if rows:
+            print(json.dumps({
+                "median_full_ms": statistics.median(r["full_ms"] for r in rows),
+                "median_lean_ms": statistics.median(r["lean_ms"] for r in rows),
+                "median_full_completion_tokens": statistics.median(r["full_completion_tokens"] or 0 for r in rows),
+                "median_lean_completion_tokens": statistics.median(r["lean_completion_tokens"] or 0 for r in rows),
+            }, indent=2))
@@ -5,7 +5,8 @@ import os
 import json
 import asyncio
 import re
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, Awaitable, Callable, Iterable, List, Optional, Tuple
 import xml.etree.ElementTree as ET  # for parsing XML output
 from datetime import datetime as dt
 # from logging_config import setup_logger
@@ -13,12 +14,68 @@ from datetime import datetime as dt
 
 import logging
 logger = logging.getLogger(__name__)
-from prompts.logicalHyde import exampleKeyword, messageKeyword
+from prompts.logicalHyde import exampleKeyword, messageKeyword, messageKeywordLean
 from prompts.descriptionForLocationNew import location_message as location_message_new, stop_sequences as location_stop_sequences_new
 from prompts.descriptionForKeyword import keyword_message, stop_sequences as keyword_stop_sequences
-from config import redis_client as r
+from config import (
+    CASCADE_MAX_ISSUES,
+    DB_FIELD_UNKNOWN_ACTION,
+    FAST_PATH_MIN_CONFIDENCE,
+    GAZETTEER_ENABLED,
+    HYDE_CASCADE,
+    HYDE_DEFAULT_PROVIDER,
+    HYDE_ENGINE,
+    HYDE_FAST_PATH,
+    HYDE_OUTPUT,
+    ORG_ALIAS_CACHE,
+    ORG_ALIAS_HINTS,
+    RELATED_ROLES_WAIT_SECONDS,
+    SPECULATION_ENABLED,
+    SPECULATION_MAX_NAMES,
+    SPECULATION_WAIT_SECONDS,
+    redis_client as r,
+)
 from llm_helper import LLMManager
-from utils import normalize_text
+from local_cache import local_cache
+from cache_codec import decode_value, encode_value
+from cache_policy import (
+    CANONICAL_PROVIDER,
+    HARD_TTL_SECONDS,
+    LOCATION_FAMILY,
+    SKILL_FAMILY,
+    is_stale,
+    join_meta,
+    meta_key,
+    redis_values,
+    unwrap_value,
+    wrap_value,
+)
+import background_tasks
+from bloom_filter import key_filter
+import heavy_hitters
+import jobs
+from cache_metrics import (
+    DB_FIELD as DB_FIELD_METRICS_FAMILY,
+    ROLE as ROLE_METRICS_FAMILY,
+    STEP1 as STEP1_METRICS_FAMILY,
+    metrics as cache_metrics,
+)
+from utils import legacy_normalize_text, normalize_text
+from json_extract import JSONExtractionError, extract_json_object
+from hyde_models import AnalysisFlags, HydeResponse, HydeResult, Issues, Location, Skill
+from regex_safety import vet_skill_patterns
+from profile_schema import validate_db_queries
+import gazetteer
+import hyde_dimensions
+import hyde_lean
+import org_aliases
+import provider_router
+import query_lexicon
+import speculation
+
+# Lexicon entities are common in queries; let speculation enrich them during step 1
+speculation.register(SKILL_FAMILY, query_lexicon.names(query_lexicon.SKILL) + query_lexicon.names(query_lexicon.ROLE))
+speculation.register(LOCATION_FAMILY, query_lexicon.names(query_lexicon.LOCATION))
 
 
 ###############################################################################
@@ -102,6 +159,7 @@ async def get_chat_completion_location_alt_names(locations: List[str], provider:
     """
     logger.info(
         f"Generating location alternative names for batch: {locations}")
+    speculation.record_generation(locations)
     llm = LLMManager()
 
     # Format locations for the new prompt
@@ -154,10 +212,203 @@ async def get_chat_completion_location_alt_names(locations: List[str], provider:
 #   - Fetch/Generate Descriptions for Skills (No Embeddings generated here, but passed if cached)
 ###############################################################################
 
+def _write_entry(family: str, name: str, value: Any, provider: str, only_if_absent: bool = False,
+                 metrics_family: Optional[str] = None) -> None:
+    """
+    Store a generated value with freshness metadata in Redis (hard TTL) and the local tier.
+    A location's metadata goes to its sibling key, written only along with the value.
+    """
+    cache_key = f"{family}:{normalize_text(name)}"
+    stored = wrap_value(family, value, provider, name=name)
+    local_cache.set(cache_key, stored)
+    try:
+        parts = redis_values(family, cache_key, stored)
+        encoded = encode_value(parts.pop(cache_key))
+        written = r.set(cache_key, encoded, nx=True if only_if_absent else None, ex=HARD_TTL_SECONDS)
+        key_filter.record(cache_key)
+        if written:
+            for key, part in parts.items():
+                r.set(key, encode_value(part), ex=HARD_TTL_SECONDS)
+            cache_metrics.incr(metrics_family or family, "writes")
+            cache_metrics.incr(metrics_family or family, "bytes_written", len(encoded))
+        logger.info(f"Cached {family} entry for: {name}")
+    except Exception as e:
+        logger.error(f"Failed to cache {family} entry for {name}: {e}")
+
+
+def _mget_with_legacy(family: str, names: List[str], keys: List[str], extra: List[str] = ()) -> List[Any]:
+    """
+    MGET ``keys`` and, in the same round trip, the pre-Unicode-normalisation keys of names
+    whose key changed (e.g. "s o paulo" for "São Paulo"). A legacy hit is served and copied
+    to the new key so the Fetch lambda, which reads the new key, finds it.
+    Legacy keys that normalised to "" are never consulted: they were shared by every
+    CJK / Devanagari name and hold an arbitrary one of them.
+    The values of ``extra`` keys (location metadata) follow those of ``keys``.
+    """
+    if not keys:
+        return []
+    legacy = {}
+    for i, name in enumerate(names):
+        old_norm = legacy_normalize_text(name)
+        if old_norm and f"{family}:{old_norm}" != keys[i]:
+            legacy[i] = f"{family}:{old_norm}"
+    values = r.mget(*keys, *extra, *legacy.values())
+    found, fallback = list(values[:len(keys) + len(extra)]), values[len(keys) + len(extra):]
+    for (i, old_key), raw in zip(legacy.items(), fallback):
+        if found[i] or not raw:
+            continue
+        found[i] = raw
+        try:
+            r.set(keys[i], raw, nx=True, ex=HARD_TTL_SECONDS)
+            key_filter.record(keys[i])
+            logger.info(f"Copied legacy cache entry {old_key} -> {keys[i]}")
+        except Exception as e:
+            logger.warning(f"Failed to copy legacy cache entry {old_key}: {e}")
+    return found
+
+
+def _decode_meta(raw: Any) -> Optional[Dict[str, Any]]:
+    try:
+        meta = decode_value(raw) if raw else None
+    except ValueError:
+        return None
+    return meta if isinstance(meta, dict) else None
+
+
+def _stored_skills(names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Current ``skill:`` values of ``names`` (without metadata); unreadable entries are left out."""
+    if not names:
+        return {}
+    stored = {}
+    for name, raw in zip(names, r.mget(*[f"{SKILL_FAMILY}:{normalize_text(name)}" for name in names])):
+        if not raw:
+            continue
+        try:
+            value, _ = unwrap_value(SKILL_FAMILY, decode_value(raw))
+        except ValueError:
+            continue
+        stored[name] = {k: v for k, v in value.items() if k != "meta"}
+    return stored
+
+
+# Cache keys with a background refresh already queued in this container
+_refresh_in_flight = set()
+REFRESH_LOCK_SECONDS = 300
+
+
+def _claim_refresh(family: str, names: List[str]) -> List[str]:
+    """
+    Take a short Redis lock per stale entry so concurrent containers (and repeated hits)
+    refresh it once; returns the names claimed. Their local copies are dropped, so this
+    container reads the refreshed entry back from Redis.
+    """
+    claimed = []
+    for name in names:
+        cache_key = f"{family}:{normalize_text(name)}"
+        try:
+            if r.set(f"refresh_lock:{cache_key}", "1", nx=True, ex=REFRESH_LOCK_SECONDS):
+                claimed.append(name)
+                local_cache.delete(cache_key)
+        except Exception as e:
+            logger.warning(f"Could not take refresh lock for {cache_key}: {e}")
+    return claimed
+
+
+async def _refresh_entries(family: str, names: List[str], provider: str) -> None:
+    """
+    Regenerate stale entries (claimed with _claim_refresh) and overwrite them in place;
+    runs as a "refresh" job (see jobs.py). A new skill description is merged into the stored
+    value, so fields written by other pipelines (embeddings) survive.
+    """
+    logger.info(f"Refreshing stale {family} entries in background: {names}")
+    if family == SKILL_FAMILY:
+        generated = await get_chat_completion_description(names, provider)
+        by_norm = {normalize_text(k): v for k, v in generated.items()}
+        try:
+            current = _stored_skills([name for name in names if by_norm.get(normalize_text(name))])
+        except Exception as e:
+            # Writing without the stored fields would drop them; retried once the refresh lock expires
+            logger.warning(f"Could not read {family} entries to refresh {names}: {e}")
+            return
+        for name in names:
+            description = by_norm.get(normalize_text(name))
+            if description:
+                # Keep what other pipelines stored next to the description (embeddings)
+                _write_entry(family, name, {**current.get(name, {}), "description": description}, provider)
+    else:
+        generated = await get_chat_completion_location_alt_names(names, provider)
+        for item in generated:
+            # An empty list means generation failed; keep serving the stale entry
+            if item.get("alt_names"):
+                _write_entry(family, item["name"], item["alt_names"], provider)
+
+
+def _schedule_refresh(family: str, names: List[str], batch_size: int = 3) -> None:
+    """
+    Claim stale entries in the background and hand their regeneration with
+    CANONICAL_PROVIDER (the provider staleness is judged against) to the worker as
+    "refresh" jobs; never awaited by the request path.
+    """
+    provider = CANONICAL_PROVIDER
+    pending = []
+    for name in names:
+        cache_key = f"{family}:{normalize_text(name)}"
+        if cache_key not in _refresh_in_flight:
+            _refresh_in_flight.add(cache_key)
+            pending.append(name)
+
+    async def _run_refresh(batch: List[str]) -> None:
+        try:
+            claimed = await asyncio.to_thread(_claim_refresh, family, batch)
+            if claimed:
+                jobs.submit("refresh", {"family": family, "names": claimed, "provider": provider},
+                            f"refresh:{family}:{'|'.join(claimed)}")
+        finally:
+            for name in batch:
+                _refresh_in_flight.discard(f"{family}:{normalize_text(name)}")
+
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i:i + batch_size]
+        background_tasks.schedule(f"refresh:{family}:{'|'.join(batch)}", _run_refresh(batch))
+
+
+# Interval between cache reads while the request waits for related-role descriptions
+ROLES_POLL_SECONDS = 0.1
+
+
+async def _await_descriptions(names: List[str], timeout: float) -> Dict[str, str]:
+    """
+    Descriptions of ``names`` found in the cache within ``timeout`` seconds (the
+    related_roles job writes them), reading the local tier and one MGET per round.
+    """
+    deadline = time.monotonic() + timeout
+    found: Dict[str, str] = {}
+    while True:
+        missing = [name for name in names if name not in found]
+        for name in missing:
+            cached = local_cache.get(f"{SKILL_FAMILY}:{normalize_text(name)}")
+            if isinstance(cached, dict) and cached.get("description"):
+                found[name] = cached["description"]
+        missing = [name for name in missing if name not in found]
+        if missing:
+            try:
+                stored = await asyncio.to_thread(_stored_skills, missing)
+            except Exception as e:
+                logger.warning(f"Could not read related-role descriptions: {e}")
+                stored = {}
+            found.update({name: value["description"] for name, value in stored.items() if value.get("description")})
+        remaining = deadline - time.monotonic()
+        if len(found) == len(names) or remaining <= 0:
+            return found
+        await asyncio.sleep(min(ROLES_POLL_SECONDS, remaining))
+
+
 # Renamed function and updated logic for alternative names
 async def process_location_alt_names(locations: List[str], provider: str = "deepseek") -> List[Dict[str, Any]]:
     """
-    Check Redis for each location's alternative names. If not found, generate using LLM.
+    Answer well-known places from the bundled gazetteer, then check Redis for each remaining
+    location's alternative names. If not found, generate using LLM.
+    Stale entries are served immediately and refreshed in the background.
     Returns a list of dictionaries: [{ "name": "...", "alt_names": [...] }, ...]
     in the same order as the input list.
     """
@@ -168,21 +419,76 @@ async def process_location_alt_names(locations: List[str], provider: str = "deep
     results = [None] * len(locations)
     locations_to_generate = []
     indices_to_generate = []
+    stale_locations = []
 
-    # Check cache first
+    # Well-known places need neither a Redis round trip nor an LLM call
+    pending = []
     for i, location in enumerate(locations):
-        normalized_loc = normalize_text(location)
-        cache_key = f"location_alt_names:{normalized_loc}"
-        cached_data = r.get(cache_key)
-
+        alt_names = gazetteer.lookup(location) if GAZETTEER_ENABLED else None
+        if alt_names is not None:
+            results[i] = {"name": location, "alt_names": alt_names}
+            cache_metrics.incr(LOCATION_FAMILY, "gazetteer_hits")
+            cache_metrics.incr(LOCATION_FAMILY, "hits")
+        else:
+            pending.append(i)
+
+    # Check the in-process tier first, then Redis for the remaining keys in one MGET
+    cache_keys = [f"{LOCATION_FAMILY}:{normalize_text(location)}" for location in locations]
+    remote_indices = []
+    for i in pending:
+        stored = local_cache.get(cache_keys[i])
+        if stored is not None:
+            alt_names, meta = unwrap_value(LOCATION_FAMILY, stored)
+            results[i] = {"name": locations[i], "alt_names": list(alt_names)}
+            if is_stale(LOCATION_FAMILY, meta):
+                stale_locations.append(locations[i])
+            cache_metrics.incr(LOCATION_FAMILY, "local_hits")
+            cache_metrics.incr(LOCATION_FAMILY, "hits")
+            logger.debug(f"Local cache hit for location alt names: {locations[i]}")
+        else:
+            remote_indices.append(i)
+
+    # Locations the Bloom filter has never seen are definite misses: start generating
+    # them now, in parallel with the confirming MGET
+    key_filter.ensure_fresh()
+    early_indices = [i for i in remote_indices if key_filter.definitely_missing(cache_keys[i])]
+    early_task = None
+    lookup_start = time.perf_counter()
+    remote_keys = [cache_keys[i] for i in remote_indices]
+    remote_args = (LOCATION_FAMILY, [locations[i] for i in remote_indices], remote_keys,
+                   [meta_key(LOCATION_FAMILY, key) for key in remote_keys])
+    if early_indices:
+        early_task = asyncio.create_task(get_chat_completion_location_alt_names(
+            [locations[i] for i in early_indices], provider))
+        values = await asyncio.to_thread(_mget_with_legacy, *remote_args)
+    else:
+        values = _mget_with_legacy(*remote_args)
+    remote_values, remote_metas = values[:len(remote_keys)], values[len(remote_keys):]
+    cache_metrics.incr(LOCATION_FAMILY, "lookup_ms", round((time.perf_counter() - lookup_start) * 1000))
+    early_set = set(early_indices)
+
+    for i, cached_data, raw_meta in zip(remote_indices, remote_values, remote_metas):
+        location = locations[i]
+        if not cached_data:
+            cache_metrics.incr(LOCATION_FAMILY, "misses")
+        if i in early_set and not cached_data:
+            continue
         if cached_data:
+            cache_metrics.incr(LOCATION_FAMILY, "bytes_read", len(cached_data))
             try:
-                alt_names = json.loads(cached_data)
+                stored = join_meta(LOCATION_FAMILY, decode_value(cached_data), _decode_meta(raw_meta))
+                alt_names, meta = unwrap_value(LOCATION_FAMILY, stored)
                 results[i] = {"name": location, "alt_names": alt_names}
+                local_cache.set(cache_keys[i], stored, size=len(cached_data))
+                if is_stale(LOCATION_FAMILY, meta):
+                    stale_locations.append(location)
+                cache_metrics.incr(LOCATION_FAMILY, "hits")
                 logger.debug(f"Cache hit for location alt names: {location}")
-            except json.JSONDecodeError:
+            except ValueError:
                 logger.warning(
                     f"Failed to decode cached JSON for location alt names: {location}. Will regenerate.")
+                cache_metrics.incr(LOCATION_FAMILY, "decode_errors")
+                cache_metrics.incr(LOCATION_FAMILY, "misses")
                 locations_to_generate.append(location)
                 indices_to_generate.append(i)
         else:
@@ -190,18 +496,21 @@ async def process_location_alt_names(locations: List[str], provider: str = "deep
             locations_to_generate.append(location)
             indices_to_generate.append(i)
 
-    # Generate missing alternative names
-    if locations_to_generate:
-        logger.info(
-            f"Generating alt names for {len(locations_to_generate)} locations: {locations_to_generate}")
-        generated_results = await get_chat_completion_location_alt_names(locations_to_generate, provider)
+    if stale_locations:
+        cache_metrics.incr(LOCATION_FAMILY, "stale", len(stale_locations))
+        logger.info(f"Serving stale alt names, refresh queued for: {stale_locations}")
+        _schedule_refresh(LOCATION_FAMILY, stale_locations)
 
+    def _store_generated(indices: List[int], generated_results: List[Dict[str, Any]]) -> None:
         # Create a map from the generated results for easy lookup
         generated_map = {res["name"]: res["alt_names"]
                          for res in generated_results}
 
-        for i, original_index in enumerate(indices_to_generate):
-            original_location_name = locations_to_generate[i]
+        for original_index in indices:
+            if results[original_index] is not None:
+                # Confirmed cache hit for an early (speculative) generation; cached value wins
+                continue
+            original_location_name = locations[original_index]
             # Find the corresponding result (match by original name)
             # Default to empty list if not found
             alt_names = generated_map.get(original_location_name, [])
@@ -209,15 +518,20 @@ async def process_location_alt_names(locations: List[str], provider: str = "deep
                 "name": original_location_name, "alt_names": alt_names}
 
             # Cache the result
-            normalized_loc = normalize_text(original_location_name)
-            cache_key = f"location_alt_names:{normalized_loc}"
-            try:
-                r.set(cache_key, json.dumps(alt_names))
-                logger.info(
-                    f"Cached alt names for location: {original_location_name}")
-            except Exception as e:
-                logger.error(
-                    f"Failed to cache alt names for {original_location_name}: {e}")
+            _write_entry(LOCATION_FAMILY, original_location_name, alt_names, provider)
+
+    # Generate missing alternative names
+    if locations_to_generate:
+        logger.info(
+            f"Generating alt names for {len(locations_to_generate)} locations: {locations_to_generate}")
+        generated_results = await get_chat_completion_location_alt_names(locations_to_generate, provider)
+        _store_generated(indices_to_generate, generated_results)
+
+    if early_task is not None:
+        wasted = [locations[i] for i in early_indices if results[i] is not None]
+        if wasted:
+            logger.info(f"Bloom false negatives (generated but cached): {wasted}")
+        _store_generated(early_indices, await early_task)
 
     # Ensure all results are populated (handle potential Nones if errors occurred)
     final_results = []
@@ -320,6 +634,7 @@ async def get_chat_completion_description(keywords: List[str], provider: str = "
     We'll parse the XML output. (No embedding generation here.)
     """
     logger.info(f"Generating skill descriptions for batch: {keywords}")
+    speculation.record_generation(keywords)
     llm = LLMManager()
 
     keywords_xml = "\n".join(f"<keyword>{kw}</keyword>" for kw in keywords)
@@ -352,10 +667,12 @@ async def get_chat_completion_description(keywords: List[str], provider: str = "
 #   - We do NOT generate embeddings here.
 #   - If Redis has stored "embeddings", we include them in the data structure.
 ###############################################################################
-async def process_canhelp_skills_with_descriptions(skills: List[str], provider: str = "deepseek") -> Dict[str, Any]:
+async def process_canhelp_skills_with_descriptions(skills: List[str], provider: str = "deepseek",
+                                                   role_names: Iterable[str] = ()) -> Dict[str, Any]:
     """
     Processes skill names and generates descriptions (via LLM) if absent from Redis.
     If Redis has "embeddings" stored (by some other pipeline), we include them; otherwise we omit them.
+    Names in ``role_names`` are counted under the ``role`` family in the cache metrics.
 
     Returns: 
       { skill -> {"description": "...", "embeddings": [...]} or {"description":"..."} }
@@ -363,46 +680,39 @@ async def process_canhelp_skills_with_descriptions(skills: List[str], provider:
     logger.info(f"Processing {len(skills)} skills for descriptions")
     all_descriptions = {}
     uncached_skills = []
+    stale_skills = []
 
     norm_skills = [normalize_text(skill) for skill in skills]
     redis_keys = [f"skill:{norm}" for norm in norm_skills]
-    cached_values = r.mget(*redis_keys)
+    role_norms = {normalize_text(name) for name in role_names}
+
+    def _family(skill: str) -> str:
+        return ROLE_METRICS_FAMILY if normalize_text(skill) in role_norms else SKILL_FAMILY
 
+    # Serve hot keys from the in-process tier; only the rest go over HTTPS to Upstash
     cache_hits = []
-    for skill, cached_value in zip(skills, cached_values):
-        if cached_value:
-            try:
-                # We expect JSON: possibly containing "description" and "embeddings"
-                # Handle both bytes and string return types from Redis
-                if isinstance(cached_value, bytes):
-                    cached_data = json.loads(cached_value.decode("utf-8"))
-                else:
-                    cached_data = json.loads(cached_value)
-                all_descriptions[skill] = cached_data
-                cache_hits.append(skill)
-                logger.info(
-                    f"Cache HIT for skill: {skill} - Using cached description")
-            except Exception as e:
-                logger.error(f"Failed parsing cached skill for {skill}: {e}")
-                uncached_skills.append(skill)
-                logger.info(
-                    f"Cache ERROR for skill: {skill} - Will generate new description")
-        else:
-            uncached_skills.append(skill)
+    remote_skills, remote_keys = [], []
+    for skill, redis_key in zip(skills, redis_keys):
+        cached_data = local_cache.get(redis_key)
+        if cached_data is not None:
+            all_descriptions[skill] = dict(cached_data)
+            cache_hits.append(skill)
+            if is_stale(SKILL_FAMILY, cached_data.get("meta")):
+                stale_skills.append(skill)
+            cache_metrics.incr(_family(skill), "local_hits")
+            cache_metrics.incr(_family(skill), "hits")
             logger.info(
-                f"Cache MISS for skill: {skill} - Will generate new description")
-
-    if cache_hits:
-        logger.info(
-            f"Skill cache HITS ({len(cache_hits)}/{len(skills)}): {cache_hits}")
-    if uncached_skills:
-        logger.info(
-            f"Skill cache MISSES ({len(uncached_skills)}/{len(skills)}): {uncached_skills}")
+                f"Local cache HIT for skill: {skill} - Using cached description")
+        else:
+            remote_skills.append(skill)
+            remote_keys.append(redis_key)
 
     # Generate descriptions from LLM for uncached
     batch_size = 3
     max_concurrent_batches = 5
     semaphore = asyncio.Semaphore(max_concurrent_batches)
+    # Normalised names confirmed in Redis; early generations must not overwrite them
+    confirmed_hits = set()
 
     async def process_batch(batch: List[str]) -> Dict[str, Any]:
         async with semaphore:
@@ -414,11 +724,15 @@ async def process_canhelp_skills_with_descriptions(skills: List[str], provider:
 
                 # Store in Redis only "description" if not present
                 for skill_name, skill_desc in batch_descriptions.items():
+                    if normalize_text(skill_name) in confirmed_hits:
+                        continue
                     skill_obj = {
                         "description": skill_desc
                         # No "embeddings" here
                     }
                     all_descriptions[skill_name] = skill_obj
+                    _write_entry(SKILL_FAMILY, skill_name, skill_obj, provider, only_if_absent=True,
+                                 metrics_family=_family(skill_name))
 
                     # Log successful generation and caching
                     logger.info(
@@ -428,9 +742,70 @@ async def process_canhelp_skills_with_descriptions(skills: List[str], provider:
                 logger.error(f"Error processing skill batch: {str(e)}")
                 return {}
 
+    # Skills the Bloom filter has never seen are definite misses: dispatch their generation
+    # now so it overlaps with the confirming MGET instead of waiting for it
+    key_filter.ensure_fresh()
+    early_skills = [skill for skill, redis_key in zip(remote_skills, remote_keys)
+                    if key_filter.definitely_missing(redis_key)]
+    early_tasks = [asyncio.create_task(process_batch(early_skills[i:i + batch_size]))
+                   for i in range(0, len(early_skills), batch_size)]
+    lookup_start = time.perf_counter()
+    if early_tasks:
+        logger.info(f"Skill definite MISSES per key filter ({len(early_skills)}): {early_skills} - generating early")
+        cached_values = await asyncio.to_thread(_mget_with_legacy, SKILL_FAMILY, remote_skills, remote_keys)
+    else:
+        cached_values = _mget_with_legacy(SKILL_FAMILY, remote_skills, remote_keys)
+    cache_metrics.incr(SKILL_FAMILY, "lookup_ms", round((time.perf_counter() - lookup_start) * 1000))
+    early_set = set(early_skills)
+
+    for skill, redis_key, cached_value in zip(remote_skills, remote_keys, cached_values):
+        if cached_value:
+            cache_metrics.incr(_family(skill), "bytes_read", len(cached_value))
+            try:
+                # Plain JSON or codec-encoded, possibly containing "description" and "embeddings"
+                cached_data, meta = unwrap_value(SKILL_FAMILY, decode_value(cached_value))
+                all_descriptions[skill] = cached_data
+                confirmed_hits.add(normalize_text(skill))
+                local_cache.set(redis_key, cached_data, size=len(cached_value))
+                cache_hits.append(skill)
+                if is_stale(SKILL_FAMILY, meta):
+                    stale_skills.append(skill)
+                cache_metrics.incr(_family(skill), "hits")
+                if skill in early_set:
+                    logger.info(f"Key filter false negative for skill: {skill} - early generation wasted")
+                logger.info(
+                    f"Cache HIT for skill: {skill} - Using cached description")
+            except Exception as e:
+                logger.error(f"Failed parsing cached skill for {skill}: {e}")
+                cache_metrics.incr(_family(skill), "decode_errors")
+                cache_metrics.incr(_family(skill), "misses")
+                if skill not in early_set:
+                    uncached_skills.append(skill)
+                logger.info(
+                    f"Cache ERROR for skill: {skill} - Will generate new description")
+        else:
+            cache_metrics.incr(_family(skill), "misses")
+            if skill not in early_set:
+                uncached_skills.append(skill)
+                logger.info(
+                    f"Cache MISS for skill: {skill} - Will generate new description")
+
+    if cache_hits:
+        logger.info(
+            f"Skill cache HITS ({len(cache_hits)}/{len(skills)}): {cache_hits}")
+    if uncached_skills:
+        logger.info(
+            f"Skill cache MISSES ({len(uncached_skills)}/{len(skills)}): {uncached_skills}")
+    if stale_skills:
+        # Stale descriptions are already being served; regenerate them off the request path
+        logger.info(f"Skill cache STALE ({len(stale_skills)}): {stale_skills} - refresh queued")
+        for skill in stale_skills:
+            cache_metrics.incr(_family(skill), "stale")
+        _schedule_refresh(SKILL_FAMILY, stale_skills)
+
     batches = [uncached_skills[i:i + batch_size]
                for i in range(0, len(uncached_skills), batch_size)]
-    await asyncio.gather(*[process_batch(batch) for batch in batches])
+    await asyncio.gather(*early_tasks, *[process_batch(batch) for batch in batches])
 
     return all_descriptions
 
@@ -513,6 +888,10 @@ async def process_canhelp_skills_with_descriptions(skills: List[str], provider:
 ###############################################################################
 # MAIN HYDE CLASS
 ###############################################################################
+# on_progress(stage, payload) hook of HydeReasoning.analyze_query
+ProgressCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
 class HydeReasoning:
     """
     A new version of the HyDE reasoning with a 2-step approach:
@@ -521,237 +900,391 @@ class HydeReasoning:
          If "embeddings" is found in the cache, pass it along; otherwise do not generate them here.
     """
 
-    def __init__(self, hyde_provider: str = "azure-gpt-4.1-mini", description_provider: str = "gemini"):
+    def __init__(self, hyde_provider: str = HYDE_DEFAULT_PROVIDER, description_provider: str = "gemini",
+                 engine: str = HYDE_ENGINE, fast_path: bool = HYDE_FAST_PATH, output: str = HYDE_OUTPUT,
+                 cascade: Optional[List[str]] = None):
         self.llm = LLMManager()
-        self.hyde_provider = hyde_provider
-        self.description_provider = description_provider
+        # "auto" picks the step-1 provider per query (provider_router); other names are resolved
+        # to MODEL_CONFIGS keys so a stale or misspelt name does not fail every completion
+        self.router = hyde_provider == "auto"
+        self.hyde_provider = provider_router.resolve(None if self.router else hyde_provider)
+        self.description_provider = provider_router.resolve(description_provider)
+        # "monolithic" (one logicalHyde prompt) or "parallel" (hyde_dimensions)
+        self.engine = engine if engine in ("monolithic", "parallel") else "monolithic"
+        # "full" or "lean" (compact monolithic output expanded by hyde_lean)
+        self.output = output if output in ("full", "lean") else "full"
+        # Try query_lexicon before the LLM
+        self.fast_path = fast_path
+        # Cheaper step-1 providers tried before hyde_provider (see _call_hyde_cascade)
+        self.cascade = [p for p in dict.fromkeys(provider_router.resolve(p) for p in (
+            HYDE_CASCADE if cascade is None else cascade)) if p != self.hyde_provider]
+        self.last_usage: Optional[Dict[str, int]] = None
         logger.info(
-            f"Initialized HydeReasoning with hyde_provider: {hyde_provider}, description_provider: {description_provider}")
+            f"Initialized HydeReasoning with hyde_provider: {'auto' if self.router else self.hyde_provider}, "
+            f"description_provider: {self.description_provider}")
 
-    async def _call_hyde_llm(self, query: str) -> Dict[str, Any]:
+    async def _call_hyde_llm(self, query: str, org_hint: str = "", provider: Optional[str] = None) -> Dict[str, Any]:
         """
         STEP 1: Call the LLM with 'logicalHyde' prompts to get base JSON structure (no descriptions).
+        org_hint (org_aliases.hints) is appended to the prompt. provider defaults to hyde_provider.
         """
+        provider = provider or self.hyde_provider
         try:
             logger.info(f"Analyzing query (2-step approach), step 1: {query}")
             # Get current date and inject it into the prompt
             current_date = dt.now().strftime("%Y-%m-%d")
-            prompt = messageKeyword.replace("{{query}}", query).replace(
-                "{{current_date}}", current_date)
+            lean = self.output == "lean"
+            prompt = (messageKeywordLean if lean else messageKeyword).replace("{{query}}", query).replace(
+                "{{current_date}}", current_date) + org_hint
             logger.info(
-                f"Using provider: {self.hyde_provider} with current date: {current_date}")
+                f"Using provider: {provider} with current date: {current_date}")
             response = await self.llm.get_completion(
-                provider=self.hyde_provider,
+                provider=provider,
                 messages=[
-                    {"role": "user", "content": exampleKeyword},
+                    {"role": "user", "content": hyde_lean.lean_examples() if lean else exampleKeyword},
                     {"role": "user", "content": prompt},
                 ],
                 response_format={"type": "json_object"},
                 temperature=0
             )
 
-            response_text = response.choices[0].message.content
-            logger.info(f"Raw LLM response text:\n{response_text}")
-
-            # First try to extract JSON from between ```json and ``` if present
-            json_match = re.search(
-                r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-            if json_match:
-                response_text = json_match.group(1).strip()
-                logger.info("Extracted JSON from code block markers")
-            else:
-                response_text = response_text.strip()
-                logger.info("Using raw response text")
-
-            # Clean up the JSON string if needed
-            if not response_text.startswith("{"):
-                idx = response_text.find("{")
-                if idx != -1:
-                    response_text = response_text[idx:]
-            if not response_text.endswith("}"):
-                idx = response_text.rfind("}")
-                if idx != -1:
-                    response_text = response_text[:idx+1]
+            self.last_usage = hyde_dimensions.usage_of(response)
+            response_text = response.choices[0].message.content or ""
+            logger.info(f"Received LLM response ({len(response_text)} chars)")
+            logger.debug(f"Raw LLM response text:\n{response_text}")
 
             try:
-                parsed_json = json.loads(response_text)
-            except json.JSONDecodeError as e:
+                parsed_json, repaired = extract_json_object(response_text)
+                if repaired:
+                    logger.warning("LLM response was truncated; closed the JSON and kept the complete members")
+            except JSONExtractionError as e:
                 logger.error(f"Failed to parse JSON: {str(e)}")
+                logger.info(f"Unparseable LLM response text:\n{response_text}")
                 # Return fallback structure
-                return {
-                    "query_breakdown": {
-                        "key_components": [],
-                        "analysis": ""
-                    },
-                    "response": {
-                        "regionBasedQuery": 0,
-                        "locationDetails": {"operator": "AND", "locations": []},
-                        "organisationBasedQuery": 0,
-                        "organisationDetails": {"operator": "AND", "organizations": []},
-                        "sectorBasedQuery": 0,
-                        "sectorDetails": {"operator": "OR", "sectors": []},
-                        "skillBasedQuery": 0,
-                        "skillDetails": {"operator": "AND", "skills": []},
-                        "dbBasedQuery": 0,
-                        "dbQueryDetails": {"operator": "AND", "queries": []}
-                    }
-                }
+                return HydeResult.empty().to_dict()
 
             if not isinstance(parsed_json, dict):
                 raise ValueError("Invalid JSON format (not a dict).")
+            if lean and hyde_lean.is_lean(parsed_json):
+                parsed_json = hyde_lean.expand(parsed_json)
 
             if "query_breakdown" not in parsed_json or "response" not in parsed_json:
                 logger.warning(
                     "No 'query_breakdown' or 'response' found in the JSON. Returning entire JSON.")
                 return parsed_json
 
-            # Normalize dbQueryDetails fields to align with our DB schema
-            try:
-                response_part = parsed_json.get("response", {})
-                if response_part and response_part.get("dbBasedQuery"):
-                    db_details = response_part.get("dbQueryDetails", {})
-                    queries = db_details.get("queries", [])
-                    for q in queries:
-                        field_name = q.get("field")
-                        if isinstance(field_name, str) and field_name.startswith("education.") and "schoolName" in field_name:
-                            new_field = field_name.replace("schoolName", "school")
-                            logger.info(f"Normalized DB field from '{field_name}' to '{new_field}'")
-                            q["field"] = new_field
-            except Exception as norm_err:
-                logger.warning(f"Failed to normalize dbQueryDetails fields: {norm_err}")
-
+            # Validation, repair and dbQueryDetails field normalisation happen in HydeResult
             return parsed_json
 
         except Exception as e:
             logger.error(f"Error analyzing query: {str(e)}")
-            return {
-                "query_breakdown": {
-                    "key_components": [],
-                    "analysis": ""
-                },
-                "response": {
-                    "regionBasedQuery": 0,
-                    "locationDetails": {"operator": "AND", "locations": []},
-                    "organisationBasedQuery": 0,
-                    "organisationDetails": {"operator": "AND", "organizations": []},
-                    "sectorBasedQuery": 0,
-                    "sectorDetails": {"operator": "OR", "sectors": []},
-                    "skillBasedQuery": 0,
-                    "skillDetails": {"operator": "AND", "skills": []},
-                    "dbBasedQuery": 0,
-                    "dbQueryDetails": {"operator": "AND", "queries": []}
-                }
-            }
+            return HydeResult.empty().to_dict()
 
-    async def _enrich_locations(self, response_data: Dict[str, Any]):
+    async def _call_hyde_parallel(self, query: str, org_hint: str = "", provider: Optional[str] = None) -> Dict[str, Any]:
+        """
+        STEP 1 (parallel engine): one short prompt per dimension, run concurrently and merged
+        into the same structure as _call_hyde_llm.
+        """
+        logger.info(f"Analyzing query (parallel dimensions), step 1: {query}")
+        result, stats = await hyde_dimensions.extract(self.llm, provider or self.hyde_provider, query,
+                                                      hints={"organisation": org_hint} if org_hint else None)
+        self.last_usage = {key: sum(s[key] for s in stats.values()) for key in ("prompt_tokens", "completion_tokens")}
+        logger.info(f"Dimension stats: {json.dumps(stats)}")
+        if not any(s["ok"] for s in stats.values()):
+            logger.error("Every HyDE dimension failed; returning fallback structure")
+            return HydeResult.empty().to_dict()
+        return result
+
+    def _call_fast_path(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        STEP 1 (fast path): the query_lexicon result if its confidence reaches
+        FAST_PATH_MIN_CONFIDENCE, else None (the caller falls back to the LLM).
+        """
+        base_json, confidence, unknown = query_lexicon.analyse(query)
+        if base_json is None or confidence < FAST_PATH_MIN_CONFIDENCE:
+            cache_metrics.incr(STEP1_METRICS_FAMILY, "fast_path_fallbacks")
+            logger.info(f"Fast path declined (confidence {confidence}, unknown {unknown}); using the HyDE LLM")
+            return None
+        cache_metrics.incr(STEP1_METRICS_FAMILY, "fast_path")
+        self.last_usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        logger.info(f"Answered step 1 from the lexicons (confidence {confidence})")
+        return base_json
+
+    async def _call_hyde_engine(self, query: str, org_hint: str = "", provider: Optional[str] = None) -> Dict[str, Any]:
+        """STEP 1 with the configured engine."""
+        if self.engine == "parallel":
+            return await self._call_hyde_parallel(query, org_hint, provider)
+        return await self._call_hyde_llm(query, org_hint, provider)
+
+    @staticmethod
+    def _cascade_rejection(query: str, base_json: Dict[str, Any]) -> Optional[str]:
+        """
+        Why a cheap tier's step-1 output is not good enough (None if it is): no response,
+        nothing extracted, more than CASCADE_MAX_ISSUES repairs, or a lexicon entity of the
+        query (query_lexicon) without a matching section.
+        """
+        if "response" not in base_json:
+            return "no_response"
+        result, issues = HydeResult.from_dict(base_json)
+        if not any(section.enabled and section.items for section in result.response.sections()):
+            return "empty"
+        if len(issues) > CASCADE_MAX_ISSUES:
+            return "schema"
+        sections = {
+            query_lexicon.LOCATION: result.response.locations,
+            query_lexicon.ORGANISATION: result.response.organisations,
+            query_lexicon.SKILL: result.response.skills,
+            query_lexicon.ROLE: result.response.skills,
+        }
+        matches, _, _ = query_lexicon.scan(query)
+        for term, _ in matches:
+            section = sections[term.kind]
+            if not (section.enabled and section.items):
+                return f"missing_{term.kind}"
+        return None
+
+    async def _call_hyde_measured(self, query: str, org_hint: str, provider: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        STEP 1 with ``provider``, recording its calls, latency and rejections (_cascade_rejection)
+        in the step1 metrics family; provider_router learns from these counters.
+        Returns the output and its rejection reason.
+        """
+        started = time.perf_counter()
+        base_json = await self._call_hyde_engine(query, org_hint, provider)
+        cache_metrics.incr(STEP1_METRICS_FAMILY, f"{provider}_calls")
+        cache_metrics.incr(STEP1_METRICS_FAMILY, f"{provider}_ms", round((time.perf_counter() - started) * 1000))
+        reason = self._cascade_rejection(query, base_json)
+        if reason is not None:
+            cache_metrics.incr(STEP1_METRICS_FAMILY, f"{provider}_rejected")
+        return base_json, reason
+
+    async def _call_hyde_cascade(self, query: str, org_hint: str = "", provider: Optional[str] = None) -> Dict[str, Any]:
+        """
+        STEP 1 (cascade): try the cheap providers in self.cascade first and escalate to the
+        next tier (finally ``provider``, default hyde_provider) when _cascade_rejection rejects
+        the output. Acceptances and escalations (by reason) are counted in the step1 metrics family.
+        """
+        tiers = list(dict.fromkeys([*self.cascade, provider or self.hyde_provider]))
+        base_json: Dict[str, Any] = {}
+        for i, tier in enumerate(tiers):
+            base_json, reason = await self._call_hyde_measured(query, org_hint, tier)
+            if i == len(tiers) - 1:
+                break
+            if reason is None:
+                cache_metrics.incr(STEP1_METRICS_FAMILY, f"{tier}_accepted")
+                break
+            cache_metrics.incr(STEP1_METRICS_FAMILY, "escalations")
+            cache_metrics.incr(STEP1_METRICS_FAMILY, f"escalated_{reason}")
+            logger.info(f"Cascade: {tier} output rejected ({reason}); escalating to {tiers[i + 1]}")
+        return base_json
+
+    async def _enrich_locations(self, response: HydeResponse):
         """
         STEP 2A: If regionBasedQuery=1, fill each location with alternative names from cache or new generation.
                  If "embeddings" is in the cache, pass it along. Otherwise do not generate them here.
         """
-        if response_data.get("regionBasedQuery", 0) == 1:
-            loc_info = response_data.get("locationDetails", {})
-            loc_list = loc_info.get("locations", [])
-            if not isinstance(loc_list, list):
-                return
-
-            location_names = [loc.get("name")
-                              for loc in loc_list if loc.get("name")]
-            if location_names:
-                enriched = await process_location_alt_names(location_names, self.description_provider)
-                name_to_desc = {item["name"]: item for item in enriched}
-                for loc_item in loc_list:
-                    loc_name = loc_item.get("name")
-                    if loc_name in name_to_desc:
-                        e_obj = name_to_desc[loc_name]
-                        loc_item["alt_names"] = e_obj.get("alt_names", [])
-
-    async def _enrich_skills(self, response_data: Dict[str, Any], alternative_skills: bool):
+        if not response.locations.enabled:
+            return
+        loc_list: List[Location] = response.locations.items
+        location_names = [loc.name for loc in loc_list]
+        if location_names:
+            heavy_hitters.observe(LOCATION_FAMILY, [f"{LOCATION_FAMILY}:{normalize_text(n)}" for n in location_names])
+            enriched = await process_location_alt_names(location_names, self.description_provider)
+            name_to_desc = {item["name"]: item for item in enriched}
+            for loc_item in loc_list:
+                if loc_item.name in name_to_desc:
+                    loc_item.alt_names = name_to_desc[loc_item.name].get("alt_names", [])
+
+    async def _enrich_skills(self, response: HydeResponse, alternative_skills: bool, skill_descriptions: bool = True,
+                             roles_wait: float = RELATED_ROLES_WAIT_SECONDS,
+                             search_document: Optional[Dict[str, str]] = None):
         """
         STEP 2B: If skillBasedQuery=1, fill each skill with a description from cache or LLM (no embeddings generated).
                  If "embeddings" is in cache, we pass it along. 
-                 Also handle related roles if alternative_skills=True.
-                 Handle skill data processing.
+                 skill_descriptions=False leaves the primary skills as extracted.
+                 Related roles (alternative_skills=True) are described by a "related_roles" job
+                 (see jobs.py), so they add no LLM batches to the request path. We read their
+                 cache keys for up to roles_wait seconds; descriptions that land later are
+                 patched into search_document by the worker (the result has been returned by then).
         """
-        if response_data.get("skillBasedQuery", 0) == 1:
-            skill_info = response_data.get("skillDetails", {})
-            skill_list = skill_info.get("skills", [])
-            if not isinstance(skill_list, list):
-                return
-
-            skills_needing_descriptions = []
-            for skill_item in skill_list:
-                skill_name = skill_item.get("name", "")
-                if skill_name:
-                    skills_needing_descriptions.append(skill_name)
-
-            related_role_names = []
-            if alternative_skills:
-                for skill_item in skill_list:
-                    roles = skill_item.get("relatedRoles", [])
-                    if isinstance(roles, list):
-                        for r_ in roles:
-                            if isinstance(r_, dict) and "name" in r_:
-                                related_role_names.append(r_["name"])
-                            elif isinstance(r_, str):
-                                related_role_names.append(r_)
-                            else:
-                                related_role_names.append(str(r_))
-
-            all_skills_to_fetch = skills_needing_descriptions + related_role_names
-            skill_map = {}
-            if all_skills_to_fetch:
-                skill_map = await process_canhelp_skills_with_descriptions(all_skills_to_fetch, self.description_provider)
-
-            for skill_item in skill_list:
-                nm = skill_item.get("name", "")
-                desc_obj = skill_map.get(nm, {})
-                skill_item["description"] = desc_obj.get("description", "")
+        if not response.skills.enabled:
+            return
+        skill_list: List[Skill] = response.skills.items
+        skills_needing_descriptions = [skill.name for skill in skill_list] if skill_descriptions else []
+        roles = [role for skill in skill_list for role in (skill.related_roles or [])] if alternative_skills else []
+        for role in roles:
+            # Pass Redis cache key for efficient retrieval in Fetch (written by the related_roles job)
+            role.cache_key = f"skill:{normalize_text(role.name)}"
+
+        primary_norms = {normalize_text(name) for name in skills_needing_descriptions}
+        background_roles = [role for role in roles if normalize_text(role.name) not in primary_norms]
+        role_names = list(dict.fromkeys(role.name for role in background_roles))
+        if role_names:
+            heavy_hitters.observe(SKILL_FAMILY, [f"{SKILL_FAMILY}:{normalize_text(n)}" for n in role_names])
+            jobs.submit("related_roles", {"names": role_names, "provider": self.description_provider,
+                                          "document": search_document}, f"related_roles:{id(response)}")
+
+        skill_map = {}
+        if skills_needing_descriptions:
+            heavy_hitters.observe(SKILL_FAMILY, [f"{SKILL_FAMILY}:{normalize_text(n)}" for n in skills_needing_descriptions])
+            skill_map = await process_canhelp_skills_with_descriptions(
+                skills_needing_descriptions, self.description_provider)
+
+        for skill_item in skill_list:
+            if skill_descriptions:
+                skill_item.description = skill_map.get(skill_item.name, {}).get("description", "")
                 # Pass Redis cache key instead of embeddings for efficient retrieval in Fetch
-                skill_item["cache_key"] = f"skill:{normalize_text(nm)}"
-
-                if alternative_skills:
-                    roles = skill_item.get("relatedRoles", [])
-                    new_related = []
-                    for r_ in roles:
-                        if isinstance(r_, dict):
-                            r_name = r_.get("name", "")
-                        elif isinstance(r_, str):
-                            r_name = r_
-                        else:
-                            r_name = str(r_)
-
-                        r_desc = skill_map.get(r_name, {})
-                        updated_role = {
-                            "name": r_name,
-                            "description": r_desc.get("description", ""),
-                            # Pass Redis cache key for efficient retrieval in Fetch
-                            "cache_key": f"skill:{normalize_text(r_name)}"
-                        }
-                        new_related.append(updated_role)
-                    skill_item["relatedRoles"] = new_related
-
-    async def analyze_query(self, query: str, alternative_skills: bool = False) -> Dict[str, Any]:
+                skill_item.cache_key = f"skill:{normalize_text(skill_item.name)}"
+        background_ids = {id(role) for role in background_roles}
+        for role in roles:
+            if id(role) not in background_ids:
+                role.description = skill_map.get(role.name, {}).get("description", "")
+
+        if role_names:
+            described = await _await_descriptions(role_names, roles_wait)
+            for role in background_roles:
+                role.description = described.get(role.name, "")
+            if len(described) < len(role_names):
+                logger.info(f"{len(role_names) - len(described)} related-role description(s) still generating "
+                            f"after {roles_wait:.1f}s; left to the related_roles job")
+
+    def _speculate(self, query: str, flags: AnalysisFlags) -> Optional["speculation.Speculation"]:
+        """Start enrichment for known entity names in the query while step 1 runs."""
+        workers = {}
+        if flags.skill_descriptions or flags.related_roles:
+            workers[SKILL_FAMILY] = lambda names: process_canhelp_skills_with_descriptions(
+                names, self.description_provider)
+        if flags.location_alt_names:
+            workers[LOCATION_FAMILY] = lambda names: process_location_alt_names(names, self.description_provider)
+        return speculation.speculate(query, local_cache, SPECULATION_MAX_NAMES, workers)
+
+    @staticmethod
+    def _final_names(response: HydeResponse, flags: AnalysisFlags) -> Dict[str, List[str]]:
+        """Names the enrichment stages will look up, per cache family."""
+        skills: List[str] = []
+        if response.skills.enabled:
+            if flags.skill_descriptions:
+                skills += [skill.name for skill in response.skills.items]
+            if flags.related_roles:
+                skills += [role.name for skill in response.skills.items for role in (skill.related_roles or [])]
+        locations = ([loc.name for loc in response.locations.items]
+                     if response.locations.enabled and flags.location_alt_names else [])
+        return {SKILL_FAMILY: skills, LOCATION_FAMILY: locations}
+
+    async def analyze_query(self, query: str, alternative_skills: bool = False,
+                            analysis_flags: Optional[Dict[str, Any]] = None,
+                            additional_context: Optional[Dict[str, Any]] = None,
+                            on_progress: Optional["ProgressCallback"] = None,
+                            search_document: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
         Main method:
-          1) Generate base JSON from LLM (no descriptions).
-          2) Enrich location & skill data from the cache or LLM (no embeddings generated here).
+          1) Generate base JSON from LLM (no descriptions), unless additional_context already
+             supplies the entities (see AnalysisFlags.extract); supplied entities are merged in.
+          2) Validate/repair it into a HydeResult.
+          3) Enrich location & skill data from the cache or LLM (no embeddings generated here).
+             analysis_flags (hyde_analysis_flags) can switch off location_alt_names,
+             skill_descriptions and related_roles (defaults to alternative_skills).
+        on_progress, if given, is awaited with ("structure", <validated result before
+        enrichment>) as soon as step 2 is done, then with ("patch", {<detailsKey>: <section>})
+        as each enrichment stage finishes. Enrichment does not wait for the structure publish.
+        search_document ({"search_id", "user_id"}) is where the worker patches related-role
+        descriptions that finish after the result is returned (see _enrich_skills); without
+        it they only land in the cache.
         """
         logger.info(f"Starting query analysis for: {query}")
-        base_json = await self._call_hyde_llm(query)
-        if "response" not in base_json:
-            logger.warning(
-                "No 'response' field in base JSON, returning fallback")
-            return base_json
-
-        response_data = base_json["response"]
-        tasks = [
-            self._enrich_locations(response_data),
-            self._enrich_skills(response_data, alternative_skills)
-        ]
+        flags, unknown_flags = AnalysisFlags.from_dict(analysis_flags, alternative_skills)
+        if unknown_flags:
+            logger.warning(f"Ignoring unknown hyde_analysis_flags: {unknown_flags}")
+        issues = Issues()
+        known = HydeResponse.from_entities(additional_context, issues)
+        extract = flags.extract if flags.extract is not None else known is None
+
+        # Pin the fleet-wide hot entries while step 1 runs (no-op once warm)
+        heavy_hitters.ensure_prefetched(r, local_cache)
+        base_json = self._call_fast_path(query) if extract and self.fast_path else None
+        speculative = None
+        if extract and base_json is None and SPECULATION_ENABLED:
+            speculative = self._speculate(query, flags)
+        if extract:
+            org_hint = ""
+            if base_json is None and ORG_ALIAS_HINTS:
+                org_hint = org_aliases.hints(r, local_cache, query)
+            provider = self.hyde_provider
+            if base_json is None and self.router:
+                provider, _ = provider_router.choose(query, r)
+            if base_json is None and self.cascade:
+                base_json = await self._call_hyde_cascade(query, org_hint, provider)
+            elif base_json is None:
+                base_json, _ = await self._call_hyde_measured(query, org_hint, provider)
+            if "response" not in base_json:
+                logger.warning(
+                    "No 'response' field in base JSON, returning fallback")
+                return base_json
+            result, extract_issues = HydeResult.from_dict(base_json)
+            issues.extend(extract_issues)
+            if known is not None:
+                result.response.merge(known)
+        else:
+            logger.info("Skipping step 1: entities supplied in additional_context")
+            result = HydeResult.empty()
+            if known is not None:
+                result.response = known
+                result.key_components = [item.name for section in known.sections()[:4] for item in section.items]
+
+        if ORG_ALIAS_CACHE and result.response.organisations.enabled:
+            org_aliases.apply(r, local_cache, result.response.organisations.items)
+
+        # The Fetch lambda runs these patterns against every candidate profile
+        rejected = vet_skill_patterns(result.response.skills.items, issues)
+        if rejected:
+            logger.warning(f"Rejected {rejected} unsafe regexPatterns keyword(s)")
+        field_counts = validate_db_queries(result.response.db_queries, issues,
+                                           keep_unknown=DB_FIELD_UNKNOWN_ACTION == "keep")
+        for name, count in field_counts.items():
+            cache_metrics.incr(DB_FIELD_METRICS_FAMILY, name, count)
+        if issues:
+            logger.warning(f"Repaired HyDE output ({len(issues)} issue(s)): {issues}")
+
+        structure_published = None
+        if on_progress is not None:
+            structure_published = asyncio.ensure_future(on_progress("structure", result.to_dict()))
+
+        # The enrichment stages wait (bounded) for the speculative batches they need, so no
+        # entity is generated twice; the structure publish above does not wait for them
+        reconciled = None
+        if speculative is not None:
+
+            async def _reconcile() -> None:
+                counts = await speculative.reconcile(self._final_names(result.response, flags),
+                                                     timeout=SPECULATION_WAIT_SECONDS)
+                logger.info(f"Speculation: {counts}")
+
+            reconciled = asyncio.ensure_future(_reconcile())
+
+        async def _stage(enrichment: Awaitable[None], details_key: str) -> None:
+            if reconciled is not None:
+                await reconciled
+            await enrichment
+            if on_progress is not None:
+                await structure_published
+                await on_progress("patch", {details_key: result.response.to_dict()[details_key]})
+
+        tasks = []
+        if flags.location_alt_names and result.response.locations.enabled:
+            tasks.append(_stage(self._enrich_locations(result.response), "locationDetails"))
+        if (flags.skill_descriptions or flags.related_roles) and result.response.skills.enabled:
+            roles_wait = flags.related_roles_wait if flags.related_roles_wait is not None else RELATED_ROLES_WAIT_SECONDS
+            tasks.append(_stage(self._enrich_skills(result.response, flags.related_roles, flags.skill_descriptions,
+                                                    roles_wait=roles_wait, search_document=search_document),
+                                "skillDetails"))
         await asyncio.gather(*tasks)
+        if reconciled is not None:
+            await reconciled
+        if structure_published is not None:
+            await structure_published
 
         logger.info("Completed query analysis and enrichment")
-        return base_json
+        return result.to_dict()
 
     async def batch_analyze_queries(self, queries: List[str], alternative_skills: bool = False, max_concurrent: int = 5) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,686 @@
+"""
+Typed model of the HyDE step-1 output.
+
+The LLM returns nested dicts whose shape drifts (roles as strings or objects, missing
+operators, string flags, db queries without a regex). ``HydeResult.from_dict`` validates and
+repairs every section in one pass and records what it changed. ``to_dict`` produces the
+wire format the Fetch lambda consumes. Keys the model does not know are carried in
+``extra`` so the round trip is lossless.
+
+All classes are ``__slots__`` dataclasses. Per-class field converters are built once at
+import time, so validation does no reflection per call.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+TEMPORALS = ("current", "past", "any")
+OPERATORS = ("AND", "OR")
+
+
+###############################################################################
+# FIELD CONVERTERS
+###############################################################################
+# A location in the raw result: a string, or ``(parent, key)`` where an int key is a list
+# index. Paths are only formatted when a repair is recorded, which keeps the clean path cheap.
+Path = Union[str, Tuple[Any, Union[str, int]]]
+
+
+def _format_path(path: Path) -> str:
+    if isinstance(path, str):
+        return path
+    parent, key = path
+    return f"{_format_path(parent)}[{key}]" if isinstance(key, int) else f"{_format_path(parent)}.{key}"
+
+
+class Issues(list):
+    """Human-readable notes about repairs made while validating one result."""
+
+    def note(self, path: Path, message: str) -> None:
+        self.append(f"{_format_path(path)}: {message}")
+
+
+def _str_list(value: Any, path: Path, issues: Issues) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        issues.note(path, f"expected a list, got {type(value).__name__}; dropped")
+        return []
+    cleaned = [item.strip() for item in value if isinstance(item, str) and item.strip()]
+    if len(cleaned) != len(value):
+        issues.note(path, f"dropped {len(value) - len(cleaned)} empty or non-string item(s)")
+    return cleaned
+
+
+def _opt_str_list(value: Any, path: Path, issues: Issues) -> Optional[List[str]]:
+    return None if value is None else _str_list(value, path, issues)
+
+
+def _temporal(value: Any, path: Path, issues: Issues) -> Optional[str]:
+    if value is None:
+        return None
+    normalised = str(value).strip().lower()
+    if normalised not in TEMPORALS:
+        issues.note(path, f"unknown temporal {value!r}; using 'any'")
+        return "any"
+    return normalised
+
+
+def _opt_str(value: Any, path: Path, issues: Issues) -> Optional[str]:
+    if value is None:
+        return None
+    if not isinstance(value, (str, int, float)):
+        issues.note(path, f"expected a string, got {type(value).__name__}; dropped")
+        return None
+    return str(value)
+
+
+def _flag(value: Any) -> int:
+    if isinstance(value, str):
+        return 1 if value.strip().lower() in ("1", "true", "yes") else 0
+    return 1 if value else 0
+
+
+def _name_of(item: Any) -> Optional[str]:
+    if isinstance(item, str):
+        name = item
+    elif isinstance(item, dict):
+        name = item.get("name")
+    else:
+        return None
+    return name.strip() if isinstance(name, str) and name.strip() else None
+
+
+Converter = Callable[[Any, Path, Issues], Any]
+
+
+def _compile(spec: Tuple[Tuple[str, str, Converter], ...]) -> Callable[[Dict[str, Any], Path, Issues], Dict[str, Any]]:
+    """
+    Turn ``(wire_key, attr, converter)`` triples into one function that maps a raw dict to
+    constructor kwargs (plus ``extra`` for unknown keys). Absent keys keep the defaults.
+    """
+    converters = {wire_key: (attr, conv) for wire_key, attr, conv in spec}
+
+    def convert(raw: Dict[str, Any], path: Path, issues: Issues) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {}
+        extra = None
+        for key, value in raw.items():
+            target = converters.get(key)
+            if target is not None:
+                if value is not None:
+                    kwargs[target[0]] = target[1](value, (path, key), issues)
+            elif key != "name":
+                if extra is None:
+                    extra = kwargs["extra"] = {}
+                extra[key] = value
+        return kwargs
+
+    return convert
+
+
+def _emit(out: Dict[str, Any], key: str, value: Any) -> None:
+    if value is not None:
+        out[key] = value
+
+
+###############################################################################
+# SECTION ITEMS
+###############################################################################
+@dataclass(slots=True)
+class Location:
+    name: str
+    alt_names: Optional[List[str]] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Any, path: Path, issues: Issues) -> Optional["Location"]:
+        name = _name_of(raw)
+        if name is None:
+            issues.note(path, "location without a name; dropped")
+            return None
+        if isinstance(raw, str):
+            return cls(name)
+        return cls(name, **_LOCATION_CONVERT(raw, path, issues))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {"name": self.name}
+        _emit(out, "alt_names", self.alt_names)
+        out.update(self.extra)
+        return out
+
+
+_LOCATION_CONVERT = _compile((("alt_names", "alt_names", _opt_str_list),))
+
+
+@dataclass(slots=True)
+class Organization:
+    name: str
+    temporal: Optional[str] = None
+    aliases: Optional[List[str]] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Any, path: Path, issues: Issues) -> Optional["Organization"]:
+        name = _name_of(raw)
+        if name is None:
+            issues.note(path, "organisation without a name; dropped")
+            return None
+        if isinstance(raw, str):
+            return cls(name)
+        return cls(name, **_ORG_CONVERT(raw, path, issues))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {"name": self.name}
+        _emit(out, "temporal", self.temporal)
+        _emit(out, "aliases", self.aliases)
+        out.update(self.extra)
+        return out
+
+
+_ORG_CONVERT = _compile((
+    ("temporal", "temporal", _temporal),
+    ("aliases", "aliases", _opt_str_list),
+))
+
+
+@dataclass(slots=True)
+class CompanyStage:
+    enabled: bool = False
+    size_min: Optional[int] = None
+    size_max: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, raw: Any, path: Path, issues: Issues) -> Optional["CompanyStage"]:
+        if raw is None:
+            return None
+        if not isinstance(raw, dict):
+            issues.note(path, "companyStage is not an object; dropped")
+            return None
+        size = raw.get("sizeRange") if isinstance(raw.get("sizeRange"), dict) else {}
+        bounds = []
+        for key in ("min", "max"):
+            try:
+                bounds.append(int(size[key]) if size.get(key) is not None else None)
+            except (TypeError, ValueError):
+                issues.note(((path, "sizeRange"), key), f"not a number ({size[key]!r}); dropped")
+                bounds.append(None)
+        size_min, size_max = bounds
+        if size_min is not None and size_max is not None and size_min > size_max:
+            issues.note((path, "sizeRange"), "min > max; swapped")
+            size_min, size_max = size_max, size_min
+        return cls(_flag(raw.get("enabled")) == 1, size_min, size_max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        size = {}
+        _emit(size, "min", self.size_min)
+        _emit(size, "max", self.size_max)
+        out: Dict[str, Any] = {"enabled": self.enabled}
+        if size:
+            out["sizeRange"] = size
+        return out
+
+
+@dataclass(slots=True)
+class Sector:
+    name: str
+    temporal: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    company_stage: Optional[CompanyStage] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Any, path: Path, issues: Issues) -> Optional["Sector"]:
+        name = _name_of(raw)
+        if name is None:
+            issues.note(path, "sector without a name; dropped")
+            return None
+        if isinstance(raw, str):
+            return cls(name)
+        return cls(name, **_SECTOR_CONVERT(raw, path, issues))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {"name": self.name}
+        _emit(out, "temporal", self.temporal)
+        _emit(out, "keywords", self.keywords)
+        if self.company_stage is not None:
+            out["companyStage"] = self.company_stage.to_dict()
+        out.update(self.extra)
+        return out
+
+
+_SECTOR_CONVERT = _compile((
+    ("temporal", "temporal", _temporal),
+    ("keywords", "keywords", _opt_str_list),
+    ("companyStage", "company_stage", CompanyStage.from_dict),
+))
+
+
+@dataclass(slots=True)
+class RegexPatterns:
+    keywords: List[str] = field(default_factory=list)
+    fields: List[str] = field(default_factory=list)
+    # Single vetted alternation of ``keywords`` (set by ``regex_safety``)
+    combined: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Any, path: Path, issues: Issues) -> Optional["RegexPatterns"]:
+        if raw is None:
+            return None
+        if isinstance(raw, list):
+            # A bare keyword list: keep the keywords, fields default downstream
+            return cls(_str_list(raw, (path, "keywords"), issues))
+        if not isinstance(raw, dict):
+            issues.note(path, "regexPatterns is not an object; dropped")
+            return None
+        return cls(**_REGEX_CONVERT(raw, path, issues))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {"keywords": self.keywords, "fields": self.fields}
+        _emit(out, "combined", self.combined)
+        out.update(self.extra)
+        return out
+
+
+_REGEX_CONVERT = _compile((
+    ("keywords", "keywords", _str_list),
+    ("fields", "fields", _str_list),
+    ("combined", "combined", _opt_str),
+))
+
+
+@dataclass(slots=True)
+class RelatedRole:
+    name: str
+    description: Optional[str] = None
+    cache_key: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def to_value(self) -> Any:
+        """
+        Plain name until enriched, matching what the LLM emits; an object afterwards. The object
+        always carries ``description`` ("" while a background description is pending).
+        """
+        if self.description is None and self.cache_key is None and not self.extra:
+            return self.name
+        out = {"name": self.name, "description": self.description or ""}
+        _emit(out, "cache_key", self.cache_key)
+        out.update(self.extra)
+        return out
+
+
+def _roles(value: Any, path: Path, issues: Issues) -> Optional[List[RelatedRole]]:
+    if value is None:
+        return None
+    if not isinstance(value, list):
+        value = [value]
+    roles = []
+    for i, item in enumerate(value):
+        if type(item) is str and item and not item[0].isspace() and not item[-1].isspace():
+            roles.append(RelatedRole(item))
+            continue
+        name = _name_of(item)
+        if name is None:
+            # Numbers etc. used to be stringified by _enrich_skills; keep that behaviour
+            if item is not None and not isinstance(item, (dict, list)):
+                name = str(item)
+            else:
+                issues.note((path, i), "related role without a name; dropped")
+                continue
+        if isinstance(item, dict):
+            roles.append(RelatedRole(
+                name,
+                description=_opt_str(item.get("description"), ((path, i), "description"), issues),
+                cache_key=_opt_str(item.get("cache_key"), ((path, i), "cache_key"), issues),
+                extra={k: v for k, v in item.items() if k not in ("name", "description", "cache_key")},
+            ))
+        else:
+            roles.append(RelatedRole(name))
+    return roles
+
+
+@dataclass(slots=True)
+class Skill:
+    name: str
+    priority: Optional[str] = None
+    temporal: Optional[str] = None
+    related_roles: Optional[List[RelatedRole]] = None
+    title_keywords: Optional[List[str]] = None
+    regex_patterns: Optional[RegexPatterns] = None
+    description: Optional[str] = None
+    cache_key: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Any, path: Path, issues: Issues) -> Optional["Skill"]:
+        name = _name_of(raw)
+        if name is None:
+            issues.note(path, "skill without a name; dropped")
+            return None
+        if isinstance(raw, str):
+            return cls(name)
+        return cls(name, **_SKILL_CONVERT(raw, path, issues))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {"name": self.name}
+        _emit(out, "priority", self.priority)
+        _emit(out, "temporal", self.temporal)
+        if self.related_roles is not None:
+            out["relatedRoles"] = [role.to_value() for role in self.related_roles]
+        _emit(out, "titleKeywords", self.title_keywords)
+        if self.regex_patterns is not None:
+            out["regexPatterns"] = self.regex_patterns.to_dict()
+        _emit(out, "description", self.description)
+        _emit(out, "cache_key", self.cache_key)
+        out.update(self.extra)
+        return out
+
+
+_SKILL_CONVERT = _compile((
+    ("priority", "priority", _opt_str),
+    ("temporal", "temporal", _temporal),
+    ("relatedRoles", "related_roles", _roles),
+    ("titleKeywords", "title_keywords", _opt_str_list),
+    ("regexPatterns", "regex_patterns", RegexPatterns.from_dict),
+    ("description", "description", _opt_str),
+    ("cache_key", "cache_key", _opt_str),
+))
+
+
+@dataclass(slots=True)
+class DbQuery:
+    field: str
+    regex: str
+    description: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Any, path: Path, issues: Issues) -> Optional["DbQuery"]:
+        if not isinstance(raw, dict):
+            issues.note(path, "db query is not an object; dropped")
+            return None
+        field_name, regex = raw.get("field"), raw.get("regex")
+        if not isinstance(field_name, str) or not field_name.strip():
+            issues.note(path, "db query without a field; dropped")
+            return None
+        if not isinstance(regex, str) or not regex:
+            issues.note(path, f"db query on {field_name} without a regex; dropped")
+            return None
+        # Field names are resolved against the profile schema by profile_schema
+        field_name = field_name.strip()
+        extra = {k: v for k, v in raw.items() if k not in ("field", "regex", "description")}
+        return cls(field_name, regex, _opt_str(raw.get("description"), (path, "description"), issues), extra)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {"field": self.field, "regex": self.regex}
+        _emit(out, "description", self.description)
+        out.update(self.extra)
+        return out
+
+
+###############################################################################
+# SECTIONS + RESULT
+###############################################################################
+@dataclass(slots=True)
+class Section:
+    """One ``xBasedQuery`` flag plus its ``xDetails`` block."""
+    enabled: int
+    operator: str
+    items: list
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+# (flag key, details key, list key, item class, default operator)
+SECTIONS = (
+    ("regionBasedQuery", "locationDetails", "locations", Location, "AND"),
+    ("organisationBasedQuery", "organisationDetails", "organizations", Organization, "AND"),
+    ("sectorBasedQuery", "sectorDetails", "sectors", Sector, "OR"),
+    ("skillBasedQuery", "skillDetails", "skills", Skill, "AND"),
+    ("dbBasedQuery", "dbQueryDetails", "queries", DbQuery, "AND"),
+)
+_SECTION_KEYS = frozenset(k for flag, details, _, _, _ in SECTIONS for k in (flag, details))
+
+
+def _section(raw: Dict[str, Any], spec, issues: Issues) -> Section:
+    flag_key, details_key, list_key, item_cls, default_operator = spec
+    details = raw.get(details_key)
+    if details is None:
+        details = {}
+    elif not isinstance(details, dict):
+        issues.note(details_key, "not an object; replaced with an empty section")
+        details = {}
+
+    operator = str(details.get("operator") or default_operator).strip().upper()
+    if operator not in OPERATORS:
+        issues.note((details_key, "operator"), f"unknown operator {details.get('operator')!r}; using {default_operator}")
+        operator = default_operator
+
+    raw_items = details.get(list_key) or []
+    if not isinstance(raw_items, list):
+        issues.note((details_key, list_key), "not a list; dropped")
+        raw_items = []
+    items = []
+    items_path = (details_key, list_key)
+    for i, raw_item in enumerate(raw_items):
+        item = item_cls.from_dict(raw_item, (items_path, i), issues)
+        if item is not None:
+            items.append(item)
+
+    enabled = _flag(raw.get(flag_key))
+    if enabled and not items:
+        issues.note(flag_key, "enabled without any valid items; disabled")
+        enabled = 0
+    extra = {k: v for k, v in details.items() if k not in ("operator", list_key)}
+    return Section(enabled, operator, items, extra)
+
+
+def _identity(item: Any) -> Any:
+    name = getattr(item, "name", None)
+    return name.casefold() if name is not None else (item.field, item.regex)
+
+
+@dataclass(slots=True)
+class HydeResponse:
+    locations: Section
+    organisations: Section
+    sectors: Section
+    skills: Section
+    db_queries: Section
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Any, issues: Issues) -> "HydeResponse":
+        if not isinstance(raw, dict):
+            issues.note("response", "not an object; using an empty response")
+            raw = {}
+        sections = [_section(raw, spec, issues) for spec in SECTIONS]
+        extra = {k: v for k, v in raw.items() if k not in _SECTION_KEYS}
+        return cls(*sections, extra=extra)
+
+    @classmethod
+    def from_entities(cls, context: Any, issues: Issues) -> Optional["HydeResponse"]:
+        """
+        Build a response from caller-supplied entity lists (``additional_context``), keyed by
+        the same list keys as the wire format: ``locations``, ``organizations``, ``sectors``,
+        ``skills`` and ``queries``. Items may be names or full objects. ``None`` if no entities.
+        """
+        if not isinstance(context, dict):
+            return None
+        raw: Dict[str, Any] = {}
+        for flag_key, details_key, list_key, _, _ in SECTIONS:
+            items = context.get(list_key)
+            if items:
+                raw[flag_key] = 1
+                raw[details_key] = {list_key: items}
+        if not raw:
+            return None
+        return cls.from_dict(raw, issues)
+
+    def merge(self, other: "HydeResponse") -> None:
+        """Add the items of ``other`` that this response lacks, enabling their sections."""
+        for mine, theirs in zip(self.sections(), other.sections()):
+            seen = {_identity(item) for item in mine.items}
+            added = [item for item in theirs.items if _identity(item) not in seen]
+            if added:
+                mine.items.extend(added)
+                mine.enabled = 1
+
+    def sections(self) -> List[Section]:
+        return [self.locations, self.organisations, self.sectors, self.skills, self.db_queries]
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for (flag_key, details_key, list_key, _, _), section in zip(SECTIONS, self.sections()):
+            out[flag_key] = section.enabled
+            out[details_key] = {"operator": section.operator,
+                                list_key: [item.to_dict() for item in section.items],
+                                **section.extra}
+        out.update(self.extra)
+        return out
+
+
+@dataclass(slots=True)
+class HydeResult:
+    key_components: List[str]
+    analysis: str
+    response: HydeResponse
+    breakdown_extra: Dict[str, Any] = field(default_factory=dict)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> Tuple["HydeResult", Issues]:
+        """Validate and repair a step-1 result in one pass; returns the model and the repairs made."""
+        issues = Issues()
+        breakdown = raw.get("query_breakdown")
+        if not isinstance(breakdown, dict):
+            if breakdown is not None:
+                issues.note("query_breakdown", "not an object; replaced")
+            breakdown = {}
+        analysis = breakdown.get("analysis")
+        result = cls(
+            key_components=_str_list(breakdown.get("key_components"), "query_breakdown.key_components", issues),
+            analysis=analysis if isinstance(analysis, str) else "",
+            response=HydeResponse.from_dict(raw.get("response"), issues),
+            breakdown_extra={k: v for k, v in breakdown.items() if k not in ("key_components", "analysis")},
+            extra={k: v for k, v in raw.items() if k not in ("query_breakdown", "response")},
+        )
+        return result, issues
+
+    @classmethod
+    def empty(cls) -> "HydeResult":
+        return cls.from_dict({})[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "query_breakdown": {"key_components": self.key_components, "analysis": self.analysis,
+                                **self.breakdown_extra},
+            "response": self.response.to_dict(),
+            **self.extra,
+        }
+
+
+###############################################################################
+# REQUEST OPTIONS
+###############################################################################
+@dataclass(slots=True)
+class AnalysisFlags:
+    """
+    ``flags.hyde_analysis_flags``: which enrichment stages to run. ``extract`` controls the
+    step-1 LLM call; by default it is skipped when ``additional_context`` supplies entities.
+    ``related_roles_wait`` bounds the wait for background role descriptions (seconds).
+    """
+    location_alt_names: bool = True
+    skill_descriptions: bool = True
+    related_roles: bool = False
+    extract: Optional[bool] = None
+    related_roles_wait: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, raw: Any, alternative_skills: bool = False) -> Tuple["AnalysisFlags", List[str]]:
+        """Returns the flags and the keys that were not understood."""
+        flags = cls(related_roles=bool(alternative_skills))
+        if not isinstance(raw, dict):
+            return flags, [] if raw is None else ["hyde_analysis_flags"]
+        unknown = []
+        for key, value in raw.items():
+            if key == "related_roles_wait" and value is not None:
+                try:
+                    flags.related_roles_wait = max(0.0, float(value))
+                except (TypeError, ValueError):
+                    unknown.append(key)
+            elif key in cls.__slots__ and value is not None:
+                setattr(flags, key, _flag(value) == 1)
+            else:
+                unknown.append(key)
+        return flags, unknown
+
+
+if __name__ == "__main__":
+    import copy
+    import json
+    import time
+
+    raw = {
+        "query_breakdown": {"key_components": ["ml", "bangalore", "startup"], "analysis": "..."},
+        "response": {
+            "regionBasedQuery": 1,
+            "locationDetails": {"operator": "OR", "locations": [{"name": "Bangalore"}, {"name": "Bengaluru"}]},
+            "sectorBasedQuery": 1,
+            "sectorDetails": {"operator": "AND", "sectors": [{
+                "name": "Startup", "temporal": "any", "keywords": ["startup", "seed stage"],
+                "companyStage": {"enabled": True, "sizeRange": {"min": 1, "max": 100}}}]},
+            "organisationBasedQuery": 0,
+            "organisationDetails": {"operator": "OR", "organizations": []},
+            "skillBasedQuery": 1,
+            "skillDetails": {"operator": "AND", "skills": [{
+                "name": f"Skill {i}", "priority": "primary", "temporal": "current",
+                "relatedRoles": ["ML Engineer", {"name": "Data Scientist"}, 7],
+                "titleKeywords": ["ml engineer"],
+                "regexPatterns": {"keywords": ["machine learning", "\\bml\\b"], "fields": ["bio"]}} for i in range(8)]},
+            "dbBasedQuery": 1,
+            "dbQueryDetails": {"operator": "AND", "queries": [
+                {"field": "education.schoolName", "regex": "(?i)iit", "description": "IIT"}]},
+        },
+    }
+
+    def legacy_walk(data: Dict[str, Any]) -> None:
+        """The dict handling this model replaces: role-name walk + db field normalisation."""
+        response = data["response"]
+        names = []
+        for skill_item in response["skillDetails"]["skills"]:
+            if skill_item.get("name", ""):
+                names.append(skill_item["name"])
+            roles = skill_item.get("relatedRoles", [])
+            if isinstance(roles, list):
+                for r_ in roles:
+                    if isinstance(r_, dict) and "name" in r_:
+                        names.append(r_["name"])
+                    elif isinstance(r_, str):
+                        names.append(r_)
+                    else:
+                        names.append(str(r_))
+        if response.get("dbBasedQuery"):
+            for q in response["dbQueryDetails"]["queries"]:
+                field_name = q.get("field")
+                if isinstance(field_name, str) and field_name.startswith("education.") and "schoolName" in field_name:
+                    q["field"] = field_name.replace("schoolName", "school")
+        json.dumps(data)
+
+    def model_walk(data: Dict[str, Any]) -> None:
+        result, _ = HydeResult.from_dict(data)
+        names = [s.name for s in result.response.skills.items]
+        names += [r.name for s in result.response.skills.items for r in (s.related_roles or [])]
+        json.dumps(result.to_dict())
+
+    rounds = 5000
+    for label, fn in (("dict walk (legacy)", legacy_walk), ("slotted model", model_walk)):
+        copies = [copy.deepcopy(raw) for _ in range(rounds)]
+        t0 = time.perf_counter()
+        for data in copies:
+            fn(data)
+        print(f"{label:<20} {(time.perf_counter() - t0) / rounds * 1e6:8.1f} us/result")
+
+    result, issues = HydeResult.from_dict(raw)
+    print(f"repairs on sample: {len(issues)}")
@@ -0,0 +1,114 @@
+"""
+Out-of-band jobs: LLM work that has to outlive the invocation that needed it.
+
+Lambda freezes the process as soon as the handler returns, so a background task still
+waiting on an LLM at that point is lost, and waiting for it delays the response. Such work
+is handed to a worker instead: an asynchronous invoke (``InvocationType="Event"``) of
+``HYDE_WORKER_FUNCTION``, by default this same function, whose ``lambda_handler`` passes
+``{"hyde_job": {"kind": ..., "payload": ...}}`` events to ``run``. The invoke runs in a thread
+as a background task started as soon as the job is known, so the handler's final drain
+only covers Redis writes and hand-offs. Lambda retries a failed asynchronous invocation
+twice, so ``run`` raises on failure.
+
+Without a worker (``HYDE_WORKER_FUNCTION=none``, the default outside Lambda) or without
+boto3, jobs run as in-process background tasks, bounded by the drain as before.
+
+The execution role needs ``lambda:InvokeFunction`` on the worker function.
+
+Kinds:
+    refresh        regenerate stale cache entries (``hyde_logic._refresh_entries``)
+    related_roles  describe related roles (cached under ``skill:``) and patch the descriptions
+                   the request could not wait for into the completed search document
+                   (``lambda_handler.patch_related_roles``)
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+try:  # Optional dependency: part of the Lambda runtime, not of requirements.txt
+    import boto3
+except ImportError:  # pragma: no cover - depends on deployment package
+    boto3 = None
+
+from cache_metrics import JOBS, metrics as cache_metrics
+from config import HYDE_WORKER_FUNCTION
+from logging_config import setup_logger
+import background_tasks
+
+logger = setup_logger(__name__)
+
+EVENT_KEY = "hyde_job"
+_lambda_client = None
+
+
+def worker_function() -> str:
+    """Name of the function jobs are handed to; "" runs them in-process."""
+    if boto3 is None or HYDE_WORKER_FUNCTION.lower() == "none":
+        return ""
+    return HYDE_WORKER_FUNCTION
+
+
+def _invoke(function_name: str, event: Dict[str, Any]) -> None:
+    global _lambda_client
+    if _lambda_client is None:
+        _lambda_client = boto3.client("lambda")
+    response = _lambda_client.invoke(FunctionName=function_name, InvocationType="Event",
+                                      Payload=json.dumps(event, ensure_ascii=False).encode("utf-8"))
+    if response.get("StatusCode") != 202:
+        raise RuntimeError(f"async invoke returned status {response.get('StatusCode')}")
+
+
+def submit(kind: str, payload: Dict[str, Any], name: str) -> bool:
+    """
+    Hand job ``kind`` to the worker off the request path (in-process without one).
+    ``name`` deduplicates like ``background_tasks.schedule``; ``False`` for a duplicate.
+    ``payload`` must be JSON-serialisable.
+    """
+    function_name = worker_function()
+    if not function_name:
+        cache_metrics.incr(JOBS, f"{kind}_in_process")
+        return background_tasks.schedule(f"job:{name}", run(kind, payload))
+
+    async def _hand_off() -> None:
+        try:
+            await asyncio.to_thread(_invoke, function_name, {EVENT_KEY: {"kind": kind, "payload": payload}})
+            cache_metrics.incr(JOBS, f"{kind}_handed_off")
+        except Exception as e:
+            cache_metrics.incr(JOBS, f"{kind}_handoff_failures")
+            logger.warning(f"Could not hand {kind} job {name} to {function_name}: {e}")
+
+    return background_tasks.schedule(f"job:{name}", _hand_off())
+
+
+async def run(kind: str, payload: Dict[str, Any]) -> None:
+    """Run one job (in the worker, or in-process without one); raises on failure."""
+    handler = _HANDLERS.get(kind)
+    if handler is None:
+        raise ValueError(f"Unknown job kind: {kind}")
+    cache_metrics.incr(JOBS, f"{kind}_runs")
+    await handler(payload)
+
+
+async def _refresh(payload: Dict[str, Any]) -> None:
+    from hyde_logic import _refresh_entries
+
+    await _refresh_entries(payload["family"], payload["names"], payload["provider"])
+
+
+async def _related_roles(payload: Dict[str, Any]) -> None:
+    from hyde_logic import process_canhelp_skills_with_descriptions
+
+    names = payload["names"]
+    described = await process_canhelp_skills_with_descriptions(names, payload["provider"], role_names=names)
+    if payload.get("document"):
+        from lambda_handler import patch_related_roles
+
+        descriptions = {name: described.get(name, {}).get("description", "") for name in names}
+        await patch_related_roles(payload["document"], descriptions)
+
+
+_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {
+    "refresh": _refresh,
+    "related_roles": _related_roles,
+}
@@ -0,0 +1,183 @@
+"""
+Single-pass extraction of the JSON object in an LLM response.
+
+The common case (one object, possibly inside a code fence or prose) is a single C-level
+parse of the span between the first ``{`` and the last ``}``. Otherwise one tokenising scan
+from the first ``{`` tracks string literals and a bracket stack to find where the outermost
+object ends. If the response is cut off (``max_tokens``, provider timeout) the open strings,
+arrays and objects are closed. Incomplete trailing members are dropped back to the last
+complete one (a string or number cut off mid-value is never kept as a shorter value), so
+callers get the filters that were generated rather than an empty fallback.
+
+``orjson`` is used for parsing when installed (optional dependency), the stdlib parser
+otherwise.
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+try:  # Optional dependency; the stdlib parser is used when it is not installed
+    import orjson
+except ImportError:  # pragma: no cover - depends on deployment package
+    orjson = None
+
+_CLOSERS = {"{": "}", "[": "]"}
+# How many earlier cut points to try when the naive repair does not parse
+_MAX_REPAIR_ATTEMPTS = 32
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON object can be recovered from a response."""
+
+
+def loads(text: str) -> Any:
+    """Parse with orjson when available; raises ``ValueError`` subclasses either way."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+# Whole string literals (closed or running to the end of the text) or structural characters
+_TOKENS = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*("?)|[{}\[\],]', re.S)
+
+
+_CutPoint = Tuple[int, Tuple[str, ...], bool]
+
+
+def _scan(text: str, start: int) -> Tuple[int, List[str], bool, List[_CutPoint]]:
+    """
+    Scan from the ``{`` at ``start``. Returns ``(end, stack, in_string, cut_points)`` where
+    ``end`` is one past the closing brace (or ``len(text)`` if truncated) and ``cut_points``
+    are ``(position, stack, after_opener)`` triples at which the prefix can be closed into
+    valid JSON.
+    """
+    stack: List[str] = []
+    cut_points: List[_CutPoint] = []
+    for match in _TOKENS.finditer(text, start):
+        ch = match.group()[0]
+        if ch == '"':
+            if not match.group(1):
+                return len(text), stack, True, cut_points
+        elif ch in "{[":
+            stack.append(ch)
+            cut_points.append((match.end(), tuple(stack), True))
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return match.end(), stack, False, cut_points
+            cut_points.append((match.end(), tuple(stack), False))
+        else:
+            cut_points.append((match.start(), tuple(stack), False))
+    return len(text), stack, False, cut_points
+
+
+def _close(fragment: str, stack) -> str:
+    return fragment + "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def extract_json_object(text: str) -> Tuple[Any, bool]:
+    """
+    Return ``(obj, repaired)`` for the outermost JSON object in ``text``.
+
+    ``repaired`` is ``True`` when the object was truncated and had to be closed. Raises
+    ``JSONExtractionError`` when there is no object or it cannot be recovered.
+    """
+    if not text:
+        raise JSONExtractionError("Empty response")
+    start = text.find("{")
+    if start == -1:
+        raise JSONExtractionError("No JSON object in response")
+    # Fast path: the object spans first "{" to last "}" (bare JSON, fences, prose around it)
+    last = text.rfind("}")
+    if last > start:
+        try:
+            return loads(text[start:last + 1]), False
+        except ValueError:
+            pass
+    end, stack, in_string, cut_points = _scan(text, start)
+    if not stack:
+        try:
+            return loads(text[start:end]), False
+        except ValueError as e:
+            raise JSONExtractionError(f"Invalid JSON object: {e}") from e
+
+    # Truncated: first try closing everything as-is (covers cuts between members), then
+    # drop back to the last complete member; cutting right after an opener is the last
+    # resort because it leaves an empty object/array where a member was being written.
+    # A cut inside a string is never closed as-is: "San Fra" would become a real filter.
+    # Neither is a cut right after a digit: 12 may be the start of 1200
+    recent = list(reversed(cut_points[-_MAX_REPAIR_ATTEMPTS:]))
+    attempts = [] if in_string or text[end - 1].isdigit() else [(text[start:end].rstrip(), stack)]
+    attempts += [(text[start:pos], cut_stack) for pos, cut_stack, after_opener in recent if not after_opener]
+    attempts += [(text[start:pos], cut_stack) for pos, cut_stack, after_opener in recent if after_opener]
+    for prefix, open_stack in attempts:
+        try:
+            return loads(_close(prefix, open_stack)), True
+        except ValueError:
+            continue
+    raise JSONExtractionError("Truncated JSON object could not be repaired")
+
+
+def try_extract_json_object(text: str) -> Optional[Any]:
+    """Like ``extract_json_object`` but returns ``None`` instead of raising."""
+    try:
+        return extract_json_object(text)[0]
+    except JSONExtractionError:
+        return None
+
+
+if __name__ == "__main__":
+    import time
+
+    sample = {
+        "query_breakdown": {"key_components": ["python", "berlin", "fintech"], "analysis": "x " * 200},
+        "response": {
+            "regionBasedQuery": 1,
+            "locationDetails": {"operator": "OR", "locations": [{"name": "Berlin"}, {"name": "Munich"}]},
+            "skillBasedQuery": 1,
+            "skillDetails": {"operator": "AND", "skills": [
+                {"name": f"skill {i}", "relatedRoles": [f"role {i}", f"role {i + 1}"]} for i in range(12)]},
+            "dbBasedQuery": 0,
+            "dbQueryDetails": {"operator": "AND", "queries": []},
+        },
+    }
+    body = json.dumps(sample, indent=2)
+    fenced = f"Here is the analysis:\n```json\n{body}\n```\nLet me know if you need more."
+
+    def legacy_extract(response_text: str) -> Any:
+        match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+        response_text = match.group(1).strip() if match else response_text.strip()
+        if not response_text.startswith("{"):
+            response_text = response_text[response_text.find("{"):]
+        if not response_text.endswith("}"):
+            response_text = response_text[:response_text.rfind("}") + 1]
+        return json.loads(response_text)
+
+    def stdlib_extract(response_text: str) -> Any:
+        global orjson
+        saved, orjson = orjson, None
+        try:
+            return extract_json_object(response_text)[0]
+        finally:
+            orjson = saved
+
+    rounds = 2000
+    for label, fn, payload in (
+        ("legacy regex + json", legacy_extract, fenced),
+        ("single pass", lambda t: extract_json_object(t)[0], fenced),
+        ("single pass (bare)", lambda t: extract_json_object(t)[0], body),
+        ("single pass (stdlib)", stdlib_extract, fenced),
+    ):
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            fn(payload)
+        print(f"{label:<22} {(time.perf_counter() - t0) / rounds * 1e6:8.1f} us/response")
+
+    truncated = body[: int(len(body) * 0.7)]
+    t0 = time.perf_counter()
+    repaired, was_repaired = extract_json_object(truncated)
+    print(f"{'repair (70% cut)':<22} {(time.perf_counter() - t0) * 1e6:8.1f} us, repaired={was_repaired}, "
+          f"skills kept={len(repaired['response'].get('skillDetails', {}).get('skills', []))}/12")
+    print(f"backend: {'orjson' if orjson is not None else 'json'}")
@@ -6,7 +6,24 @@ import traceback
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
+import background_tasks
+import cache_metrics
+import heavy_hitters
+import jobs
+from config import (
+    BACKGROUND_DRAIN_SECONDS,
+    HYDE_CASCADE,
+    HYDE_DEFAULT_PROVIDER,
+    HYDE_ENGINE,
+    HYDE_FAST_PATH,
+    HYDE_OUTPUT,
+    HYDE_PROGRESSIVE,
+    HYDE_ROUTER,
+    RELATED_ROLES_PATCH_WAIT_SECONDS,
+    redis_client,
+)
 from hyde_logic import HydeReasoning
+from local_cache import local_cache
 from logging_config import setup_logger
 from api_client import (
     create_search_document,
@@ -37,11 +54,135 @@ def _normalize_user_id(raw_user_id):
 class SearchStatus:
     """Search execution status tracking"""
     NEW = "NEW"
+    HYDE_PARTIAL = "HYDE_PARTIAL"
     HYDE_COMPLETE = "HYDE_COMPLETE"
     SEARCH_COMPLETE = "SEARCH_COMPLETE"
     RANK_AND_REASONING_COMPLETE = "RANK_AND_REASONING_COMPLETE"
     ERROR = "ERROR"
 
+
+# Statuses each HyDE write may find upstream. Progressive mode publishes the step-1 structure
+# as HYDE_PARTIAL, patches enriched sections while still HYDE_PARTIAL, then completes. Related-role
+# descriptions that finish after the result was returned are patched into the completed document
+# by the worker (patch_related_roles).
+EXPECTED_STATUSES = {
+    SearchStatus.HYDE_PARTIAL: [SearchStatus.NEW, SearchStatus.HYDE_PARTIAL],
+    "patch": [SearchStatus.HYDE_PARTIAL],
+    SearchStatus.HYDE_COMPLETE: [SearchStatus.NEW, SearchStatus.HYDE_PARTIAL, SearchStatus.HYDE_COMPLETE],
+    "late_patch": [SearchStatus.HYDE_COMPLETE],
+}
+
+
+class _ProgressPublisher:
+    """
+    on_progress hook of HydeReasoning.analyze_query: writes the partial result and section
+    patches to the search document (progressive mode only).
+    """
+
+    def __init__(self, search_id, user_id, started_at, progressive):
+        self.search_id = search_id
+        self.user_id = user_id
+        self.started_at = started_at
+        self.progressive = progressive
+
+    def _write(self, stage, payload):
+        now = datetime.now(timezone.utc)
+        if stage == "structure":
+            update_search_document(
+                self.search_id,
+                user_id=self.user_id,
+                set_fields={
+                    "hydeAnalysis": {
+                        "queryBreakdown": payload.get("query_breakdown", {}),
+                        "response": payload.get("response", {}),
+                        "partial": True
+                    },
+                    "status": SearchStatus.HYDE_PARTIAL,
+                    "metrics.hydePartialMs": (time.time() - self.started_at) * 1000,
+                    "updatedAt": now.isoformat()
+                },
+                append_events=[
+                    {
+                        "id": f"HYDE_PARTIAL:{self.search_id}",
+                        "stage": "HYDE",
+                        "message": "HyDE structure published; enrichment in progress",
+                        "timestamp": now.isoformat()
+                    }
+                ],
+                expected_statuses=EXPECTED_STATUSES[SearchStatus.HYDE_PARTIAL],
+            )
+        else:
+            fields = {f"hydeAnalysis.response.{key}": value for key, value in payload.items()}
+            fields["updatedAt"] = now.isoformat()
+            update_search_document(
+                self.search_id,
+                user_id=self.user_id,
+                set_fields=fields,
+                expected_statuses=EXPECTED_STATUSES[stage],
+            )
+
+    async def __call__(self, stage, payload):
+        if not self.progressive:
+            return
+        try:
+            await asyncio.to_thread(self._write, stage, payload)
+            logger.info(f"Published HyDE {stage} for {self.search_id}: {list(payload)}")
+        except SearchServiceError as e:
+            # The HYDE_COMPLETE write carries everything known by then; a missed partial write
+            # only costs latency
+            logger.warning(f"Failed to publish HyDE {stage} for {self.search_id}: {e}")
+
+
+# Interval between search document reads while the worker waits for HYDE_COMPLETE
+PATCH_POLL_SECONDS = 1.0
+
+
+async def patch_related_roles(document, descriptions):
+    """
+    Worker side of the related_roles job: wait up to RELATED_ROLES_PATCH_WAIT_SECONDS for the
+    request to write HYDE_COMPLETE, then fill the related-role descriptions it published empty.
+    Any other status (ERROR, a later stage) drops the patch. Returns True if it was written.
+    """
+    search_id, user_id = document["search_id"], document["user_id"]
+    deadline = time.monotonic() + RELATED_ROLES_PATCH_WAIT_SECONDS
+    while True:
+        search_doc = await asyncio.to_thread(get_search_document, search_id, user_id=user_id)
+        status = (search_doc or {}).get("status")
+        if status == SearchStatus.HYDE_COMPLETE:
+            break
+        if status not in (None, SearchStatus.NEW, SearchStatus.HYDE_PARTIAL) or time.monotonic() >= deadline:
+            logger.info(f"Dropped related-role patch for {search_id}: document is {status}")
+            cache_metrics.metrics.incr(cache_metrics.JOBS, "related_roles_dropped")
+            return False
+        await asyncio.sleep(PATCH_POLL_SECONDS)
+
+    skill_details = search_doc.get("hydeAnalysis", {}).get("response", {}).get("skillDetails") or {}
+    filled = 0
+    for skill in skill_details.get("skills") or []:
+        for role in skill.get("relatedRoles") or []:
+            if isinstance(role, dict) and not role.get("description") and descriptions.get(role.get("name")):
+                role["description"] = descriptions[role["name"]]
+                filled += 1
+    if not filled:
+        return False
+    try:
+        await asyncio.to_thread(
+            update_search_document,
+            search_id,
+            user_id=user_id,
+            set_fields={"hydeAnalysis.response.skillDetails": skill_details, "updatedAt": get_utc_now()},
+            expected_statuses=EXPECTED_STATUSES["late_patch"],
+        )
+    except SearchServiceError as e:
+        # The document moved on (or the service failed); role descriptions stay in the cache keys
+        logger.warning(f"Failed to patch related roles into {search_id}: {e}")
+        cache_metrics.metrics.incr(cache_metrics.JOBS, "related_roles_dropped")
+        return False
+    logger.info(f"Patched {filled} related-role description(s) into {search_id}")
+    cache_metrics.metrics.incr(cache_metrics.JOBS, "related_roles_patched")
+    return True
+
+
 async def _run(event):
     """
     Main async execution logic for HyDE analysis.
@@ -109,36 +250,47 @@ async def _run(event):
                     })
                 }
 
-        # Get providers from flags or use defaults
-        hyde_provider = flags.get('hyde_provider', 'groq_llama')
-        description_provider = flags.get('description_provider', 'groq_llama')
+        # Get providers from flags or use defaults ("auto" routes step 1 per query; HydeReasoning
+        # resolves names that are not MODEL_CONFIGS keys)
+        hyde_provider = flags.get('hyde_provider', 'auto' if HYDE_ROUTER else HYDE_DEFAULT_PROVIDER)
+        description_provider = flags.get('description_provider', 'gemini')
         alternative_skills = flags.get('alternative_skills', False)
         hyde_analysis_flags = flags.get('hyde_analysis_flags', {})
         additional_context = flags.get('additional_context', {})
-
-        logger.info(f"Using providers - hyde: {hyde_provider}, description: {description_provider}")
+        progressive = flags.get('progressive', HYDE_PROGRESSIVE)
+        hyde_engine = flags.get('hyde_engine', HYDE_ENGINE)
+        fast_path = bool(flags.get('fast_path', HYDE_FAST_PATH))
+        hyde_output = flags.get('hyde_output', HYDE_OUTPUT)
+        hyde_cascade = flags.get('hyde_cascade', HYDE_CASCADE)
+        if isinstance(hyde_cascade, str):
+            hyde_cascade = [p.strip() for p in hyde_cascade.split(',') if p.strip()]
+        elif not isinstance(hyde_cascade, list):
+            hyde_cascade = []
 
         # Initialize HyDE processor
-        hyde = HydeReasoning(hyde_provider, description_provider)
+        hyde = HydeReasoning(hyde_provider, description_provider, engine=hyde_engine, fast_path=fast_path,
+                             output=hyde_output, cascade=hyde_cascade)
+        logger.info(f"Using providers - hyde: {'auto' if hyde.router else hyde.hyde_provider}, "
+                    f"description: {hyde.description_provider}")
 
-        # Perform HyDE analysis (Note: analysis_flags and additional_context not yet implemented in HydeReasoning)
+        # Perform HyDE analysis (hyde_analysis_flags select the enrichment stages; entities in
+        # additional_context bypass extraction)
         hyde_start_time = time.time()
+        publisher = _ProgressPublisher(search_id, user_id, hyde_start_time, progressive)
         hyde_result = await hyde.analyze_query(
             query, 
-            alternative_skills=alternative_skills
+            alternative_skills=alternative_skills,
+            analysis_flags=hyde_analysis_flags,
+            additional_context=additional_context,
+            on_progress=publisher,
+            search_document={"search_id": search_id, "user_id": user_id},
         )
-        
-        # TODO: Extend HydeReasoning.analyze_query to accept analysis_flags and additional_context
-        # For now, we store the flags in the result for future use
-        if hyde_analysis_flags or additional_context:
-            logger.info("hyde_analysis_flags and additional_context received but not yet implemented")
-            hyde_result["flags_received"] = {
-                "hyde_analysis_flags": hyde_analysis_flags,
-                "additional_context": additional_context
-            }
         hyde_time = time.time() - hyde_start_time
 
         logger.info(f"HyDE Analysis completed in {hyde_time:.2f} seconds")
+        logger.info(f"Local cache stats: {local_cache.stats()}")
+        cache_stats = cache_metrics.publish(redis_client)
+        logger.info(f"Cache metrics: {json.dumps(cache_stats)}")
 
         # Update searchOutput collection with HyDE results (idempotent)
         now = datetime.now(timezone.utc)
@@ -155,6 +307,7 @@ async def _run(event):
                     },
                     "status": SearchStatus.HYDE_COMPLETE,
                     "metrics.hydeMs": hyde_time * 1000,
+                    "metrics.cache": cache_stats,
                     "updatedAt": now.isoformat()
                 },
                 append_events=[
@@ -165,7 +318,7 @@ async def _run(event):
                         "timestamp": now.isoformat()
                     }
                 ],
-                expected_statuses=[SearchStatus.NEW, SearchStatus.HYDE_COMPLETE],
+                expected_statuses=EXPECTED_STATUSES[SearchStatus.HYDE_COMPLETE],
             )
         except SearchServiceError as update_error:
             # Check if document already in HYDE_COMPLETE status (idempotent retry)
@@ -260,6 +413,31 @@ async def _run(event):
             })
         }
 
+    finally:
+        # On every exit path: give background work (Redis writes, metric flushes, job hand-offs)
+        # a short window before Lambda freezes the process
+        heavy_hitters.schedule_flush(redis_client)
+        await background_tasks.drain(BACKGROUND_DRAIN_SECONDS)
+
+# The worker has no caller waiting on it, so its background writes get a longer window
+WORKER_DRAIN_SECONDS = 5.0
+
+
+async def _run_job(job):
+    """
+    Worker side of jobs.submit: run one out-of-band job. A failure raises, so Lambda retries
+    the asynchronous invocation.
+    """
+    kind = job.get("kind")
+    logger.info(f"=== HyDE worker job: {kind} ===")
+    try:
+        await jobs.run(kind, job.get("payload") or {})
+    finally:
+        logger.info(f"Job metrics: {json.dumps(cache_metrics.publish(redis_client))}")
+        await background_tasks.drain(WORKER_DRAIN_SECONDS)
+    return {"statusCode": 200, "body": json.dumps({"job": kind, "success": True})}
+
+
 def lambda_handler(event, context):
     """
     AWS Lambda handler for HyDE analysis service - synchronous wrapper for async execution.
@@ -271,9 +449,14 @@ def lambda_handler(event, context):
         "userId": "user-id-string",
         "query": "search query string",
         "flags": {
-            "hyde_provider": "groq_llama",
-            "description_provider": "groq_llama",
+            "hyde_provider": "auto",
+            "description_provider": "gemini",
             "alternative_skills": false,
+            "progressive": false,
+            "hyde_engine": "monolithic",
+            "fast_path": false,
+            "hyde_output": "full",
+            "hyde_cascade": ["openainano"],
             "hyde_analysis_flags": {...},
             "additional_context": {...}
         }
@@ -288,7 +471,12 @@ def lambda_handler(event, context):
             "processing_time": float
         }
     }
+
+    Events of the form {"hyde_job": {"kind": ..., "payload": {...}}} are out-of-band jobs
+    handed over by another invocation (see jobs.py).
     """
+    if jobs.EVENT_KEY in event:
+        return asyncio.run(_run_job(event[jobs.EVENT_KEY]))
     return asyncio.run(_run(event))
 
 # For local testing
@@ -302,8 +490,8 @@ if __name__ == "__main__":
         "userId": "test_user_123", 
         "query": "Find experts in machine learning with Python experience",
         "flags": {
-            "hyde_provider": "groq_llama",
-            "description_provider": "groq_llama",
+            "hyde_provider": "auto",
+            "description_provider": "gemini",
             "alternative_skills": False,
             "hyde_analysis_flags": {},
             "additional_context": {}
@@ -0,0 +1,176 @@
+"""Size- and TTL-bounded in-process LRU cache that sits in front of Upstash for hot keys."""
+
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import (
+    LOCAL_CACHE_MAX_BYTES,
+    LOCAL_CACHE_MAX_ENTRIES,
+    LOCAL_CACHE_PIN_TTL_SECONDS,
+    LOCAL_CACHE_PINNED_MAX_BYTES,
+    LOCAL_CACHE_TTL_SECONDS,
+)
+
+# Rough per-entry bookkeeping overhead (OrderedDict node + tuple + floats)
+_ENTRY_OVERHEAD_BYTES = 120
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory footprint of a cached value from its serialised length."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    try:
+        return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class LocalCache:
+    """
+    LRU cache bounded by total bytes, entry count and per-entry TTL.
+
+    Keys are the normalised Redis cache keys (e.g. ``skill:python``) so the tier can be
+    shared by every cache family. Eviction is by byte size first because skill
+    descriptions are large and uneven; the entry cap only guards against many tiny values.
+
+    Pinned entries (the fleet-wide heavy hitters) live in a separate budget and are never
+    evicted by LRU pressure, only by their own, longer TTL.
+    """
+
+    def __init__(self, max_bytes: int = LOCAL_CACHE_MAX_BYTES, max_entries: int = LOCAL_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = LOCAL_CACHE_TTL_SECONDS,
+                 pinned_max_bytes: int = LOCAL_CACHE_PINNED_MAX_BYTES,
+                 pin_ttl_seconds: float = LOCAL_CACHE_PIN_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.pinned_max_bytes = pinned_max_bytes
+        self.pin_ttl_seconds = pin_ttl_seconds
+        # key -> (value, size_bytes, expires_at)
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._pinned: Dict[str, Tuple[Any, int, float]] = {}
+        self._pinned_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            pinned = self._pinned.get(key)
+            if pinned is not None:
+                if pinned[2] > time.monotonic():
+                    self.hits += 1
+                    return pinned[0]
+                self._pinned_bytes -= self._pinned.pop(key)[1]
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, _, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return ``{key: value}`` for the keys present and fresh; misses are omitted."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key: str, value: Any, size: Optional[int] = None, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Insert or refresh ``key``. ``size`` should be the raw payload length when known
+        (e.g. the string read from Redis); otherwise it is estimated from ``value``.
+        Values larger than the whole budget are not cached.
+        """
+        size = (size if size is not None else estimate_size(value)) + len(key) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self._pinned:
+                # Keep pinned copies current when a refresh rewrites the value
+                _, old_size, expires_at = self._pinned[key]
+                self._pinned[key] = (value, size, expires_at)
+                self._pinned_bytes += size - old_size
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self._bytes += size
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def pin(self, key: str, value: Any, size: Optional[int] = None) -> bool:
+        """Pin ``key`` outside the LRU budget. Returns ``False`` when the pinned budget is full."""
+        size = (size if size is not None else estimate_size(value)) + len(key) + _ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            if key in self._pinned:
+                self._pinned_bytes -= self._pinned.pop(key)[1]
+            if self._pinned_bytes + size > self.pinned_max_bytes:
+                return False
+            if key in self._entries:
+                self._drop(key)
+            self._pinned[key] = (value, size, time.monotonic() + self.pin_ttl_seconds)
+            self._pinned_bytes += size
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if key in self._pinned:
+                self._pinned_bytes -= self._pinned.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._pinned.clear()
+            self._pinned_bytes = 0
+
+    def pinned_keys(self) -> List[str]:
+        with self._lock:
+            return list(self._pinned)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "pinned_entries": len(self._pinned),
+            "pinned_bytes": self._pinned_bytes,
+        }
+
+
+# Shared per-container instance used by the skill and location cache helpers
+local_cache = LocalCache()
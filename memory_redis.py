@@ -0,0 +1,203 @@
+"""In-process stand-in for the Upstash Redis client used by offline tools and local runs."""
+
+import fnmatch
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class InMemoryRedis:
+    """
+    Minimal, synchronous subset of the ``upstash_redis.Redis`` API backed by a dict.
+
+    Only the commands the HyDE service actually issues are implemented, with the same
+    argument names and return shapes as the Upstash client so callers can swap one
+    for the other without branching.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires_at: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------ helpers
+    def _alive(self, key: str) -> bool:
+        expires_at = self._expires_at.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(key, None)
+            self._expires_at.pop(key, None)
+        return key in self._data
+
+    def _apply_ttl(self, key: str, ex: Optional[int]) -> None:
+        if ex:
+            self._expires_at[key] = time.time() + ex
+        else:
+            self._expires_at.pop(key, None)
+
+    # ------------------------------------------------------------------ strings
+    def get(self, key: str) -> Optional[str]:
+        return self._data.get(key) if self._alive(key) else None
+
+    def mget(self, *keys: str) -> List[Optional[str]]:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: Any, nx: Optional[bool] = None, xx: Optional[bool] = None,
+            ex: Optional[int] = None, **_: Any) -> Optional[bool]:
+        exists = self._alive(key)
+        if (nx and exists) or (xx and not exists):
+            return None
+        self._data[key] = str(value)
+        self._apply_ttl(key, ex)
+        return True
+
+    def mset(self, values: Dict[str, Any]) -> bool:
+        for key, value in values.items():
+            self.set(key, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self._data.pop(key, None)
+            self._expires_at.pop(key, None)
+        return removed
+
+    def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._alive(key))
+
+    def expire(self, key: str, seconds: int, **_: Any) -> bool:
+        if not self._alive(key):
+            return False
+        self._apply_ttl(key, seconds)
+        return True
+
+    def ttl(self, key: str) -> int:
+        if not self._alive(key):
+            return -2
+        expires_at = self._expires_at.get(key)
+        return -1 if expires_at is None else max(0, int(expires_at - time.time()))
+
+    def incr(self, key: str) -> int:
+        return self.incrby(key, 1)
+
+    def incrby(self, key: str, increment: int) -> int:
+        value = int(self.get(key) or 0) + increment
+        self._data[key] = str(value)
+        return value
+
+    # ------------------------------------------------------------------ lists
+    def _list(self, key: str) -> List[str]:
+        if not self._alive(key):
+            self._data[key] = []
+        return self._data[key]
+
+    def rpush(self, key: str, *elements: Any) -> int:
+        items = self._list(key)
+        items.extend(str(e) for e in elements)
+        return len(items)
+
+    def lrange(self, key: str, start: int, stop: int) -> List[str]:
+        items = self._data.get(key, []) if self._alive(key) else []
+        stop = len(items) if stop == -1 else stop + 1
+        return list(items[start:stop])
+
+    def llen(self, key: str) -> int:
+        return len(self._data[key]) if self._alive(key) else 0
+
+    def ltrim(self, key: str, start: int, stop: int) -> bool:
+        if self._alive(key):
+            items = self._data[key]
+            self._data[key] = items[start:] if stop == -1 else items[start:stop + 1]
+        return True
+
+    # ------------------------------------------------------------------ hashes
+    def _hash(self, key: str) -> Dict[str, str]:
+        if not self._alive(key):
+            self._data[key] = {}
+        return self._data[key]
+
+    def hincrby(self, key: str, field: str, increment: int) -> int:
+        fields = self._hash(key)
+        value = int(fields.get(field, 0)) + increment
+        fields[field] = str(value)
+        return value
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self._data[key]) if self._alive(key) else {}
+
+    # ------------------------------------------------------------------ sorted sets
+    def _zset(self, key: str) -> Dict[str, float]:
+        if not self._alive(key):
+            self._data[key] = {}
+        return self._data[key]
+
+    def _zsorted(self, key: str) -> List[Tuple[str, float]]:
+        members = self._data.get(key, {}) if self._alive(key) else {}
+        return sorted(members.items(), key=lambda kv: (kv[1], kv[0]))
+
+    def zincrby(self, key: str, increment: float, member: str) -> float:
+        members = self._zset(key)
+        members[member] = members.get(member, 0.0) + float(increment)
+        return members[member]
+
+    def zrevrange(self, key: str, start: int, stop: int, withscores: bool = False) -> List[Any]:
+        ordered = self._zsorted(key)[::-1]
+        page = ordered[start:] if stop == -1 else ordered[start:stop + 1]
+        return list(page) if withscores else [member for member, _ in page]
+
+    def zremrangebyrank(self, key: str, start: int, stop: int) -> int:
+        ordered = self._zsorted(key)
+        if not ordered:
+            return 0
+        size = len(ordered)
+        start = start + size if start < 0 else start
+        stop = stop + size if stop < 0 else stop
+        doomed = ordered[max(start, 0):stop + 1]
+        members = self._data[key]
+        for member, _ in doomed:
+            del members[member]
+        return len(doomed)
+
+    # ------------------------------------------------------------------ keyspace
+    def scan(self, cursor: int, match: Optional[str] = None, count: Optional[int] = None,
+             **_: Any) -> Tuple[int, List[str]]:
+        keys = sorted(key for key in list(self._data) if self._alive(key))
+        if match:
+            keys = [key for key in keys if fnmatch.fnmatchcase(key, match)]
+        count = count or 10
+        page = keys[cursor:cursor + count]
+        next_cursor = cursor + count
+        return (0 if next_cursor >= len(keys) else next_cursor), page
+
+    def keys(self, pattern: str = "*") -> List[str]:
+        return [key for key in sorted(self._data) if self._alive(key) and fnmatch.fnmatchcase(key, pattern)]
+
+    def flushall(self) -> bool:
+        self._data.clear()
+        self._expires_at.clear()
+        return True
+
+    # ------------------------------------------------------------------ batching
+    def pipeline(self) -> "InMemoryPipeline":
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    """Queues commands like ``upstash_redis`` pipelines (chainable) and runs them on ``exec``."""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._commands: List[Tuple[str, tuple, Dict[str, Any]]] = []
+
+    def __getattr__(self, name: str) -> Any:
+        getattr(self._client, name)  # AttributeError for commands the client lacks
+
+        def queue(*args: Any, **kwargs: Any) -> "InMemoryPipeline":
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def exec(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in commands]
@@ -0,0 +1,192 @@
+"""
+Organisation alias cache shared across queries.
+
+Every HyDE completion regenerates the aliases of the organisations it finds (Meta /
+Facebook, AWS / Amazon), so the same company gets a different alias set from query to
+query and the model spends output tokens on it each time. Aliases are now kept under
+``org_aliases:{norm}`` as::
+
+    {"name": ..., "aliases": [<verified>], "candidates": {<alias>: <queries seen>},
+     "updated_at": <unix seconds>}
+
+Only verified aliases are served and hinted. An alias is verified when it comes from a
+trusted source (the ``query_lexicon`` organisation lexicon), or when the LLM has produced
+it for the organisation in PROMOTE_AFTER separate queries. Until then it is a counted
+candidate, so a single hallucinated alias never persists.
+
+    hints(query)   verified aliases of organisations named in the query, as a compact prompt
+                   block; the model may leave ``aliases`` empty for them. Reads the
+                   in-process tier only and warms it from Redis in the background, so step 1
+                   never waits on Upstash
+    apply(resp)    one batched lookup for the response's organisations, merges verified and
+                   generated aliases (verified first) into the response and writes changed
+                   entries back in the background
+
+Counters are recorded in the ``org_aliases`` family of ``cache_metrics``.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List
+
+from logging_config import setup_logger
+import background_tasks
+from cache_codec import decode_value, encode_value
+from cache_metrics import ORG_ALIASES, metrics as cache_metrics
+from cache_policy import HARD_TTL_SECONDS
+from utils import normalize_text
+import query_lexicon
+
+logger = setup_logger(__name__)
+
+FAMILY = "org_aliases"
+MAX_ALIASES = 6
+# Queries in which the LLM must produce an alias before it is served
+PROMOTE_AFTER = 3
+MAX_CANDIDATES = 20
+# Query n-grams (up to this many words) checked for hints; at most HINT_MAX_KEYS of those not
+# in the local tier (shortest first) are fetched in the background
+HINT_MAX_WORDS = 3
+HINT_MAX_KEYS = 40
+
+# Organisation lexicon aliases are curated, so they count as verified
+_TRUSTED = {normalize_text(term.name): list(term.keywords) for term in query_lexicon.ORGANISATIONS}
+
+
+def cache_key(name: str) -> str:
+    return f"{FAMILY}:{normalize_text(name)}"
+
+
+def merge_aliases(name: str, *alias_lists: Iterable[str]) -> List[str]:
+    """Union of the alias lists in order, without duplicates (by normalised form) or ``name`` itself."""
+    seen = {normalize_text(name)}
+    merged: List[str] = []
+    for aliases in alias_lists:
+        for alias in aliases:
+            norm = normalize_text(alias) if isinstance(alias, str) else ""
+            if norm and norm not in seen:
+                seen.add(norm)
+                merged.append(alias.strip())
+    return merged[:MAX_ALIASES]
+
+
+def lookup(redis: Any, local_cache: Any, keys: List[str], count: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Stored entries for ``keys`` (local tier, then one MGET); missing keys are absent."""
+    found: Dict[str, Dict[str, Any]] = {}
+    remote = []
+    for key in dict.fromkeys(keys):
+        stored = local_cache.get(key)
+        if stored is not None:
+            found[key] = stored
+            if count:
+                cache_metrics.incr(ORG_ALIASES, "local_hits")
+        else:
+            remote.append(key)
+    if remote:
+        lookup_start = time.perf_counter()
+        try:
+            values = redis.mget(*remote)
+        except Exception as e:
+            logger.warning(f"Organisation alias lookup failed: {e}")
+            values = [None] * len(remote)
+        if count:
+            cache_metrics.incr(ORG_ALIASES, "lookup_ms", round((time.perf_counter() - lookup_start) * 1000))
+        for key, raw in zip(remote, values):
+            if not raw:
+                continue
+            try:
+                stored = decode_value(raw)
+            except ValueError:
+                if count:
+                    cache_metrics.incr(ORG_ALIASES, "decode_errors")
+                continue
+            if isinstance(stored, dict) and isinstance(stored.get("aliases"), list):
+                found[key] = stored
+                local_cache.set(key, stored, size=len(raw))
+                if count:
+                    cache_metrics.incr(ORG_ALIASES, "bytes_read", len(raw))
+    if count:
+        cache_metrics.incr(ORG_ALIASES, "hits", len(found))
+        cache_metrics.incr(ORG_ALIASES, "misses", len(set(keys)) - len(found))
+    return found
+
+
+def hints(redis: Any, local_cache: Any, query: str) -> str:
+    """
+    Prompt block listing the verified aliases of organisations named in ``query`` ("" if none).
+    Only the local tier is read; n-grams missing from it are fetched in the background.
+    """
+    tokens = normalize_text(query).split()
+    # Shortest first: single-word names ("google") are the common case
+    keys = list(dict.fromkeys(f"{FAMILY}:{' '.join(tokens[i:i + n])}" for n in range(1, HINT_MAX_WORDS + 1)
+                              for i in range(len(tokens) - n + 1)))
+    if not keys:
+        return ""
+    found = local_cache.get_many(keys)
+    missing = [key for key in keys if key not in found][:HINT_MAX_KEYS]
+    if missing:
+        background_tasks.schedule(f"org_alias_hints:{'|'.join(missing)}",
+                                  asyncio.to_thread(lookup, redis, local_cache, missing, False))
+    lines = [f"- {entry.get('name') or key[len(FAMILY) + 1:]}: {' | '.join(entry['aliases'])}"
+             for key, entry in found.items() if isinstance(entry, dict) and entry.get("aliases")]
+    if not lines:
+        return ""
+    cache_metrics.incr(ORG_ALIASES, "hinted", len(lines))
+    return ("\n\nKnown organisation aliases (from earlier searches; output \"aliases\": [] for these "
+            "organisations, they are filled in afterwards):\n" + "\n".join(lines))
+
+
+def _write_back(redis: Any, entries: Dict[str, Dict[str, Any]]) -> None:
+    for key, entry in entries.items():
+        try:
+            encoded = encode_value(entry)
+            redis.set(key, encoded, ex=HARD_TTL_SECONDS)
+            cache_metrics.incr(ORG_ALIASES, "writes")
+            cache_metrics.incr(ORG_ALIASES, "bytes_written", len(encoded))
+        except Exception as e:
+            logger.error(f"Failed to cache organisation aliases for {key}: {e}")
+
+
+def _updated_entry(name: str, stored: Dict[str, Any], generated: List[str]) -> Dict[str, Any]:
+    """``stored`` with trusted aliases added and ``generated`` counted (promoted at PROMOTE_AFTER)."""
+    verified = merge_aliases(name, stored.get("aliases", []), _TRUSTED.get(normalize_text(name), []))
+    candidates = dict(stored.get("candidates") or {})
+    known = {normalize_text(alias) for alias in verified}
+    for alias in merge_aliases(name, generated):
+        if normalize_text(alias) in known:
+            continue
+        candidates[alias] = int(candidates.get(alias, 0)) + 1
+        if candidates[alias] >= PROMOTE_AFTER and len(verified) < MAX_ALIASES:
+            verified.append(alias)
+            candidates.pop(alias)
+    candidates = dict(sorted(candidates.items(), key=lambda item: -item[1])[:MAX_CANDIDATES])
+    return {"name": stored.get("name") or name, "aliases": verified, "candidates": candidates,
+            "updated_at": int(time.time())}
+
+
+def apply(redis: Any, local_cache: Any, organisations: List[Any]) -> int:
+    """
+    Merge verified aliases into ``organisations`` (``hyde_models.Organization`` items) in place,
+    ahead of the generated ones, and schedule the write-back of entries whose verified aliases
+    or candidate counts changed. Returns the number of items changed.
+    Call it from a coroutine: the write-back is a background task.
+    """
+    if not organisations:
+        return 0
+    keys = [cache_key(org.name) for org in organisations]
+    cached = lookup(redis, local_cache, keys)
+    changed = 0
+    updates: Dict[str, Dict[str, Any]] = {}
+    for org, key in zip(organisations, keys):
+        stored = cached.get(key, {})
+        entry = _updated_entry(org.name, stored, org.aliases or [])
+        merged = merge_aliases(org.name, entry["aliases"], org.aliases or [])
+        if merged != (org.aliases or []):
+            changed += 1
+        org.aliases = merged
+        if entry["aliases"] != stored.get("aliases", []) or entry["candidates"] != stored.get("candidates", {}):
+            updates[key] = entry
+            local_cache.set(key, entry)
+    if updates:
+        background_tasks.schedule(f"org_aliases:{'|'.join(updates)}", asyncio.to_thread(_write_back, redis, updates))
+    return changed
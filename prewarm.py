@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Offline pre-warming of the skill description and location alt-name caches.
+
+Fills ``skill:{norm}`` and ``location_alt_names:{norm}`` keys ahead of traffic so the
+first users after a Redis flush (or on a new tenant) do not pay full LLM latency.
+
+Inputs can be a query corpus (HyDE step 1 is run to extract entities, unless the record
+already carries a recorded HyDE ``result``), plain skill/location lists, or both.
+Entities are deduplicated by their normalised cache key, existing keys are skipped,
+and generation runs in rate-limited batches with a resumable JSON checkpoint.
+
+Usage:
+    python prewarm.py --queries queries.jsonl --roles
+    python prewarm.py --skills skills.txt --locations cities.txt --rps 1 --concurrency 3
+    python prewarm.py --queries queries.jsonl --provider mock --redis memory
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from bloom_filter import log_keys
+from cache_codec import decode_value, encode_value
+from cache_policy import (HARD_TTL_SECONDS, LOCATION_FAMILY, SKILL_FAMILY, is_stale, join_meta, meta_key, redis_values,
+                          unwrap_value, wrap_value)
+from logging_config import setup_logger
+from utils import normalize_text
+
+logger = setup_logger(__name__)
+
+DescribeFn = Callable[[List[str], str], Awaitable[Dict[str, str]]]
+AltNamesFn = Callable[[List[str], str], Awaitable[List[Dict[str, Any]]]]
+ExtractFn = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+###############################################################################
+# INPUT LOADING
+###############################################################################
+def load_query_records(path: str) -> List[Dict[str, Any]]:
+    """
+    Load a query corpus. Accepts JSONL (``{"query": ..., "result": {...}}`` or a bare JSON
+    string per line) or plain text with one query per line. ``result`` is an optional
+    recorded HyDE output which lets the pre-warm skip step 1 for that query.
+    """
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] in "{\"":
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    item = line
+            else:
+                item = line
+            if isinstance(item, str):
+                records.append({"query": item})
+            elif isinstance(item, dict) and item.get("query"):
+                records.append(item)
+            else:
+                logger.warning(f"Skipping corpus line without a query: {line[:80]}")
+    return records
+
+
+def load_names(path: str) -> List[str]:
+    """Load one entity name per line (blank lines and ``#`` comments ignored)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def extract_entities(hyde_result: Dict[str, Any], include_roles: bool = False) -> Dict[str, List[str]]:
+    """
+    Pull skill, related-role and location names out of a HyDE step-1 result, following the
+    same rules as ``HydeReasoning._enrich_skills`` / ``_enrich_locations``.
+    """
+    response = hyde_result.get("response", hyde_result) if isinstance(hyde_result, dict) else {}
+    skills, roles, locations = [], [], []
+
+    skill_list = (response.get("skillDetails") or {}).get("skills", [])
+    if isinstance(skill_list, list):
+        for skill_item in skill_list:
+            if not isinstance(skill_item, dict):
+                continue
+            if skill_item.get("name"):
+                skills.append(skill_item["name"])
+            if include_roles and isinstance(skill_item.get("relatedRoles"), list):
+                for role in skill_item["relatedRoles"]:
+                    role_name = role.get("name") if isinstance(role, dict) else role
+                    if role_name:
+                        roles.append(str(role_name))
+
+    loc_list = (response.get("locationDetails") or {}).get("locations", [])
+    if isinstance(loc_list, list):
+        for loc in loc_list:
+            if isinstance(loc, dict) and loc.get("name"):
+                locations.append(loc["name"])
+
+    return {"skills": skills, "roles": roles, "locations": locations}
+
+
+def dedupe_by_key(names: Iterable[str]) -> Dict[str, str]:
+    """Return ``{normalised_key: first_seen_display_name}``, dropping names that normalise to empty."""
+    unique: Dict[str, str] = {}
+    for name in names:
+        norm = normalize_text(name)
+        if norm and norm not in unique:
+            unique[norm] = name
+    return unique
+
+
+###############################################################################
+# RATE LIMITING + CHECKPOINTS
+###############################################################################
+class RateLimiter:
+    """Spaces out call starts so at most ``rate`` calls begin per second (0 disables)."""
+
+    def __init__(self, rate: float = 0.0):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class Checkpoint:
+    """
+    JSON checkpoint of pre-warm progress so an interrupted run resumes where it stopped.
+
+    Layout: ``{"queries": {norm_query: entities}, "done": {family: [norm_key, ...]}}``.
+    A ``None`` path keeps the checkpoint in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.queries: Dict[str, Dict[str, List[str]]] = {}
+        self.done: Dict[str, set] = {SKILL_FAMILY: set(), LOCATION_FAMILY: set()}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.queries = state.get("queries", {})
+            for family, keys in state.get("done", {}).items():
+                self.done.setdefault(family, set()).update(keys)
+            logger.info(
+                f"Resuming from checkpoint {path}: {len(self.queries)} queries extracted, "
+                f"{sum(len(v) for v in self.done.values())} keys filled")
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        state = {
+            "queries": self.queries,
+            "done": {family: sorted(keys) for family, keys in self.done.items()},
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+###############################################################################
+# MOCK PROVIDER
+###############################################################################
+class MockProvider:
+    """
+    Deterministic, offline stand-in for the LLM calls made during pre-warming.
+
+    Step 1 returns an empty HyDE structure, so corpus entities only come from recorded
+    ``result`` fields; descriptions and alt names are synthesised from the input names.
+    """
+
+    def __init__(self):
+        self.calls = {"extract": 0, "describe": 0, "alt_names": 0}
+
+    async def extract(self, query: str) -> Dict[str, Any]:
+        self.calls["extract"] += 1
+        return {"query_breakdown": {"key_components": [], "analysis": ""},
+                "response": {"skillDetails": {"skills": []}, "locationDetails": {"locations": []}}}
+
+    async def describe(self, keywords: List[str], provider: str = "mock") -> Dict[str, str]:
+        self.calls["describe"] += 1
+        return {kw: f"Mock description for {kw}." for kw in keywords}
+
+    async def alt_names(self, locations: List[str], provider: str = "mock") -> List[Dict[str, Any]]:
+        self.calls["alt_names"] += 1
+        return [{"name": loc, "alt_names": [loc.upper()]} for loc in locations]
+
+
+###############################################################################
+# PRE-WARMER
+###############################################################################
+class Prewarmer:
+    """Collects entities, skips ones already cached and fills the rest in batches."""
+
+    def __init__(
+        self,
+        redis_client: Any,
+        describe_fn: DescribeFn,
+        alt_names_fn: AltNamesFn,
+        extract_fn: Optional[ExtractFn] = None,
+        provider: str = "gemini",
+        batch_size: int = 3,
+        concurrency: int = 5,
+        rate_limiter: Optional[RateLimiter] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        force: bool = False,
+        refresh_stale: bool = False,
+    ):
+        self.redis = redis_client
+        self.describe_fn = describe_fn
+        self.alt_names_fn = alt_names_fn
+        self.extract_fn = extract_fn
+        self.provider = provider
+        self.batch_size = max(1, batch_size)
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.checkpoint = checkpoint or Checkpoint()
+        self.force = force
+        self.refresh_stale = refresh_stale
+        self.stats = {"queries_extracted": 0, "llm_calls": 0, "failed_batches": 0,
+                      SKILL_FAMILY: 0, LOCATION_FAMILY: 0, "skipped_cached": 0}
+
+    async def collect(
+        self,
+        query_records: List[Dict[str, Any]],
+        include_roles: bool = False,
+    ) -> Dict[str, List[str]]:
+        """Run HyDE step 1 for corpus queries that need it and merge the extracted entities."""
+        merged = {"skills": [], "roles": [], "locations": []}
+
+        async def _extract(record: Dict[str, Any]) -> None:
+            norm_query = normalize_text(record["query"])
+            entities = self.checkpoint.queries.get(norm_query)
+            if entities is None:
+                if isinstance(record.get("result"), dict):
+                    entities = extract_entities(record["result"], include_roles=True)
+                elif self.extract_fn is not None:
+                    async with self.semaphore:
+                        await self.rate_limiter.acquire()
+                        self.stats["llm_calls"] += 1
+                        entities = extract_entities(await self.extract_fn(record["query"]), include_roles=True)
+                    self.stats["queries_extracted"] += 1
+                else:
+                    return
+                self.checkpoint.queries[norm_query] = entities
+                self.checkpoint.save()
+            for field in merged:
+                if field == "roles" and not include_roles:
+                    continue
+                merged[field].extend(entities.get(field, []))
+
+        await asyncio.gather(*[_extract(record) for record in query_records])
+        return merged
+
+    def _pending(self, family: str, names: Iterable[str]) -> Dict[str, str]:
+        """Deduplicate and drop keys that are already checkpointed or present in Redis."""
+        unique = dedupe_by_key(names)
+        pending = {norm: name for norm, name in unique.items() if norm not in self.checkpoint.done[family]}
+        if pending and not self.force:
+            norms = list(pending)
+            keys = [f"{family}:{norm}" for norm in norms]
+            meta_keys = [meta_key(family, key) for key in keys if meta_key(family, key)]
+            cached = self.redis.mget(*keys, *meta_keys)
+            metas = cached[len(keys):] or [None] * len(keys)
+            for norm, value, meta in zip(norms, cached, metas):
+                if value and not (self.refresh_stale and self._is_stale(family, value, meta)):
+                    pending.pop(norm)
+                    self.checkpoint.done[family].add(norm)
+                    self.stats["skipped_cached"] += 1
+        logger.info(f"{family}: {len(unique)} unique entities, {len(pending)} need generation")
+        return pending
+
+    def _is_stale(self, family: str, raw: Any, raw_meta: Any = None) -> bool:
+        try:
+            stored = join_meta(family, decode_value(raw), decode_value(raw_meta) if raw_meta else None)
+            _, meta = unwrap_value(family, stored)
+        except ValueError:
+            return True
+        return is_stale(family, meta)
+
+    def _stored_fields(self, cache_key: str) -> Dict[str, Any]:
+        """Fields of the skill entry being overwritten (embeddings etc.), without its metadata."""
+        raw = self.redis.get(cache_key)
+        if not raw:
+            return {}
+        try:
+            value, _ = unwrap_value(SKILL_FAMILY, decode_value(raw))
+        except ValueError:
+            return {}
+        return {k: v for k, v in value.items() if k != "meta"}
+
+    def _write(self, family: str, norm: str, value: Any, name: Optional[str] = None) -> bool:
+        overwrite = self.force or self.refresh_stale
+        cache_key = f"{family}:{norm}"
+        if overwrite and family == SKILL_FAMILY:
+            # Replace the description only; fields written by other pipelines survive
+            value = {**self._stored_fields(cache_key), **value}
+        parts = redis_values(family, cache_key, wrap_value(family, value, self.provider, name=name))
+        written = self.redis.set(cache_key, encode_value(parts.pop(cache_key)), nx=None if overwrite else True,
+                                 ex=HARD_TTL_SECONDS)
+        if written:
+            for key, part in parts.items():
+                self.redis.set(key, encode_value(part), ex=HARD_TTL_SECONDS)
+        self.checkpoint.done[family].add(norm)
+        self.stats[family] += 1
+        return bool(written)
+
+    def _log_written(self, keys: List[str]) -> None:
+        """Tell the request path's Bloom filter about the new keys (a no-op until it has a snapshot)."""
+        try:
+            log_keys(self.redis, keys)
+        except Exception as e:
+            logger.warning(f"Failed to log {len(keys)} pre-warmed key(s) for the bloom filter: {e}")
+
+    async def _fill_batch(self, family: str, batch: Dict[str, str]) -> None:
+        names = list(batch.values())
+        async with self.semaphore:
+            await self.rate_limiter.acquire()
+            self.stats["llm_calls"] += 1
+            written = []
+            try:
+                if family == SKILL_FAMILY:
+                    generated = await self.describe_fn(names, self.provider)
+                    by_norm = {normalize_text(name): desc for name, desc in generated.items()}
+                    for norm in batch:
+                        if by_norm.get(norm) and self._write(family, norm, {"description": by_norm[norm]}, batch[norm]):
+                            written.append(f"{family}:{norm}")
+                else:
+                    generated = await self.alt_names_fn(names, self.provider)
+                    by_norm = {normalize_text(item["name"]): item.get("alt_names", []) for item in generated}
+                    for norm in batch:
+                        if by_norm.get(norm) and self._write(family, norm, by_norm[norm], batch[norm]):
+                            written.append(f"{family}:{norm}")
+            except Exception as e:
+                self.stats["failed_batches"] += 1
+                logger.error(f"Pre-warm batch failed for {family} {names}: {e}")
+                return
+            finally:
+                self._log_written(written)
+        self.checkpoint.save()
+
+    async def fill(self, family: str, names: Iterable[str]) -> None:
+        """Generate and cache values for every entity of ``family`` that is not cached yet."""
+        pending = self._pending(family, names)
+        self.checkpoint.save()
+        items = list(pending.items())
+        batches = [dict(items[i:i + self.batch_size]) for i in range(0, len(items), self.batch_size)]
+        await asyncio.gather(*[self._fill_batch(family, batch) for batch in batches])
+
+    async def run(
+        self,
+        query_records: List[Dict[str, Any]],
+        skills: List[str],
+        locations: List[str],
+        include_roles: bool = False,
+    ) -> Dict[str, int]:
+        collected = await self.collect(query_records, include_roles=include_roles)
+        await asyncio.gather(
+            self.fill(SKILL_FAMILY, list(skills) + collected["skills"] + collected["roles"]),
+            self.fill(LOCATION_FAMILY, list(locations) + collected["locations"]),
+        )
+        return self.stats
+
+
+def build_prewarmer(args: argparse.Namespace) -> Prewarmer:
+    """Wire the pre-warmer to either the live providers/Redis or the offline mock/in-memory pair."""
+    if args.redis == "memory" or args.provider == "mock":
+        from memory_redis import InMemoryRedis
+        redis_client = InMemoryRedis()
+    else:
+        from config import redis_client
+
+    if args.provider == "mock":
+        mock = MockProvider()
+        describe_fn, alt_names_fn, extract_fn = mock.describe, mock.alt_names, mock.extract
+    else:
+        from hyde_logic import (
+            HydeReasoning,
+            get_chat_completion_description,
+            get_chat_completion_location_alt_names,
+        )
+        hyde = HydeReasoning(args.hyde_provider, args.provider)
+        describe_fn = get_chat_completion_description
+        alt_names_fn = get_chat_completion_location_alt_names
+        extract_fn = hyde._call_hyde_llm
+
+    return Prewarmer(
+        redis_client,
+        describe_fn,
+        alt_names_fn,
+        extract_fn=extract_fn,
+        provider=args.provider,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        rate_limiter=RateLimiter(args.rps),
+        checkpoint=Checkpoint(args.checkpoint),
+        force=args.force,
+        refresh_stale=args.refresh_stale,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm skill description and location alt-name caches")
+    parser.add_argument("--queries", help="Query corpus (JSONL or one query per line)")
+    parser.add_argument("--skills", help="File with one skill/role name per line")
+    parser.add_argument("--locations", help="File with one location name per line")
+    parser.add_argument("--roles", action="store_true", help="Also warm relatedRoles extracted from queries")
+    parser.add_argument("--provider", default="gemini", help="Description provider, or 'mock' for offline runs")
+    parser.add_argument("--hyde-provider", default="azure-gpt-4.1-mini", help="Provider for HyDE step 1")
+    parser.add_argument("--redis", choices=["upstash", "memory"], default="upstash")
+    parser.add_argument("--batch-size", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--rps", type=float, default=2.0, help="Max LLM calls started per second (0 = unlimited)")
+    parser.add_argument("--checkpoint", default="prewarm_checkpoint.json", help="Checkpoint file for resumable runs")
+    parser.add_argument("--force", action="store_true", help="Regenerate and overwrite keys that are already cached")
+    parser.add_argument("--refresh-stale", action="store_true",
+                        help="Also regenerate cached entries past their soft TTL or prompt version")
+    args = parser.parse_args()
+
+    if not (args.queries or args.skills or args.locations):
+        parser.error("provide at least one of --queries, --skills or --locations")
+
+    prewarmer = build_prewarmer(args)
+    start = time.time()
+    stats = asyncio.run(prewarmer.run(
+        load_query_records(args.queries) if args.queries else [],
+        load_names(args.skills) if args.skills else [],
+        load_names(args.locations) if args.locations else [],
+        include_roles=args.roles,
+    ))
+    stats["elapsed_seconds"] = round(time.time() - start, 2)
+    print(json.dumps(stats, indent=2))
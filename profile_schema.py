@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Registry of the profile fields that ``dbQueryDetails`` queries may target.
+
+The LLM picks ``dbQueryDetails.queries[].field`` freely, so it regularly produces names the
+profile collection does not have (``education.schoolName``, ``education.fieldOfStudy``,
+``accomplishments.Certificatons.certificateName``). The search stage then scans for a path
+that never exists and the query returns nothing. Every field is resolved here before the
+result is handed off:
+
+    1. exact canonical name
+    2. alias or naming variant (case, ``_``/``-``/camelCase differences are ignored)
+    3. close misspelling of a known name (difflib ratio >= ``FUZZY_CUTOFF``)
+
+Anything else is unknown and is dropped, or kept as-is with ``DB_FIELD_UNKNOWN_ACTION=keep``.
+Lookups go through a dict keyed by the folded name, and fuzzy matches are memoised, so a
+warm container resolves a field in a few microseconds.
+
+Usage:
+    python profile_schema.py list
+    python profile_schema.py resolve education.fieldOfStudy accomplishments.Certificatons.name
+"""
+
+import difflib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ProfileField:
+    name: str
+    description: str
+    aliases: Tuple[str, ...] = ()
+
+
+# Queryable fields of the profile collection (keep in sync with the Fetch lambda's indexes)
+FIELDS = (
+    ProfileField("education.school", "School or university name",
+                 ("education.schoolName", "education.institution", "education.university", "education.college",
+                  "school", "university")),
+    ProfileField("education.degree", "Degree name (B.Tech, MBA, PhD)",
+                 ("education.degreeName", "education.qualification", "degree")),
+    ProfileField("education.field_of_study", "Major / field of study",
+                 ("education.major", "education.fieldOfStudy", "education.specialization", "education.subject",
+                  "field_of_study", "major")),
+    ProfileField("education.dates", "Attendance period, e.g. '2019 - 2023'",
+                 ("education.graduationYear", "education.year", "education.duration", "graduation_year")),
+    ProfileField("education.description", "Free-text description of the programme",
+                 ("education.activities",)),
+    ProfileField("accomplishments.Certifications.certificateName", "Certification name",
+                 ("accomplishments.Certifications.name", "accomplishments.Certifications.title",
+                  "accomplishments.certifications", "certifications.name", "certifications", "certification")),
+    ProfileField("accomplishments.Certifications.issuer", "Issuing organisation of a certification",
+                 ("accomplishments.Certifications.authority", "accomplishments.Certifications.organization")),
+    ProfileField("accomplishments.Languages.language", "Spoken language",
+                 ("accomplishments.Languages.name", "accomplishments.languages", "languages.name", "languages",
+                  "language")),
+    ProfileField("accomplishments.Publications.title", "Publication title",
+                 ("accomplishments.Publications.name", "publications")),
+    ProfileField("accomplishments.Patents.title", "Patent title",
+                 ("accomplishments.Patents.name", "patents")),
+    ProfileField("accomplishments.Honors.title", "Honour or award title",
+                 ("accomplishments.Awards.title", "accomplishments.Honors.name", "awards", "honors")),
+    ProfileField("accomplishments.Courses.name", "Course name",
+                 ("accomplishments.Courses.title", "courses")),
+    ProfileField("accomplishments.Projects.title", "Project title",
+                 ("accomplishments.Projects.name", "projects")),
+    ProfileField("workExperience.title", "Job title",
+                 ("workExperience.jobTitle", "workExperience.role", "experience.title", "title", "job_title")),
+    ProfileField("workExperience.companyName", "Employer name",
+                 ("workExperience.company", "workExperience.organization", "experience.company", "company")),
+    ProfileField("workExperience.description", "Free-text role description",
+                 ("experience.description",)),
+    ProfileField("workExperience.dates", "Employment period",
+                 ("workExperience.duration", "experience.dates")),
+    ProfileField("linkedinHeadline", "Profile headline", ("headline", "linkedin_headline")),
+    ProfileField("bio", "About / summary section", ("about", "summary")),
+)
+
+FUZZY_CUTOFF = 0.85
+
+_FOLD = re.compile(r"[\s_\-]+")
+
+
+def _fold(name: str) -> str:
+    """Naming-insensitive lookup key: ``Education.Field_Of-Study`` -> ``education.fieldofstudy``."""
+    return _FOLD.sub("", name.strip()).casefold()
+
+
+def _build_index() -> Dict[str, str]:
+    index: Dict[str, str] = {}
+    for spec in FIELDS:
+        for name in (spec.name, *spec.aliases):
+            key = _fold(name)
+            if index.setdefault(key, spec.name) != spec.name:
+                raise ValueError(f"Profile field alias {name!r} is ambiguous")
+    return index
+
+
+_INDEX = _build_index()
+_KEYS = tuple(_INDEX)
+CANONICAL = frozenset(spec.name for spec in FIELDS)
+
+
+@lru_cache(maxsize=2048)
+def _fuzzy(key: str) -> Optional[str]:
+    match = difflib.get_close_matches(key, _KEYS, n=1, cutoff=FUZZY_CUTOFF)
+    return _INDEX[match[0]] if match else None
+
+
+def resolve(field_name: str) -> Tuple[Optional[str], str]:
+    """
+    Return ``(canonical_name, how)`` where ``how`` is ``valid``, ``mapped`` or ``unknown``
+    (``canonical_name`` is ``None`` for unknown fields).
+    """
+    if field_name in CANONICAL:
+        return field_name, "valid"
+    key = _fold(field_name)
+    canonical = _INDEX.get(key) or _fuzzy(key)
+    if canonical is None:
+        return None, "unknown"
+    return canonical, "mapped"
+
+
+def validate_db_queries(section, issues, keep_unknown: bool = False) -> Dict[str, int]:
+    """
+    Resolve the field of every ``hyde_models.DbQuery`` in ``section`` in place, dropping
+    (or with ``keep_unknown`` keeping) unknown ones. Repairs are recorded in ``issues``.
+    Returns ``{"valid": n, "mapped": n, "dropped": n, "unknown": n}`` for metrics.
+    """
+    counts = {"valid": 0, "mapped": 0, "dropped": 0, "unknown": 0}
+    kept = []
+    for i, query in enumerate(section.items):
+        path = (("dbQueryDetails", "queries"), i)
+        canonical, how = resolve(query.field)
+        counts[how] += 1
+        if how == "mapped":
+            issues.note(path, f"mapped field {query.field!r} to {canonical!r}")
+            query.field = canonical
+        elif how == "unknown":
+            if not keep_unknown:
+                issues.note(path, f"unknown field {query.field!r}; dropped")
+                counts["dropped"] += 1
+                continue
+            issues.note(path, f"unknown field {query.field!r}; kept")
+        kept.append(query)
+    section.items = kept
+    if section.enabled and not kept:
+        issues.note("dbBasedQuery", "no queryable fields left; disabled")
+        section.enabled = 0
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Inspect the queryable profile field registry")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List canonical fields and their aliases")
+    resolve_parser = sub.add_parser("resolve", help="Resolve field names as the validator would")
+    resolve_parser.add_argument("names", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for spec in FIELDS:
+            print(f"{spec.name:<50} {spec.description}")
+            if spec.aliases:
+                print(f"{'':<50} aliases: {', '.join(spec.aliases)}")
+    else:
+        for name in args.names:
+            t0 = time.perf_counter()
+            canonical, how = resolve(name)
+            cold = (time.perf_counter() - t0) * 1e6
+            t0 = time.perf_counter()
+            resolve(name)
+            warm = (time.perf_counter() - t0) * 1e6
+            print(f"{name:<50} -> {canonical or '-':<50} {how:<8} ({cold:.1f} us cold, {warm:.1f} us warm)")
@@ -0,0 +1,71 @@
+dimension_header = """You are HyDE (Hypothetical Document Extractor), a query analyzer for talent search. Extract ONE kind of search criteria from the query below; other parts of the query are handled separately, so ignore them.
+
+Today's date is {{current_date}}.
+
+<query>{{query}}</query>
+
+Temporal values (per item): "current" (currently, working at, present tense), "past" (previously, former, ex-, used to), "any" (default; "have been", "have worked", no temporal context).
+
+"""
+
+dimension_footer = """
+
+If the query contains nothing for this dimension, set the flag to 0 and return an empty list. Output only the JSON object, with no commentary."""
+
+location_message = dimension_header + """# TASK: LOCATIONS
+Extract the geographic locations candidates must be in.
+- Cities: "San Francisco", "Bangalore"
+- Regions: expand to cities ("Bay Area" -> San Francisco, Oakland, San Jose, Palo Alto; "Silicon Valley" -> San Francisco, Palo Alto, Mountain View, Cupertino)
+- "blr"/"Bangalore" -> Bangalore, Bengaluru
+- States only when explicitly mentioned
+- Operator is OR unless the query explicitly requires several locations together
+
+# OUTPUT
+{"regionBasedQuery": 0, "locationDetails": {"operator": "OR", "locations": [{"name": "City Name"}]}}""" + dimension_footer
+
+organisation_message = dimension_header + """# TASK: NAMED ORGANISATIONS
+Extract specific companies candidates work or worked at.
+- Named companies: "Google", "Tesla", "SpaceX"
+- Company groups: "FAANG" -> the individual companies
+- NOT company types or industries ("startups", "fintech companies") and NOT schools or universities
+- Give each organisation 1-3 common aliases ("Facebook" -> "Meta", "Meta Platforms, Inc.")
+- Operator is OR for alternatives and groups, AND only for an explicit "both"
+
+# OUTPUT
+{"organisationBasedQuery": 0, "organisationDetails": {"operator": "OR", "organizations": [{"name": "Company Name", "temporal": "any", "aliases": ["Alias1"]}]}}""" + dimension_footer
+
+sector_message = dimension_header + """# TASK: SECTORS AND COMPANY STAGES
+Extract industries and company types.
+- Industries: "fintech", "healthcare", "e-commerce"
+- Company stages: "startup", "series A", "enterprise"
+- "X startup" is TWO sectors (the X industry and the Startup stage) with operator AND
+- Add companyStage for size/stage mentions: Seed 1-20, Series A 20-100, Series B 100-500, Startup 1-100, Enterprise 1000+
+- Give each sector a few matching keywords
+
+# OUTPUT
+{"sectorBasedQuery": 0, "sectorDetails": {"operator": "OR", "sectors": [{"name": "Sector Name", "temporal": "any", "keywords": ["keyword1"], "companyStage": {"enabled": true, "sizeRange": {"min": 20, "max": 100}}}]}}
+(companyStage is optional)""" + dimension_footer
+
+skill_message = dimension_header + """# TASK: SKILLS AND ROLES
+Extract job titles, technical skills and professional capabilities.
+- Exact titles (C-level, specific positions): titleKeywords, e.g. ["cto", "chief technology officer"]
+- Flexible role matching: regexPatterns whose fields ALWAYS include "workExperience.title" and "linkedinHeadline"
+- Skills (not roles): regexPatterns over "workExperience.description", "bio", "education.description"
+- relatedRoles is a SIMPLE STRING ARRAY
+- priority: primary (asked for directly), secondary (closely related), tertiary (rarely)
+- Operator AND for different domains required together, OR for listed alternatives
+- Set temporal only together with titleKeywords
+
+# OUTPUT
+{"skillBasedQuery": 0, "skillDetails": {"operator": "AND", "skills": [{"name": "Skill Name", "priority": "primary", "temporal": "any", "relatedRoles": ["Role1"], "titleKeywords": ["title1"], "regexPatterns": {"keywords": ["keyword1"], "fields": ["workExperience.title", "linkedinHeadline"]}}]}}""" + dimension_footer
+
+db_message = dimension_header + """# TASK: STRUCTURED PROFILE FIELDS
+Extract criteria on structured profile data only:
+- Education: dates, degrees, schools, field of study (education.dates, education.degree, education.school, education.field_of_study)
+- Certifications: accomplishments.Certifications.certificateName
+- Languages: accomplishments.Languages.language
+- Graduation timing ("graduated X years ago", "still in college") as a regex over education.dates relative to today's date
+- NOT job titles, work descriptions, company names or demographics
+
+# OUTPUT
+{"dbBasedQuery": 0, "dbQueryDetails": {"operator": "AND", "queries": [{"field": "education.dates", "regex": ".*2023.*", "description": "Graduated in 2023"}]}}""" + dimension_footer
@@ -591,3 +591,37 @@ IMPORTANT: You don't specify AND/OR between sectors and organizations - only set
 }
 
 REMEMBER: Be concise, accurate, and consistent. Focus on extracting searchable criteria, not expanding unnecessarily and make sure output is in json format."""
+
+
+# Lean output variant: same instructions, compact response (expanded locally by hyde_lean)
+leanOutputTemplate = """# OUTPUT TEMPLATE (COMPACT)
+
+Output ONLY the criteria, in this compact form. Omit every list that would be empty, and omit
+any field whose value is the default:
+- no query_breakdown, no analysis, no *BasedQuery flags (a present list means the dimension is used)
+- "temporal" only when it is not "any"; "priority" only when it is not "primary"
+- "operators" only for lists whose operator differs from the default
+  (locations OR, organizations OR, sectors AND, skills AND, queries AND)
+- skills: put regex keywords in "keywords" and say which profile fields they match with "match":
+  "role" (workExperience.title, linkedinHeadline), "skill" (workExperience.description, bio,
+  education.description); omit "match" for both role and description fields
+- companyStage is just {"min": .., "max": ..}
+
+{
+  "locations": ["City Name"],
+  "organizations": [{"name": "Company Name", "temporal": "past", "aliases": ["Alias1"]}],
+  "sectors": [{"name": "Sector Name", "keywords": ["keyword1"], "companyStage": {"min": 20, "max": 100}}],
+  "skills": [{
+    "name": "Skill Name",
+    "relatedRoles": ["Role1", "Role2"],
+    "titleKeywords": ["title1"],
+    "keywords": ["keyword1", "keyword2"],
+    "match": "role"
+  }],
+  "queries": [{"field": "education.dates", "regex": ".*2023.*"}],
+  "operators": {"sectors": "OR"}
+}
+
+REMEMBER: Be concise, accurate, and consistent. Output only the compact JSON object."""
+
+messageKeywordLean = messageKeyword.split("# OUTPUT TEMPLATE")[0] + leanOutputTemplate
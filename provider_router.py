@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Step-1 provider routing by query complexity.
+
+``hyde_provider`` used to be fixed per request, and the lambda default (``groq_llama``) was not
+a MODEL_CONFIGS key, so ``get_completion`` failed and the request got the fallback structure.
+Two things live here:
+
+    resolve(name)   a MODEL_CONFIGS key for any provider name: exact key, known alias,
+                    case/separator-insensitive key or model id (``gpt-4o``), close spelling,
+                    else HYDE_DEFAULT_PROVIDER
+    choose(query)   a provider from HYDE_ROUTER_TIERS (simplest to most complex queries)
+
+``complexity`` is a small logistic model over features of the query: word count, entities
+(lexicon matches plus unrecognised words), temporal phrases and boolean structure. The score
+picks the starting tier. Per-provider stats from the ``step1`` metrics hashes then adjust
+the choice. Each provider records ``{provider}_calls``, ``{provider}_ms`` and
+``{provider}_rejected`` there, where rejected means the output failed the cascade acceptance
+check. A tier rejected more than MAX_REJECT_RATE of the time hands over to the next one, and
+a stronger tier that is measurably faster with no worse quality takes over. The stats are
+reloaded in the background every STATS_REFRESH_SECONDS.
+
+Usage:
+    python provider_router.py score "ex-google ml engineers in bangalore with 5+ years, not at startups"
+    python provider_router.py resolve groq_llama gpt-4o Gemini
+    python provider_router.py stats --hours 24
+"""
+
+import asyncio
+import difflib
+import math
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from logging_config import setup_logger
+import background_tasks
+from cache_metrics import STEP1, metrics as cache_metrics, report
+from config import HYDE_DEFAULT_PROVIDER, HYDE_ROUTER_TIERS
+from model_config import MODEL_CONFIGS
+from utils import normalize_text
+import query_lexicon
+
+logger = setup_logger(__name__)
+
+# Names that used to be valid (or are commonly used) but are not MODEL_CONFIGS keys
+ALIASES = {
+    # The old lambda default; its Llama config is gone and groq_oss is the Groq model of that class
+    "groq_llama": "groq_oss",
+}
+
+TEMPORAL_WORDS = frozenset({
+    "years", "year", "yrs", "months", "month", "since", "before", "after", "until", "ago",
+    "recently", "recent", "between", "during", "later", "earlier",
+})
+BOOLEAN_WORDS = frozenset({
+    "and", "or", "not", "no", "without", "except", "excluding", "exclude", "but", "either",
+    "neither", "nor", "unless", "also",
+})
+
+# Logistic weights per feature; the bias puts a short single-entity query well under 1/3
+WEIGHTS = {
+    "words": 0.08,
+    "entities": 0.35,
+    "unknown": 0.25,
+    "temporal": 0.6,
+    "boolean": 0.7,
+    "blockers": 0.4,
+}
+BIAS = -2.5
+
+# Learned adjustments need this many calls in the window
+MIN_CALLS = 20
+MAX_REJECT_RATE = 0.2
+STATS_HOURS = 24
+STATS_REFRESH_SECONDS = 300
+
+
+def _fold(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+@lru_cache(maxsize=1)
+def _folded_names() -> Dict[str, str]:
+    """Folded provider names, then folded model ids (full and without the ``prefix/``), to keys."""
+    folded: Dict[str, str] = {}
+    for provider in MODEL_CONFIGS:
+        folded.setdefault(_fold(provider), provider)
+    for provider, config in MODEL_CONFIGS.items():
+        model = str(config.get("model", ""))
+        for form in (model, model.rsplit("/", 1)[-1]):
+            if form:
+                folded.setdefault(_fold(form), provider)
+    return folded
+
+
+@lru_cache(maxsize=256)
+def resolve(name: Optional[str], default: str = HYDE_DEFAULT_PROVIDER) -> str:
+    """The MODEL_CONFIGS key for ``name`` (``default`` if nothing is close enough)."""
+    if name in MODEL_CONFIGS:
+        return name
+    if not isinstance(name, str) or not name.strip():
+        return default if default in MODEL_CONFIGS else next(iter(MODEL_CONFIGS))
+    folded = _folded_names()
+    key = _fold(name)
+    resolved = ALIASES.get(name.strip().lower()) or folded.get(key)
+    if resolved is None:
+        close = difflib.get_close_matches(key, list(folded), n=1, cutoff=0.85)
+        resolved = folded[close[0]] if close else None
+    if resolved is None:
+        resolved = default if default in MODEL_CONFIGS else next(iter(MODEL_CONFIGS))
+        logger.warning(f"Unknown provider {name!r}; using {resolved}")
+    else:
+        logger.info(f"Resolved provider {name!r} to {resolved}")
+    return resolved
+
+
+def features(query: str) -> Dict[str, int]:
+    tokens = normalize_text(query).split()
+    matches, unknown, blockers = query_lexicon.scan(query)
+    temporal_words = (query_lexicon.PAST | query_lexicon.ANY | TEMPORAL_WORDS
+                      | (query_lexicon.CURRENT - {"at", "working", "works"}))
+    return {
+        "words": len(tokens),
+        "entities": len(matches) + len(unknown),
+        "unknown": len(unknown),
+        "temporal": sum(token in temporal_words or any(c.isdigit() for c in token) for token in tokens),
+        "boolean": sum(token in BOOLEAN_WORDS for token in tokens),
+        "blockers": len(blockers),
+    }
+
+
+def complexity(query: str) -> float:
+    """Probability-like score in (0, 1); higher means the query needs a stronger model."""
+    values = features(query)
+    z = BIAS + sum(weight * values[name] for name, weight in WEIGHTS.items())
+    return 1 / (1 + math.exp(-z))
+
+
+@lru_cache(maxsize=1)
+def tiers() -> List[str]:
+    return list(dict.fromkeys(resolve(provider) for provider in HYDE_ROUTER_TIERS))
+
+
+def provider_stats(totals: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Calls, mean latency and reject rate per provider from ``step1`` counter totals."""
+    stats = {}
+    for provider in MODEL_CONFIGS:
+        calls = int(totals.get(f"{provider}_calls") or 0)
+        if calls:
+            stats[provider] = {
+                "calls": calls,
+                "ms": int(totals.get(f"{provider}_ms") or 0) / calls,
+                "reject_rate": int(totals.get(f"{provider}_rejected") or 0) / calls,
+            }
+    return stats
+
+
+def load_stats(redis: Any, hours: int = STATS_HOURS) -> Dict[str, Dict[str, float]]:
+    return provider_stats(report(redis, [STEP1], hours)[STEP1]["totals"])
+
+
+_stats: Dict[str, Dict[str, float]] = {}
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def learned_stats(redis: Any) -> Dict[str, Dict[str, float]]:
+    """The last loaded stats; schedules a background reload when they are older than STATS_REFRESH_SECONDS."""
+    global _loaded_at
+    if time.monotonic() - _loaded_at > STATS_REFRESH_SECONDS:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:  # no running loop (CLI use)
+            return _stats
+        # Claimed before loading: a failed load is retried after STATS_REFRESH_SECONDS, not per query
+        _loaded_at = time.monotonic()
+
+        def _run() -> None:
+            global _stats
+            try:
+                loaded = load_stats(redis)
+            except Exception as e:
+                logger.warning(f"Failed to load provider stats: {e}")
+                return
+            with _lock:
+                _stats = loaded
+
+        background_tasks.schedule("provider_router_stats", asyncio.to_thread(_run))
+    with _lock:
+        return _stats
+
+
+def pick(score: float, stats: Dict[str, Dict[str, float]]) -> str:
+    """The tier for ``score``, adjusted by ``stats`` (see the module docstring)."""
+    options = tiers()
+    if not options:
+        return resolve(HYDE_DEFAULT_PROVIDER)
+    start = min(int(score * len(options)), len(options) - 1)
+
+    def _measured(provider: str) -> bool:
+        return stats.get(provider, {}).get("calls", 0) >= MIN_CALLS
+
+    candidates = [p for p in options[start:]
+                  if not _measured(p) or stats[p]["reject_rate"] <= MAX_REJECT_RATE] or options[-1:]
+    chosen = candidates[0]
+    if _measured(chosen):
+        fastest = min((p for p in candidates if _measured(p)), key=lambda p: stats[p]["ms"])
+        if stats[fastest]["reject_rate"] <= stats[chosen]["reject_rate"]:
+            chosen = fastest
+    return chosen
+
+
+def choose(query: str, redis: Any) -> Tuple[str, float]:
+    """Step-1 provider for ``query`` and its complexity score."""
+    score = complexity(query)
+    provider = pick(score, learned_stats(redis))
+    if provider != pick(score, {}):
+        cache_metrics.incr(STEP1, "router_adjusted")
+    cache_metrics.incr(STEP1, "routed")
+    logger.info(f"Routed step 1 to {provider} (complexity {score:.2f})")
+    return provider, score
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Inspect step-1 provider routing")
+    sub = parser.add_subparsers(dest="command", required=True)
+    score_parser = sub.add_parser("score", help="Complexity features, score and tier per query")
+    score_parser.add_argument("queries", nargs="+")
+    resolve_parser = sub.add_parser("resolve", help="MODEL_CONFIGS key for provider names")
+    resolve_parser.add_argument("names", nargs="+")
+    stats_parser = sub.add_parser("stats", help="Learned per-provider stats")
+    stats_parser.add_argument("--hours", type=int, default=STATS_HOURS)
+    args = parser.parse_args()
+
+    if args.command == "score":
+        for query in args.queries:
+            score = complexity(query)
+            print(json.dumps({"query": query, "features": features(query), "complexity": round(score, 3),
+                              "provider": pick(score, {})}))
+    elif args.command == "resolve":
+        for name in args.names:
+            print(f"{name:<30} -> {resolve(name)}")
+    else:
+        from config import redis_client
+
+        print(json.dumps(load_stats(redis_client, args.hours), indent=2))
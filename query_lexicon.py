@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Deterministic HyDE step 1 for simple queries.
+
+A large share of production queries are plain lists of known entities ("python developers
+in berlin", "ex-google PMs"). Sending them through the full ``logicalHyde`` prompt costs a
+second or more for a result that a dictionary lookup can produce. This module matches the
+query against skill, role, organisation and location lexicons and builds the same step-1
+JSON the LLM would return, with every query token either covered by a lexicon term or a
+known filler word (``in``, ``at``, ``people``, ...).
+
+``analyse`` returns the result together with a confidence: the share of query tokens that
+were accounted for. Negations and other constructs the lexicons cannot express ("not",
+"without", "graduated", numbers) force the confidence to 0, as does boolean structure that
+one operator per section cannot express ("java or python developers"). ``HydeReasoning`` uses the
+result only at or above ``FAST_PATH_MIN_CONFIDENCE`` and otherwise falls back to the LLM.
+
+Matching is a greedy longest-first scan over a dict keyed by token tuples, so it is
+linear in the query length whatever the lexicon size.
+
+Usage:
+    python query_lexicon.py analyse "ex-google PMs in bangalore"
+    python query_lexicon.py coverage queries.txt --threshold 0.9
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import normalize_text
+
+SKILL = "skill"
+ROLE = "role"
+ORGANISATION = "organisation"
+LOCATION = "location"
+
+# Fields the prompt prescribes for role and skill regexPatterns
+ROLE_FIELDS = ["workExperience.title", "linkedinHeadline"]
+SKILL_FIELDS = ["workExperience.description", "bio", "education.description"]
+# Keywords up to this length match inside other words ("ai" in "email"), so they are
+# emitted word-anchored the way the prompt writes them (\bml\b)
+ANCHOR_MAX_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class Term:
+    kind: str
+    name: str
+    # Extra surface forms matched in queries (the name itself always matches)
+    forms: Tuple[str, ...] = ()
+    # regexPatterns keywords (skills, roles) or aliases (organisations)
+    keywords: Tuple[str, ...] = ()
+    # Roles matched exactly on titles (C-level) emit titleKeywords instead of regexPatterns
+    exact_title: bool = False
+    related: Tuple[str, ...] = ()
+    # Groups and regions: the names that are emitted instead of ``name``
+    expands: Tuple[str, ...] = ()
+
+
+SKILLS = (
+    Term(SKILL, "Python", keywords=("python", "django", "flask", "fastapi")),
+    Term(SKILL, "Java", keywords=("java", "spring boot", "j2ee")),
+    Term(SKILL, "JavaScript", ("js",), keywords=("javascript", "node.js", "typescript")),
+    Term(SKILL, "TypeScript", ("ts",), keywords=("typescript",)),
+    Term(SKILL, "React", ("reactjs", "react js", "react.js"), keywords=("react", "react.js", "reactjs")),
+    Term(SKILL, "Node.js", ("node", "nodejs", "node js"), keywords=("node.js", "nodejs", "express")),
+    Term(SKILL, "Golang", ("go lang",), keywords=("golang", "go developer")),
+    Term(SKILL, "Rust", keywords=("rust",)),
+    Term(SKILL, "Kotlin", keywords=("kotlin",)),
+    Term(SKILL, "Swift", keywords=("swift", "ios")),
+    Term(SKILL, "Flutter", keywords=("flutter", "dart")),
+    Term(SKILL, "SQL", keywords=("sql", "postgres", "mysql")),
+    Term(SKILL, "AWS", ("amazon web services",), keywords=("aws", "amazon web services")),
+    Term(SKILL, "Kubernetes", ("k8s",), keywords=("kubernetes", "k8s")),
+    Term(SKILL, "Docker", keywords=("docker", "containers")),
+    Term(SKILL, "Machine Learning", ("ml",), keywords=("machine learning", "ml", "deep learning")),
+    Term(SKILL, "Artificial Intelligence", ("ai",), keywords=("artificial intelligence", "ai", "genai")),
+    Term(SKILL, "Data Science", keywords=("data science", "data scientist")),
+    Term(SKILL, "Computer Vision", ("cv",), keywords=("computer vision", "image recognition")),
+    Term(SKILL, "Natural Language Processing", ("nlp",), keywords=("nlp", "natural language processing")),
+    Term(SKILL, "Blockchain", ("web3", "crypto"), keywords=("blockchain", "web3", "solidity")),
+    Term(SKILL, "DevOps", keywords=("devops", "ci/cd", "terraform")),
+    Term(SKILL, "Cybersecurity", ("security", "infosec"), keywords=("security", "cybersecurity", "infosec")),
+    Term(SKILL, "UI/UX Design", ("ux", "ui", "ui ux", "design"), keywords=("ux", "ui/ux", "user experience")),
+    Term(SKILL, "Growth Marketing", ("growth",), keywords=("growth", "growth marketing")),
+    Term(SKILL, "Sales", keywords=("sales", "business development")),
+)
+
+ROLES = (
+    Term(ROLE, "Software Developer", ("developer", "dev", "software engineer", "engineer", "programmer", "coder",
+                                      "sde", "swe"),
+         keywords=("developer", "engineer", "programmer", "sde"),
+         related=("Software Engineer", "Backend Developer", "Full Stack Developer")),
+    Term(ROLE, "Backend Developer", ("backend developer", "backend engineer", "back end developer"),
+         keywords=("backend", "back-end"), related=("Software Engineer", "API Developer")),
+    Term(ROLE, "Frontend Developer", ("frontend developer", "frontend engineer", "front end developer"),
+         keywords=("frontend", "front-end"), related=("UI Engineer", "Web Developer")),
+    Term(ROLE, "Full Stack Developer", ("full stack developer", "fullstack developer", "full stack engineer"),
+         keywords=("full stack", "fullstack"), related=("Software Engineer", "Web Developer")),
+    Term(ROLE, "Data Scientist", keywords=("data scientist",), related=("Machine Learning Engineer", "Data Analyst")),
+    Term(ROLE, "Data Engineer", keywords=("data engineer",), related=("Analytics Engineer", "Backend Developer")),
+    Term(ROLE, "Data Analyst", ("analyst",), keywords=("data analyst", "business analyst"),
+         related=("Business Analyst", "Data Scientist")),
+    Term(ROLE, "Machine Learning Engineer", ("ml engineer", "mle"), keywords=("machine learning engineer", "ml engineer"),
+         related=("Data Scientist", "AI Engineer")),
+    Term(ROLE, "Product Manager", ("pm", "product management"), keywords=("product manager", "product owner"),
+         related=("Product Owner", "Program Manager")),
+    Term(ROLE, "Designer", ("product designer", "ux designer", "ui designer"), keywords=("designer",),
+         related=("UX Designer", "Product Designer")),
+    Term(ROLE, "Engineering Manager", ("em",), keywords=("engineering manager",),
+         related=("Tech Lead", "Director of Engineering")),
+    Term(ROLE, "Founder", ("founder", "cofounder", "co founder", "entrepreneur"), keywords=("founder", "co-founder"),
+         related=("CEO", "Entrepreneur")),
+    Term(ROLE, "Recruiter", ("talent acquisition",), keywords=("recruiter", "talent acquisition"),
+         related=("HR Manager", "Talent Partner")),
+    Term(ROLE, "Marketer", ("marketing",), keywords=("marketing", "marketer"),
+         related=("Growth Manager", "Brand Manager")),
+    Term(ROLE, "CTO", ("chief technology officer",), keywords=("cto", "chief technology officer"), exact_title=True),
+    Term(ROLE, "CEO", ("chief executive officer",), keywords=("ceo", "chief executive officer"), exact_title=True),
+    Term(ROLE, "CFO", ("chief financial officer",), keywords=("cfo", "chief financial officer"), exact_title=True),
+    Term(ROLE, "COO", ("chief operating officer",), keywords=("coo", "chief operating officer"), exact_title=True),
+    Term(ROLE, "CPO", ("chief product officer",), keywords=("cpo", "chief product officer"), exact_title=True),
+    Term(ROLE, "VP Engineering", ("vp engineering", "vp of engineering", "vice president engineering"),
+         keywords=("vp engineering", "vp of engineering", "vice president of engineering"), exact_title=True),
+)
+
+ORGANISATIONS = (
+    Term(ORGANISATION, "Google", keywords=("Alphabet", "Google LLC")),
+    Term(ORGANISATION, "Meta", ("facebook", "fb"), keywords=("Facebook", "Meta Platforms, Inc.")),
+    Term(ORGANISATION, "Amazon", keywords=("Amazon.com", "AWS")),
+    Term(ORGANISATION, "Apple", keywords=("Apple Inc.",)),
+    Term(ORGANISATION, "Netflix", keywords=("Netflix, Inc.",)),
+    Term(ORGANISATION, "Microsoft", ("msft",), keywords=("Microsoft Corporation",)),
+    Term(ORGANISATION, "OpenAI", ("open ai",), keywords=("OpenAI, Inc.",)),
+    Term(ORGANISATION, "Anthropic", keywords=("Anthropic PBC",)),
+    Term(ORGANISATION, "Uber", keywords=("Uber Technologies",)),
+    Term(ORGANISATION, "Stripe", keywords=("Stripe, Inc.",)),
+    Term(ORGANISATION, "Tesla", keywords=("Tesla Motors",)),
+    Term(ORGANISATION, "SpaceX", ("space x",), keywords=("Space Exploration Technologies",)),
+    Term(ORGANISATION, "Flipkart", keywords=("Flipkart Internet",)),
+    Term(ORGANISATION, "Swiggy", keywords=("Bundl Technologies",)),
+    Term(ORGANISATION, "Zomato", keywords=("Eternal",)),
+    Term(ORGANISATION, "Razorpay", keywords=("Razorpay Software",)),
+    Term(ORGANISATION, "Infosys", keywords=("Infosys Limited",)),
+    Term(ORGANISATION, "TCS", ("tata consultancy services",), keywords=("Tata Consultancy Services",)),
+    Term(ORGANISATION, "McKinsey", ("mckinsey and company",), keywords=("McKinsey & Company",)),
+    Term(ORGANISATION, "Goldman Sachs", ("goldman",), keywords=("Goldman Sachs Group",)),
+    Term(ORGANISATION, "FAANG", ("maang",), expands=("Meta", "Amazon", "Apple", "Netflix", "Google")),
+)
+
+LOCATIONS = (
+    Term(LOCATION, "Bangalore", ("blr", "bengaluru", "bangalore"), expands=("Bangalore", "Bengaluru")),
+    Term(LOCATION, "Mumbai", ("bombay",)),
+    Term(LOCATION, "Delhi", ("new delhi",), expands=("Delhi", "New Delhi")),
+    Term(LOCATION, "Delhi NCR", ("ncr",), expands=("Delhi", "Gurgaon", "Noida")),
+    Term(LOCATION, "Gurgaon", ("gurugram",), expands=("Gurgaon", "Gurugram")),
+    Term(LOCATION, "Noida"),
+    Term(LOCATION, "Hyderabad", ("hyd",)),
+    Term(LOCATION, "Chennai", ("madras",)),
+    Term(LOCATION, "Pune"),
+    Term(LOCATION, "Kolkata", ("calcutta",)),
+    Term(LOCATION, "San Francisco", ("sf",)),
+    Term(LOCATION, "Bay Area", ("sf bay area", "silicon valley"),
+         expands=("San Francisco", "Oakland", "San Jose", "Palo Alto")),
+    Term(LOCATION, "New York", ("nyc", "new york city"), expands=("New York City",)),
+    Term(LOCATION, "Seattle"),
+    Term(LOCATION, "Austin"),
+    Term(LOCATION, "Boston"),
+    Term(LOCATION, "London"),
+    Term(LOCATION, "Berlin"),
+    Term(LOCATION, "Munich", ("munchen",)),
+    Term(LOCATION, "Paris"),
+    Term(LOCATION, "Amsterdam"),
+    Term(LOCATION, "Dublin"),
+    Term(LOCATION, "Singapore"),
+    Term(LOCATION, "Dubai"),
+    Term(LOCATION, "Toronto"),
+    Term(LOCATION, "Sydney"),
+)
+
+# Words that carry no criteria of their own
+FILLER = frozenset("""
+    a an the of for in at from with and or who whose is are was were be been has have had
+    people person persons profiles profile candidates candidate folks professionals talent
+    someone anyone find show me get list search looking look all any some
+    based located living work experience experienced background
+    company companies firm firms
+""".split())
+
+# Temporal markers apply to the next organisation or role
+PAST = frozenset({"ex", "former", "formerly", "previously", "past", "alumni", "alumnus", "alum"})
+CURRENT = frozenset({"currently", "current", "now", "presently", "at", "working", "works"})
+# "have worked at" is not a claim about the present ("any" also keeps a following "at" neutral)
+ANY = frozenset({"worked"})
+
+# Connectives between entities; they decide the section operators (see _operators)
+CONNECTIVES = frozenset({"and", "or"})
+
+# Constructs the lexicons cannot express: the LLM has to handle the query
+BLOCKERS = frozenset("""
+    not no without except excluding exclude but than more less least most over under
+    years year months month graduated graduating graduate students student batch
+    connected connections network similar like top best senior junior lead principal intern interns
+    before after since until between whom which
+""".split())
+
+
+def _forms(term: Term) -> List[str]:
+    forms = [term.name, *term.forms]
+    if term.kind == ROLE:
+        # Plural role nouns: "developers", "pms", "ctos"
+        forms += [f"{form}s" for form in forms]
+    return forms
+
+
+def _build_index() -> Tuple[Dict[Tuple[str, ...], Term], int]:
+    index: Dict[Tuple[str, ...], Term] = {}
+    for term in (*SKILLS, *ROLES, *ORGANISATIONS, *LOCATIONS):
+        for form in _forms(term):
+            key = tuple(normalize_text(form).split())
+            if key and index.setdefault(key, term) is not term:
+                raise ValueError(f"Lexicon form {form!r} is ambiguous")
+    return index, max(len(key) for key in index)
+
+
+_INDEX, _LONGEST = _build_index()
+
+
+def names(kind: str) -> List[str]:
+    """Entity names emitted for a lexicon kind (used to seed ``speculation``)."""
+    terms = {SKILL: SKILLS, ROLE: ROLES, ORGANISATION: ORGANISATIONS, LOCATION: LOCATIONS}[kind]
+    return [name for term in terms for name in (term.expands or (term.name,))]
+
+
+def _scan(tokens: List[str]) -> Tuple[List[Tuple[Term, Optional[str]]], List[str], List[str], List[Optional[str]]]:
+    """``scan`` plus the connective ("and"/"or") between each match and the one before it."""
+    matches: List[Tuple[Term, Optional[str]]] = []
+    unknown: List[str] = []
+    blockers: List[str] = []
+    links: List[Optional[str]] = []
+    temporal = None
+    connective = None
+    i = 0
+    while i < len(tokens):
+        for n in range(min(_LONGEST, len(tokens) - i), 0, -1):
+            term = _INDEX.get(tuple(tokens[i:i + n]))
+            if term is not None:
+                matches.append((term, temporal))
+                links.append(connective if len(matches) > 1 else None)
+                temporal = connective = None
+                i += n
+                break
+        else:
+            token = tokens[i]
+            if token in CONNECTIVES:
+                connective = token
+            if token in PAST:
+                temporal = "past"
+            elif token in ANY:
+                temporal = "any"
+            elif token in CURRENT:
+                temporal = temporal or "current"
+            elif token in BLOCKERS or token.isdigit():
+                blockers.append(token)
+            elif token not in FILLER:
+                unknown.append(token)
+            i += 1
+    return matches, unknown, blockers, links
+
+
+def scan(query: str) -> Tuple[List[Tuple[Term, Optional[str]]], List[str], List[str]]:
+    """
+    Greedy longest-first match of ``query`` against the lexicons.
+    Returns ``(matches, unknown_tokens, blockers)``; each match carries the temporal marker
+    ("past"/"current") that preceded it, if any.
+    """
+    matches, unknown, blockers, _ = _scan(normalize_text(query).split())
+    return matches, unknown, blockers
+
+
+def _operators(matches: List[Tuple[Term, Optional[str]]], links: List[Optional[str]]) -> Optional[Dict[str, str]]:
+    """
+    Operator per section from the connectives between its entities, or ``None`` when the
+    boolean structure is beyond a single operator per section: "or" between entities of
+    different sections ("google or python"), both "and" and "or" in one section, or an "or"
+    that joins only some of a section's entities ("java or python developers" is
+    (Java OR Python) AND Developer). Locations are always OR.
+    """
+    section_of = {SKILL: SKILL, ROLE: SKILL, ORGANISATION: ORGANISATION, LOCATION: LOCATION}
+    sections = [section_of[term.kind] for term, _ in matches]
+    for k in range(1, len(matches)):
+        if links[k] == "or" and sections[k] != sections[k - 1]:
+            return None
+    operators = {LOCATION: "OR"}
+    for section, default in ((SKILL, "AND"), (ORGANISATION, "OR")):
+        positions = [k for k, name in enumerate(sections) if name == section]
+        joined = {links[k] for k in positions[1:] if sections[k - 1] == section and links[k]}
+        if len(joined) > 1:
+            return None
+        if joined == {"or"}:
+            # Every entity of the section must be in one "a or b or c" run
+            if any(links[k] != "or" or sections[k - 1] != section for k in positions[1:]):
+                return None
+            operators[section] = "OR"
+        else:
+            operators[section] = "AND" if joined == {"and"} else default
+    return operators
+
+
+def _keyword_pattern(keyword: str) -> str:
+    if len(keyword) <= ANCHOR_MAX_LENGTH and keyword.isalnum():
+        return rf"\b{keyword}\b"
+    return keyword
+
+
+def _skill_entry(term: Term, temporal: Optional[str]) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"name": term.name, "priority": "primary"}
+    if term.kind == ROLE and term.exact_title:
+        entry["temporal"] = temporal or "any"
+        entry["titleKeywords"] = list(term.keywords)
+    else:
+        fields = ROLE_FIELDS if term.kind == ROLE else SKILL_FIELDS
+        keywords = [_keyword_pattern(keyword) for keyword in term.keywords or (term.name.lower(),)]
+        entry["regexPatterns"] = {"keywords": keywords, "fields": list(fields)}
+    if term.related:
+        entry["relatedRoles"] = list(term.related)
+    return entry
+
+
+def _build(matches: List[Tuple[Term, Optional[str]]], operators: Dict[str, str]) -> Dict[str, Any]:
+    locations: Dict[str, Dict[str, Any]] = {}
+    organisations: Dict[str, Dict[str, Any]] = {}
+    skills: Dict[str, Dict[str, Any]] = {}
+    for term, temporal in matches:
+        if term.kind == LOCATION:
+            for name in term.expands or (term.name,):
+                locations.setdefault(name, {"name": name})
+        elif term.kind == ORGANISATION:
+            for name in term.expands or (term.name,):
+                org = _INDEX[tuple(normalize_text(name).split())] if term.expands else term
+                organisations.setdefault(name, {"name": name, "temporal": temporal or "any",
+                                                "aliases": list(org.keywords)})
+        else:
+            skills.setdefault(term.name, _skill_entry(term, temporal))
+    response = {
+        "regionBasedQuery": int(bool(locations)),
+        "locationDetails": {"operator": "OR", "locations": list(locations.values())},
+        "organisationBasedQuery": int(bool(organisations)),
+        "organisationDetails": {"operator": operators[ORGANISATION], "organizations": list(organisations.values())},
+        "sectorBasedQuery": 0,
+        "sectorDetails": {"operator": "OR", "sectors": []},
+        "skillBasedQuery": int(bool(skills)),
+        "skillDetails": {"operator": operators[SKILL], "skills": list(skills.values())},
+        "dbBasedQuery": 0,
+        "dbQueryDetails": {"operator": "AND", "queries": []},
+    }
+    return {
+        "query_breakdown": {
+            "key_components": [*locations, *organisations, *skills],
+            "analysis": "Matched deterministically against the skill, role, organisation and location lexicons.",
+        },
+        "response": response,
+    }
+
+
+def analyse(query: str) -> Tuple[Optional[Dict[str, Any]], float, List[str]]:
+    """
+    Return ``(step1_json, confidence, unknown_tokens)``. ``step1_json`` is ``None`` when the
+    query has no lexicon entity, contains a blocker or has boolean structure a section
+    operator cannot express (see ``_operators``); confidence is 0 in that case.
+    """
+    tokens = normalize_text(query).split()
+    matches, unknown, blockers, links = _scan(tokens)
+    operators = _operators(matches, links) if matches and not blockers else None
+    if operators is None or ("and" in tokens and "or" in tokens):
+        return None, 0.0, unknown + blockers
+    confidence = round(1 - len(unknown) / len(tokens), 3)
+    return _build(matches, operators), confidence, unknown
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Deterministic HyDE step 1 for simple queries")
+    sub = parser.add_subparsers(dest="command", required=True)
+    analyse_parser = sub.add_parser("analyse", help="Show the fast-path result for a query")
+    analyse_parser.add_argument("query")
+    coverage_parser = sub.add_parser("coverage", help="Share of a query log the fast path would answer")
+    coverage_parser.add_argument("log", help="Text file with one query per line")
+    coverage_parser.add_argument("--threshold", type=float, default=0.9)
+    coverage_parser.add_argument("--top", type=int, default=25, help="Unknown tokens to list")
+    args = parser.parse_args()
+
+    if args.command == "analyse":
+        result, confidence, unknown = analyse(args.query)
+        print(json.dumps({"confidence": confidence, "unknown": unknown, "result": result}, indent=2))
+    else:
+        with open(args.log, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+        accepted = 0
+        reasons: Counter = Counter()
+        missing: Counter = Counter()
+        t0 = time.perf_counter()
+        for query in queries:
+            result, confidence, unknown = analyse(query)
+            missing.update(unknown)
+            if result is None:
+                reasons["no entity or blocker"] += 1
+            elif confidence < args.threshold:
+                reasons["below threshold"] += 1
+            else:
+                accepted += 1
+        elapsed_us = (time.perf_counter() - t0) * 1e6 / max(len(queries), 1)
+        print(json.dumps({
+            "queries": len(queries),
+            "fast_path": accepted,
+            "coverage": round(accepted / len(queries), 3) if queries else None,
+            "fallbacks": dict(reasons),
+            "us_per_query": round(elapsed_us, 1),
+            # The words worth adding to a lexicon (or to FILLER / BLOCKERS)
+            "top_unknown": missing.most_common(args.top),
+        }, indent=2))
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Vetting of the LLM-generated ``skillDetails[].regexPatterns.keywords``.
+
+The Fetch lambda runs these patterns against profile fields for every candidate. A single
+pattern with nested quantifiers (``(\\w+\\s?)+``) can make one scan take seconds, and a
+pattern that matches the empty string matches every profile. Each keyword is therefore:
+
+    1. trimmed, with a bare leading/trailing ``.*`` removed (same matches for a search);
+       a leading inline flag group (``(?i)python``) is scoped to the keyword
+       (``(?i:python)``) so it cannot leak into the other branches once merged
+    2. compiled; technology names that are not valid or not meant as regex (``c++``,
+       ``c#(``) are rewritten as escaped literals
+    3. rejected if it uses backreferences, matches the empty string, nests unbounded
+       quantifiers, repeats an ambiguous alternation or is too long
+
+The surviving keywords replace the originals, and a single ``combined`` alternation is
+attached next to them. Literal keywords are folded into a prefix trie, and keywords that
+contain another keyword are dropped because the keywords are OR-ed. The output only uses
+syntax that PCRE (MongoDB ``$regex``) understands.
+
+Usage:
+    python regex_safety.py            # benchmark on synthetic profile text
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_constants
+    import sre_parse
+
+MAX_PATTERN_LENGTH = 200
+MAX_KEYWORDS_PER_SKILL = 40
+# More unbounded quantifiers than this in one pattern is polynomial backtracking territory
+MAX_UNBOUNDED_REPEATS = 3
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+            getattr(sre_constants, "POSSESSIVE_REPEAT", None)} - {None}
+# Python 3.11+ only (``c++`` parses as a possessive repeat); always an accident in keywords
+_PYTHON_ONLY = {getattr(sre_constants, "POSSESSIVE_REPEAT", None), getattr(sre_constants, "ATOMIC_GROUP", None)} - {None}
+_EDGE_WILDCARD = re.compile(r"^(?:\.\*)+|(?<!\\)(?:\.\*)+$")
+_META = re.compile(r"([.^$*+?()\[\]{}|\\])")
+_INLINE_FLAGS = re.compile(r"(?<!\\)\(\?([a-zA-Z]+)\)")
+# Flags PCRE understands as well; ``a``, ``L`` and ``u`` are Python-only
+_SCOPABLE_FLAGS = set("imsx")
+
+
+def escape(text: str) -> str:
+    """Escape regex metacharacters only (``re.escape`` also escapes spaces and ``#``)."""
+    return _META.sub(r"\\\1", text)
+
+
+###############################################################################
+# SINGLE PATTERNS
+###############################################################################
+def _unbounded(hi: int) -> bool:
+    return hi == sre_constants.MAXREPEAT or hi > 1000
+
+
+def _first_literal(items) -> Optional[int]:
+    """First character of a branch when it is a plain literal, else ``None`` (unknown)."""
+    if items and items[0][0] == sre_constants.LITERAL:
+        return items[0][1]
+    return None
+
+
+def _walk(items, under_repeat: bool, counts: Dict[str, int]) -> Optional[str]:
+    """Return why the parsed pattern is unsafe, or ``None``."""
+    for op, av in items:
+        if op in _PYTHON_ONLY:
+            counts["python_only"] += 1
+        if op in _REPEATS:
+            lo, hi, body = av
+            if _unbounded(hi):
+                counts["unbounded"] += 1
+                if under_repeat:
+                    return "nested unbounded quantifiers"
+            reason = _walk(body, under_repeat or hi > 1, counts)
+            if reason:
+                return reason
+        elif op == sre_constants.BRANCH:
+            branches = av[1]
+            if under_repeat:
+                firsts = [_first_literal(branch) for branch in branches]
+                if None in firsts or len(set(firsts)) != len(firsts):
+                    return "repeated alternation with overlapping branches"
+            for branch in branches:
+                reason = _walk(branch, under_repeat, counts)
+                if reason:
+                    return reason
+        elif op == sre_constants.SUBPATTERN:
+            reason = _walk(av[-1], under_repeat, counts)
+            if reason:
+                return reason
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            reason = _walk(av[1], under_repeat, counts)
+            if reason:
+                return reason
+        elif op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+            return "backreference"
+        elif op in _PYTHON_ONLY:
+            reason = _walk(av, under_repeat, counts)
+            if reason:
+                return reason
+    return None
+
+
+@lru_cache(maxsize=4096)
+def vet_pattern(pattern: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Return ``(safe_pattern, note)``. ``safe_pattern`` is ``None`` when the keyword is
+    rejected; ``note`` says what was rewritten or why it was rejected (``None`` if untouched).
+    """
+    original = pattern
+    pattern = _EDGE_WILDCARD.sub("", pattern.strip())
+    if not pattern:
+        return None, "empty pattern"
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        return None, f"longer than {MAX_PATTERN_LENGTH} characters"
+    flags = _INLINE_FLAGS.match(pattern)
+    if flags and set(flags.group(1)) <= _SCOPABLE_FLAGS and not _INLINE_FLAGS.search(pattern, flags.end()):
+        # A global flag would apply to every keyword merged after this one (PCRE) or fail to
+        # compile mid-alternation (Python); scope it to this keyword instead
+        pattern = f"(?{flags.group(1)}:{pattern[flags.end():]})"
+    elif _INLINE_FLAGS.search(pattern):
+        return None, "inline global flags"
+
+    counts = {"unbounded": 0, "python_only": 0}
+    try:
+        reason = _walk(sre_parse.parse(pattern), False, counts)
+    except (re.error, RecursionError):
+        reason, counts["python_only"] = None, 1
+    if counts["python_only"]:
+        # Not a regex the author meant (``c++``, ``c#(``): match the text literally
+        literal = escape(pattern)
+        return literal, f"rewritten as literal {literal!r}"
+    if reason:
+        return None, reason
+    if counts["unbounded"] > MAX_UNBOUNDED_REPEATS:
+        return None, f"more than {MAX_UNBOUNDED_REPEATS} unbounded quantifiers"
+    if re.search(pattern, ""):
+        return None, "matches the empty string (would match every profile)"
+    if pattern == original:
+        return pattern, None
+    return pattern, (f"scoped flags as {pattern!r}" if flags else f"trimmed to {pattern!r}")
+
+
+###############################################################################
+# MERGING
+###############################################################################
+def _literal_text(pattern: str) -> Optional[str]:
+    """The plain text a pattern matches when it is a pure literal, else ``None``."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    chars = []
+    for op, av in parsed:
+        if op != sre_constants.LITERAL:
+            return None
+        chars.append(chr(av))
+    return "".join(chars)
+
+
+def _trie_regex(words: List[str]) -> str:
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        ends = "" in node
+        branches = [escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends:
+            body = body + "?" if len(branches) == 1 and len(branches[0]) == 1 else f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+def merge_patterns(patterns: List[str]) -> Optional[str]:
+    """
+    One alternation equivalent to "any of ``patterns`` matches" (patterns must be vetted).
+    Literals that contain a shorter literal are dropped; the rest share a prefix trie.
+    """
+    literals, others = [], []
+    for pattern in dict.fromkeys(patterns):
+        text = _literal_text(pattern)
+        (others if text is None else literals).append(text if text is not None else pattern)
+    literals.sort(key=len)
+    kept: List[str] = []
+    for text in literals:
+        if not any(shorter in text for shorter in kept):
+            kept.append(text)
+    parts = ([_trie_regex(kept)] if kept else []) + [f"(?:{p})" if "|" in p else p for p in others]
+    return "|".join(parts) if parts else None
+
+
+def vet_keywords(keywords: List[str]) -> Tuple[List[str], Optional[str], List[str]]:
+    """Return ``(safe_keywords, combined, notes)`` for one skill's keyword list."""
+    safe: List[str] = []
+    notes: List[str] = []
+    if len(keywords) > MAX_KEYWORDS_PER_SKILL:
+        notes.append(f"kept the first {MAX_KEYWORDS_PER_SKILL} of {len(keywords)} keywords")
+        keywords = keywords[:MAX_KEYWORDS_PER_SKILL]
+    for keyword in keywords:
+        pattern, note = vet_pattern(keyword)
+        if note:
+            notes.append(f"{keyword!r}: {note}" if pattern is not None else f"{keyword!r}: rejected ({note})")
+        if pattern is not None and pattern not in safe:
+            safe.append(pattern)
+    return safe, merge_patterns(safe), notes
+
+
+def vet_skill_patterns(skills, issues) -> int:
+    """
+    Vet ``regexPatterns`` of every ``hyde_models.Skill`` in place, recording rewrites and
+    rejections in ``issues``. Returns the number of rejected keywords.
+    """
+    rejected = 0
+    for i, skill in enumerate(skills):
+        patterns = skill.regex_patterns
+        if patterns is None:
+            continue
+        if not patterns.keywords:
+            patterns.combined = None
+            continue
+        safe, combined, notes = vet_keywords(patterns.keywords)
+        path = ((("skillDetails", "skills"), i), "regexPatterns")
+        for note in notes:
+            issues.note(path, note)
+        rejected += len(patterns.keywords) - len(safe)
+        patterns.keywords = safe
+        patterns.combined = combined
+    return rejected
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    random.seed(7)
+    vocab = ("senior software engineer backend python django data platform team lead building "
+             "distributed systems kafka spark product manager growth marketing sales founder "
+             "startup fintech payments bangalore berlin cloud aws infrastructure pytorch ml researcher").split()
+    profiles = [" ".join(random.choice(vocab) for _ in range(random.randint(20, 80))) for _ in range(5000)]
+    keywords = ["machine learning", r"\bml\b", "deep learning", "neural network", "pytorch", "tensorflow",
+                "data scien", "data scientist", "machine learning engineer", "researcher", ".*ai research.*",
+                "(\\w+\\s?)+ engineer", "c++"]
+
+    safe, combined, notes = vet_keywords(keywords)
+    for note in notes:
+        print(f"note: {note}")
+    print(f"combined: {combined}")
+
+    singles = [re.compile(p, re.I) for p in safe]
+    merged = re.compile(combined, re.I)
+    for label, fn in (
+        ("per-keyword scan", lambda text: any(p.search(text) for p in singles)),
+        ("combined alternation", lambda text: merged.search(text) is not None),
+    ):
+        t0 = time.perf_counter()
+        hits = sum(1 for text in profiles if fn(text))
+        print(f"{label:<22} {(time.perf_counter() - t0) / len(profiles) * 1e6:7.2f} us/profile, {hits} matches")
+
+    evil = re.compile(r"(\w+\s?)+ engineer")
+    subject = "a" * 22 + "!"
+    t0 = time.perf_counter()
+    evil.search(subject)
+    print(f"rejected pattern on a {len(subject)}-char field: {(time.perf_counter() - t0) * 1e3:.0f} ms "
+          f"(doubles per extra character)")
+    t0 = time.perf_counter()
+    vet_pattern.cache_clear()
+    for keyword in keywords:
+        vet_pattern(keyword)
+    print(f"vetting cost: {(time.perf_counter() - t0) / len(keywords) * 1e6:.1f} us/keyword (cached afterwards)")
@@ -0,0 +1,152 @@
+"""
+Speculative enrichment started alongside HyDE step 1.
+
+Skill and location enrichment normally waits for the full step-1 JSON, yet the entities are
+often plain in the query ("python developers in berlin"). While step 1 runs, the query is
+matched against a dictionary of known entity names. Each match gets the normal
+cache-or-generate treatment, so by the time the final response arrives its descriptions and
+alt names are usually in the local tier.
+
+The dictionary holds this container's heavy-hitter candidates, the pinned fleet-wide heavy
+hitters and anything added with ``register``. Matching is a set lookup per query n-gram.
+
+Reconciliation runs after the step-1 structure is published. It waits (at most
+SPECULATION_WAIT_SECONDS) only for the speculative batches whose names the final response
+uses, so an entity is generated twice only when its batch overruns that wait. Batches the
+final response does not need keep running in the background (bounded by the handler's
+drain). Work scheduled from a speculative batch (stale refreshes) is not speculative and is
+not counted. Counters go to the ``speculation`` family in ``cache_metrics``:
+
+    speculated        names started speculatively
+    used              of those, names the final response contains (hit rate = used / speculated)
+    wasted            speculated names the final response does not contain
+    llm_calls         LLM batches issued by speculation (up to reconciliation)
+    generated         names generated by an LLM during speculation (up to reconciliation)
+    wasted_generated  generated names the final response does not contain
+"""
+
+import asyncio
+import contextvars
+import itertools
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from logging_config import setup_logger
+import background_tasks
+import heavy_hitters
+from cache_metrics import SPECULATION, metrics as cache_metrics
+from cache_policy import LOCATION_FAMILY, SKILL_FAMILY
+from utils import normalize_text
+
+logger = setup_logger(__name__)
+
+FAMILIES = (SKILL_FAMILY, LOCATION_FAMILY)
+MIN_NAME_LENGTH = 2
+
+_registered: Dict[str, Set[str]] = {family: set() for family in FAMILIES}
+_max_words = 1
+_task_ids = itertools.count()
+
+# Set inside speculative tasks only; generation functions report into it. Work they schedule
+# (e.g. stale refreshes) runs with it reset, so it is not counted as speculation
+_current: contextvars.ContextVar[Optional[Tuple["Speculation", str]]] = background_tasks.task_local(
+    contextvars.ContextVar("speculation", default=None))
+
+
+def register(family: str, names: Iterable[str]) -> None:
+    """Add entity names (any form; they are normalised) to the speculation dictionary."""
+    global _max_words
+    bucket = _registered[family]
+    for name in names:
+        norm = normalize_text(name)
+        if len(norm) >= MIN_NAME_LENGTH:
+            bucket.add(norm)
+            _max_words = max(_max_words, norm.count(" ") + 1)
+
+
+def _dictionary(family: str, local_cache: Any) -> Tuple[Set[str], int]:
+    """Known names for ``family`` and the word count of the longest one."""
+    prefix = f"{family}:"
+    tracker = heavy_hitters.trackers.get(family)
+    dynamic = {key[len(prefix):] for key in itertools.chain(tracker.candidates if tracker else (),
+                                                              local_cache.pinned_keys())
+               if key.startswith(prefix)}
+    longest = max((name.count(" ") + 1 for name in dynamic), default=1)
+    return _registered[family] | dynamic, max(longest, _max_words)
+
+
+def match(query: str, local_cache: Any, limit: int) -> Dict[str, List[str]]:
+    """Known entity names (normalised) found in ``query``, longest n-grams first, per family."""
+    tokens = normalize_text(query).split()
+    found = {}
+    for family in FAMILIES:
+        names, longest = _dictionary(family, local_cache)
+        grams = (" ".join(tokens[i:i + n]) for n in range(min(longest, len(tokens)), 0, -1)
+                 for i in range(len(tokens) - n + 1))
+        found[family] = list(dict.fromkeys(g for g in grams if g in names))[:limit]
+    return found
+
+
+def record_generation(names: Iterable[str]) -> None:
+    """Called by the LLM generation helpers; counts the batch when it runs speculatively."""
+    current = _current.get()
+    if current is not None:
+        run, family = current
+        run.llm_calls += 1
+        run.generated.setdefault(family, set()).update(normalize_text(name) for name in names)
+
+
+class Speculation:
+    """One query's speculative batches: a background task per family."""
+
+    def __init__(self):
+        self.keys: Dict[str, Set[str]] = {}
+        self.tasks: Dict[str, str] = {}
+        self.llm_calls = 0
+        self.generated: Dict[str, Set[str]] = {}
+
+    def start(self, family: str, names: List[str], work: Callable[[List[str]], Awaitable[Any]]) -> None:
+        if not names:
+            return
+        self.keys[family] = set(names)
+        task_name = f"speculation:{family}:{next(_task_ids)}"
+
+        context = contextvars.copy_context()
+        context.run(_current.set, (self, family))
+        if background_tasks.schedule(task_name, work(names), context=context):
+            self.tasks[family] = task_name
+            logger.info(f"Speculating on {len(names)} {family} name(s): {names}")
+
+    async def reconcile(self, final_names: Dict[str, Iterable[str]], timeout: Optional[float] = None) -> Dict[str, int]:
+        """Wait for the batches the final response needs, record hit/waste counters and return them."""
+        final = {family: {normalize_text(n) for n in names} for family, names in final_names.items()}
+        needed = [self.tasks[family] for family, keys in self.keys.items()
+                  if family in self.tasks and keys & final.get(family, set())]
+        if needed:
+            await asyncio.gather(*(background_tasks.wait_for(name, timeout) for name in needed))
+        speculated = sum(len(keys) for keys in self.keys.values())
+        used = sum(len(keys & final.get(family, set())) for family, keys in self.keys.items())
+        counts = {
+            "speculated": speculated,
+            "used": used,
+            "wasted": speculated - used,
+            "llm_calls": self.llm_calls,
+            "generated": sum(len(names) for names in self.generated.values()),
+            "wasted_generated": sum(len(names - final.get(family, set())) for family, names in self.generated.items()),
+        }
+        for field, value in counts.items():
+            cache_metrics.incr(SPECULATION, field, value)
+        return counts
+
+
+def speculate(query: str, local_cache: Any, limit: int,
+              workers: Dict[str, Callable[[List[str]], Awaitable[Any]]]) -> Optional[Speculation]:
+    """
+    Start speculative batches for the known names in ``query``. ``workers`` maps a family to
+    the coroutine function that looks up / generates a list of names (families without a
+    worker are skipped). Returns ``None`` when nothing matched.
+    """
+    matches = match(query, local_cache, limit)
+    run = Speculation()
+    for family, work in workers.items():
+        run.start(family, matches.get(family, []), work)
+    return run if run.tasks else None
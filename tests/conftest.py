@@ -0,0 +1,44 @@
+"""
+Shared pytest setup: make the flat Lambda modules importable and give ``config`` and
+``model_config`` the variables they require. No request leaves the process; Redis-backed
+paths use ``memory_redis.InMemoryRedis``.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+for name in ("BASE_URL", "UPSTASH_REDIS_REST_URL"):
+    os.environ.setdefault(name, "http://localhost")
+for name in ("UPSTASH_REDIS_REST_TOKEN", "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GEMINI_API_KEY",
+             "GROQ_API_KEY", "MISTRAL_API_KEY", "DEEPSEEK_API_KEY", "TOGETHERAI_API_KEY"):
+    os.environ.setdefault(name, "test")
+# litellm otherwise fetches its model cost map on import
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+
+@pytest.fixture
+def memory_redis():
+    from memory_redis import InMemoryRedis
+
+    return InMemoryRedis()
+
+
+@pytest.fixture
+def hyde_env(monkeypatch, memory_redis):
+    """``hyde_logic`` against an in-memory Redis and an empty local tier, Bloom filter off."""
+    import hyde_logic
+    from bloom_filter import key_filter
+    from cache_metrics import metrics
+    from local_cache import local_cache
+
+    monkeypatch.setattr(hyde_logic, "r", memory_redis)
+    monkeypatch.setattr(key_filter, "enabled", False)
+    local_cache.clear()
+    metrics.take()
+    yield hyde_logic
+    local_cache.clear()
@@ -0,0 +1,83 @@
+import asyncio
+
+import bloom_filter
+from bloom_filter import LOG_KEY, SNAPSHOT_KEY, BloomFilter, CacheKeyFilter, rebuild
+
+
+def test_bloom_membership_and_snapshot_roundtrip():
+    bloom = BloomFilter.for_capacity(1000, 0.01)
+    keys = [f"skill:term {i}" for i in range(500)]
+    for key in keys:
+        bloom.add(key)
+    restored, log_len = BloomFilter.from_snapshot(bloom.to_snapshot(log_len=7))
+    assert log_len == 7
+    assert all(key in restored for key in keys)
+    false_positives = sum(f"skill:other {i}" in restored for i in range(2000))
+    assert false_positives < 60
+
+
+def test_no_snapshot_means_no_log_writes(memory_redis):
+    key_filter = CacheKeyFilter(memory_redis, enabled=True)
+    key_filter.record("skill:python")
+    key_filter.record("skill:rust")
+    assert memory_redis.llen(LOG_KEY) == 0
+    assert not key_filter.definitely_missing("skill:anything")
+
+
+def test_writes_are_batched_off_the_request_path(memory_redis):
+    memory_redis.set("skill:python", "x")
+    rebuild(memory_redis)
+    key_filter = CacheKeyFilter(memory_redis, enabled=True)
+    key_filter.refresh()
+    assert key_filter.definitely_missing("skill:rust")
+
+    async def request():
+        key_filter.record("skill:rust")
+        key_filter.record("skill:go")
+        # Nothing is pushed synchronously
+        assert memory_redis.llen(LOG_KEY) == 0
+        await bloom_filter.background_tasks.drain(1)
+
+    asyncio.run(request())
+    assert memory_redis.lrange(LOG_KEY, 0, -1) == ["skill:rust", "skill:go"]
+    assert not key_filter.definitely_missing("skill:rust")
+
+    other = CacheKeyFilter(memory_redis, enabled=True)
+    other.refresh()
+    assert not other.definitely_missing("skill:go")
+
+
+def test_long_log_is_folded_into_the_snapshot(memory_redis, monkeypatch):
+    monkeypatch.setattr(bloom_filter, "LOG_MAX_ENTRIES", 5)
+    rebuild(memory_redis)
+    writer = CacheKeyFilter(memory_redis, enabled=True)
+    writer.refresh()
+    for i in range(8):
+        writer.record(f"skill:term {i}")  # no running loop: flushed inline
+    # Folded at the 6th key; later keys wait in the log for the next fold (lock held)
+    assert memory_redis.lrange(LOG_KEY, 0, -1) == ["skill:term 6", "skill:term 7"]
+    reader = CacheKeyFilter(memory_redis, enabled=True)
+    reader.refresh()
+    assert BloomFilter.from_snapshot(memory_redis.get(SNAPSHOT_KEY))[1] == 0
+    assert not any(reader.definitely_missing(f"skill:term {i}") for i in range(8))
+
+
+def test_offline_tools_log_the_keys_they_write(memory_redis):
+    from cache_migrate import rekey
+    from prewarm import MockProvider, Prewarmer
+
+    mock = MockProvider()
+    prewarmer = Prewarmer(memory_redis, mock.describe, mock.alt_names)
+    asyncio.run(prewarmer.fill("skill", ["Python"]))
+    # No snapshot yet: nothing to tell
+    assert memory_redis.llen(LOG_KEY) == 0
+
+    rebuild(memory_redis)
+    asyncio.run(prewarmer.fill("skill", ["Rust", "Go"]))
+    memory_redis.set("location_alt_names:s o paulo", '["Sampa"]')
+    rekey(memory_redis, "location_alt_names", ["São Paulo"])
+
+    key_filter = CacheKeyFilter(memory_redis, enabled=True)
+    key_filter.refresh()
+    for key in ("skill:python", "skill:rust", "skill:go", "location_alt_names:sao paulo"):
+        assert not key_filter.definitely_missing(key), key
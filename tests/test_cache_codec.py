@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+import pytest
+
+from cache_codec import CacheCodecError, decode_value, encode_value
+
+
+def _skill_value(size=64):
+    return {"description": "Builds and ships backend services in Python. " * 8,
+            "embeddings": [i / size for i in range(size)]}
+
+
+@pytest.mark.parametrize("codec, header", [("zlib", "~1z"), ("zstd", "~1")])
+def test_round_trip(codec, header):
+    value = _skill_value()
+    encoded = encode_value(value, codec)
+    assert encoded.startswith(header)
+    assert len(encoded) < len(json.dumps(value))
+    decoded = decode_value(encoded)
+    assert decoded["description"] == value["description"]
+    # float32 packing
+    assert decoded["embeddings"] == pytest.approx(value["embeddings"], abs=1e-6)
+
+
+def test_json_codec_and_small_values_stay_plain():
+    assert encode_value(_skill_value(), "json") == json.dumps(_skill_value(), separators=(",", ":"))
+    assert encode_value(["Bengaluru", "Bangalore"], "zlib") == '["Bengaluru","Bangalore"]'
+
+
+def test_legacy_plain_json_is_decoded():
+    assert decode_value('{"description": "x"}') == {"description": "x"}
+    assert decode_value(b'["Bombay"]') == ["Bombay"]
+
+
+@pytest.mark.parametrize("raw", ["~2zAAAA", "~1qAAAA", "~1z!!not base64!!"])
+def test_bad_encodings_raise_codec_errors(raw):
+    with pytest.raises(CacheCodecError):
+        decode_value(raw)
+
+
+def test_skill_lookup_reads_legacy_and_encoded_values(hyde_env, memory_redis, monkeypatch):
+    memory_redis.set("skill:python", json.dumps({"description": "legacy"}))
+    memory_redis.set("skill:rust", encode_value(_skill_value(), "zlib"))
+    # Legacy entries have no metadata and are stale; no refresh in this test
+    monkeypatch.setattr(hyde_env, "_schedule_refresh", lambda *args: None)
+
+    descriptions = asyncio.run(hyde_env.process_canhelp_skills_with_descriptions(["Python", "Rust"]))
+    assert descriptions["Python"] == {"description": "legacy"}
+    assert descriptions["Rust"]["description"] == _skill_value()["description"]
+    assert len(descriptions["Rust"]["embeddings"]) == 64
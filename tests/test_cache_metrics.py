@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+import cache_metrics
+from cache_metrics import STATS_TTL_SECONDS, CacheMetrics, flush, report
+
+
+def test_flush_writes_one_hourly_hash_per_family(memory_redis):
+    when = datetime(2026, 3, 1, 14, 30, tzinfo=timezone.utc)
+    counts = {"skill": {"hits": 3, "misses": 1, "lookup_ms": 40, "stale": 0}, "jobs": {"refresh_runs": 2}}
+
+    assert flush(memory_redis, counts, when) == 4
+    assert memory_redis.hgetall("cache_stats:skill:2026030114") == {"hits": "3", "misses": "1", "lookup_ms": "40"}
+    assert memory_redis.hgetall("cache_stats:jobs:2026030114") == {"refresh_runs": "2"}
+    assert 0 < memory_redis.ttl("cache_stats:skill:2026030114") <= STATS_TTL_SECONDS
+
+    # A second invocation in the same hour adds to the same hash
+    flush(memory_redis, {"skill": {"hits": 2}}, when)
+    assert memory_redis.hgetall("cache_stats:skill:2026030114")["hits"] == "5"
+
+
+def test_report_reads_the_hourly_trend_back(memory_redis):
+    flush(memory_redis, {"skill": {"hits": 3, "misses": 1, "lookup_ms": 40}})
+
+    data = report(memory_redis, ["skill", "role"], hours=2)
+    totals = data["skill"]["totals"]
+    assert (totals["lookups"], totals["hit_rate"], totals["avg_lookup_ms"]) == (4, 0.75, 10.0)
+    assert len(data["skill"]["hourly"]) == 1
+    assert data["role"] == {"totals": {"lookups": 0, "hit_rate": None}, "hourly": []}
+
+
+def test_take_resets_the_invocation_counters(monkeypatch):
+    scheduled = []
+    counters = CacheMetrics()
+    monkeypatch.setattr(cache_metrics, "metrics", counters)
+    monkeypatch.setattr(cache_metrics.background_tasks, "schedule",
+                        lambda name, coro: scheduled.append(name) or coro.close())
+
+    counters.incr("skill", "hits", 2)
+    counters.incr("skill", "misses", 0)
+    assert cache_metrics.publish(None) == {"skill": {"hits": 2, "lookups": 2, "hit_rate": 1.0}}
+    assert scheduled == ["cache_metrics_flush"]
+    assert counters.take() == {}
@@ -0,0 +1,22 @@
+import json
+
+from cache_migrate import rekey
+
+
+def test_rekey_copies_legacy_entries_to_their_unicode_key(memory_redis):
+    memory_redis.set("location_alt_names:z rich", json.dumps(["Zurich"]), ex=600)
+    memory_redis.set("location_alt_names:i stanbul", json.dumps(["Constantinople"]))
+    memory_redis.set("location_alt_names:istanbul", json.dumps(["Istanbul"]))
+    # Every CJK name used to share the empty key; it is never copied
+    memory_redis.set("location_alt_names:", json.dumps(["Tokyo"]))
+
+    names = ["Zürich", "İstanbul", "東京", "Berlin", "Kraków"]
+    assert rekey(memory_redis, "location_alt_names", names, dry_run=True) == {
+        "candidates": 3, "copied": 1, "already_present": 1, "legacy_missing": 1}
+    assert memory_redis.get("location_alt_names:zurich") is None
+
+    assert rekey(memory_redis, "location_alt_names", names)["copied"] == 1
+    assert json.loads(memory_redis.get("location_alt_names:zurich")) == ["Zurich"]
+    assert 0 < memory_redis.ttl("location_alt_names:zurich") <= 600
+    assert json.loads(memory_redis.get("location_alt_names:istanbul")) == ["Istanbul"]
+    assert memory_redis.get("location_alt_names:東京") is None
@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import pytest
+
+from cache_policy import (CANONICAL_PROVIDER, LOCATION_FAMILY, LOCATION_META_FAMILY, SKILL_FAMILY, SOFT_TTL_SECONDS,
+                          is_stale, prompt_version, provider_family, unwrap_value, wrap_value)
+
+PROVIDER = "azure-gpt-4.1-mini"
+
+
+def test_wrap_and_unwrap_round_trip():
+    stored = wrap_value(LOCATION_FAMILY, ("Bombay",), PROVIDER, now=100)
+    assert stored == {"alt_names": ["Bombay"], "meta": {
+        "generated_at": 100, "prompt_version": prompt_version(LOCATION_FAMILY, PROVIDER), "provider": PROVIDER}}
+    assert unwrap_value(LOCATION_FAMILY, stored) == (["Bombay"], stored["meta"])
+
+    skill = wrap_value(SKILL_FAMILY, {"description": "x", "meta": {"old": 1}}, PROVIDER, now=100)
+    assert unwrap_value(SKILL_FAMILY, skill) == (skill, skill["meta"])
+    assert skill["meta"]["generated_at"] == 100
+
+
+def test_legacy_shapes_are_read_without_metadata():
+    assert unwrap_value(LOCATION_FAMILY, ["Bombay"]) == (["Bombay"], None)
+    assert unwrap_value(SKILL_FAMILY, {"description": "x"}) == ({"description": "x"}, None)
+    for family, stored in ((LOCATION_FAMILY, {"names": []}), (SKILL_FAMILY, ["x"])):
+        with pytest.raises(ValueError):
+            unwrap_value(family, stored)
+
+
+def test_staleness():
+    meta = wrap_value(SKILL_FAMILY, {"description": "x"}, CANONICAL_PROVIDER, now=1000)["meta"]
+    assert not is_stale(SKILL_FAMILY, meta, now=1000 + SOFT_TTL_SECONDS)
+    assert is_stale(SKILL_FAMILY, meta, now=1001 + SOFT_TTL_SECONDS)
+    assert is_stale(SKILL_FAMILY, None)
+    assert is_stale(SKILL_FAMILY, {**meta, "prompt_version": "old"}, now=1000)
+
+
+def test_staleness_does_not_depend_on_the_reading_provider(hyde_env, memory_redis, monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(hyde_env, "_refresh_entries",
+                        lambda family, names, provider: _record(refreshed, (family, names, provider)))
+    canonical = wrap_value(SKILL_FAMILY, {"description": "canonical"}, CANONICAL_PROVIDER)
+    memory_redis.set("skill:python", json.dumps(canonical))
+    other = wrap_value(SKILL_FAMILY, {"description": "other"}, "anthropic_haiku")
+    memory_redis.set("skill:rust", json.dumps(other))
+
+    async def lookups():
+        for provider in ("anthropic_haiku", "openai4o"):
+            hyde_env.local_cache.clear()
+            await hyde_env.process_canhelp_skills_with_descriptions(["Python", "Rust"], provider)
+        await hyde_env.background_tasks.drain(1)
+
+    asyncio.run(lookups())
+    # Only the entry written by another provider family is refreshed, with the canonical provider
+    assert refreshed == [(SKILL_FAMILY, ["Rust"], CANONICAL_PROVIDER)]
+
+
+async def _record(calls, call):
+    calls.append(call)
+
+
+def test_legacy_location_entry_is_served_and_refreshed(hyde_env, memory_redis, monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(hyde_env, "GAZETTEER_ENABLED", False)
+    monkeypatch.setattr(hyde_env, "_schedule_refresh", lambda family, names: refreshed.append(names))
+    memory_redis.set(f"{LOCATION_FAMILY}:springfield", json.dumps(["Springfield, IL"]))
+    fresh = wrap_value(LOCATION_FAMILY, ["Shelbyville, TN"], CANONICAL_PROVIDER)
+    memory_redis.set(f"{LOCATION_FAMILY}:shelbyville", json.dumps(fresh))
+
+    results = asyncio.run(hyde_env.process_location_alt_names(["Springfield", "Shelbyville"], PROVIDER))
+    assert results == [{"name": "Springfield", "alt_names": ["Springfield, IL"]},
+                       {"name": "Shelbyville", "alt_names": ["Shelbyville, TN"]}]
+    assert refreshed == [["Springfield"]]
+
+
+@pytest.mark.parametrize("provider, family", [
+    ("openai4o", "openai"),
+    ("anthropic_haiku", "anthropic"),
+    ("anthropic_aws", "bedrock"),
+    ("groq_oss", "groq"),
+    (PROVIDER, "azure"),
+])
+def test_provider_family(provider, family):
+    assert provider_family(provider) == family
+
+
+def test_prompt_version_follows_template_and_provider_family(monkeypatch):
+    import cache_policy
+
+    version = prompt_version(SKILL_FAMILY, "openai4o")
+    # Same model family shares entries; another family or another prompt does not
+    assert prompt_version(SKILL_FAMILY, "openainano") == version
+    assert prompt_version(SKILL_FAMILY, "anthropic_haiku") != version
+    assert prompt_version(LOCATION_FAMILY, "openai4o") != version
+    monkeypatch.setitem(cache_policy.PROMPT_TEMPLATES, SKILL_FAMILY, "edited prompt")
+    prompt_version.cache_clear()
+    try:
+        assert prompt_version(SKILL_FAMILY, "openai4o") != version
+    finally:
+        prompt_version.cache_clear()
+
+
+def test_skill_refresh_keeps_embeddings(hyde_env, memory_redis, monkeypatch):
+    async def describe(names, provider):
+        return {name: f"New description of {name}" for name in names}
+
+    monkeypatch.setattr(hyde_env, "get_chat_completion_description", describe)
+    memory_redis.set("skill:python", json.dumps({"description": "old", "embeddings": [0.5, 0.25]}))
+
+    asyncio.run(hyde_env._refresh_entries(SKILL_FAMILY, ["Python"], PROVIDER))
+    value, meta = unwrap_value(SKILL_FAMILY, json.loads(memory_redis.get("skill:python")))
+    assert value["description"] == "New description of Python"
+    assert value["embeddings"] == [0.5, 0.25]
+    assert meta["provider"] == PROVIDER
+
+
+def test_location_entries_stay_bare_lists_with_sibling_metadata(hyde_env, memory_redis, monkeypatch):
+    async def generate(locations, provider):
+        return [{"name": location, "alt_names": [f"{location} City"]} for location in locations]
+
+    refreshed = []
+    monkeypatch.setattr(hyde_env, "GAZETTEER_ENABLED", False)
+    monkeypatch.setattr(hyde_env, "get_chat_completion_location_alt_names", generate)
+    monkeypatch.setattr(hyde_env, "_schedule_refresh", lambda family, names: refreshed.append(names))
+
+    asyncio.run(hyde_env.process_location_alt_names(["Springfield"], CANONICAL_PROVIDER))
+    # Readers that expect the list shape keep working
+    assert json.loads(memory_redis.get(f"{LOCATION_FAMILY}:springfield")) == ["Springfield City"]
+    meta = json.loads(memory_redis.get(f"{LOCATION_META_FAMILY}:springfield"))
+    assert meta["provider"] == CANONICAL_PROVIDER
+    assert memory_redis.ttl(f"{LOCATION_META_FAMILY}:springfield") > 0
+
+    hyde_env.local_cache.clear()
+    results = asyncio.run(hyde_env.process_location_alt_names(["Springfield"], PROVIDER))
+    assert results == [{"name": "Springfield", "alt_names": ["Springfield City"]}]
+    assert refreshed == []
+
+
+def test_upgrade_regenerates_from_stored_display_names_and_keeps_embeddings(memory_redis):
+    from cache_migrate import outdated_names
+    from prewarm import MockProvider, Prewarmer
+
+    old = wrap_value(SKILL_FAMILY, {"description": "old", "embeddings": [0.5]}, "anthropic_haiku", name="Node.js")
+    memory_redis.set("skill:node js", json.dumps(old))
+    # A legacy entry carries no display name; its key suffix is not a name to regenerate from
+    memory_redis.set("skill:s o paulo", json.dumps({"description": "legacy"}))
+
+    names = outdated_names(memory_redis, SKILL_FAMILY, CANONICAL_PROVIDER)
+    assert names == ["Node.js"]
+
+    mock = MockProvider()
+    prewarmer = Prewarmer(memory_redis, mock.describe, mock.alt_names, provider=CANONICAL_PROVIDER,
+                          refresh_stale=True)
+    asyncio.run(prewarmer.fill(SKILL_FAMILY, names))
+    value, meta = unwrap_value(SKILL_FAMILY, json.loads(memory_redis.get("skill:node js")))
+    assert value["description"] == "Mock description for Node.js."
+    assert value["embeddings"] == [0.5]
+    assert meta["name"] == "Node.js"
+    assert not is_stale(SKILL_FAMILY, meta)
+    assert json.loads(memory_redis.get("skill:s o paulo")) == {"description": "legacy"}
@@ -0,0 +1,63 @@
+import pytest
+
+from cache_simulator import LRUPolicy, parse_policy, simulate
+
+
+def _record(query, skills, locations=(), ts=None):
+    record = {"query": query, "result": {"response": {
+        "skillDetails": {"skills": [{"name": name, "relatedRoles": []} for name in skills]},
+        "locationDetails": {"locations": [{"name": name} for name in locations]},
+    }}}
+    if ts is not None:
+        record["ts"] = ts
+    return record
+
+
+def test_parse_policy():
+    policy = parse_policy("lru:bytes=1k,entries=5,ttl=15m,canon=exact")
+    assert (policy.max_bytes, policy.max_entries, policy.ttl) == (1024, 5, 900)
+    assert policy.canonicalize("Python ") == "Python "
+    assert parse_policy("unbounded:ttl=1d").ttl == 86400
+
+    for spec in ("fifo", "lru:size=1k", "lru:canon=stem"):
+        with pytest.raises(ValueError):
+            parse_policy(spec)
+
+
+def test_lru_evicts_by_bytes_and_expires_by_ttl():
+    policy = LRUPolicy(bytes="200", ttl="10")
+    policy.insert("a", 100, now=0)
+    policy.insert("b", 100, now=0)
+    assert policy.lookup("a", now=1)
+    policy.insert("c", 100, now=1)
+    assert not policy.lookup("b", now=1)
+    assert policy.peak_bytes == 200
+
+    assert not policy.lookup("a", now=11)
+    assert policy.entries() == 1
+
+
+def test_simulate_counts_batched_llm_calls_against_the_baseline():
+    records = [
+        _record("python developer in Berlin", ["Python", "Django", "SQL", "AWS"], ["Berlin"], ts=0),
+        _record("Python developer in  berlin", ["python", "Django"], ["Berlin"], ts=60),
+        {"query": "no recorded result", "ts": 120},
+    ]
+    report = simulate(records, {"skill": parse_policy("unbounded"), "location": parse_policy("unbounded")})
+
+    # First record: 4 skills miss (2 batches of 3), second: 2 hits
+    assert report["skill"]["baseline_llm_calls"] == 3
+    assert (report["skill"]["llm_calls"], report["skill"]["hits"], report["skill"]["hit_rate"]) == (2, 2, 0.3333)
+    assert (report["location"]["llm_calls"], report["location"]["llm_calls_saved"]) == (1, 1)
+    assert report["query_result"]["llm_calls"] == 3
+    assert report["total"]["llm_calls_saved"] == 2
+
+
+def test_query_result_hits_skip_the_entity_tiers():
+    records = [_record("Python developer", ["Python"]), _record("python  developer", ["Python"])]
+    report = simulate(records, {"query_result": parse_policy("lru:entries=10"), "skill": parse_policy("none")})
+
+    assert report["query_result"]["hits"] == 1
+    assert report["skill"]["lookups"] == 1
+    assert report["skill"]["llm_calls"] == 1
+    assert report["skill"]["baseline_llm_calls"] == 2
@@ -0,0 +1,42 @@
+import asyncio
+
+import gazetteer
+from gazetteer import MAX_ALT_NAMES, Gazetteer
+
+
+def test_bundled_lookup_excludes_the_queried_form():
+    assert gazetteer.lookup("Bangalore") == ["Bengaluru", "BLR", "Bangaluru", "Bengalooru"]
+    assert gazetteer.lookup("  new   york ") == ["New York City", "NYC", "Big Apple"]
+    assert gazetteer.lookup("São Paulo") == ["Sampa"]
+    assert gazetteer.lookup("Springfield") is None
+
+
+def test_ambiguous_forms_are_never_answered():
+    places = Gazetteer(["Portland|PDX", "Portland, Maine|Portland", "Georgia|GA"])
+    assert places.lookup("Portland") is None
+    assert places.lookup("PDX") == ["Portland"]
+    assert places.lookup("Portland, Maine") == ["Portland"]
+
+
+def test_alt_names_are_capped():
+    places = Gazetteer(["|".join(f"Name {i}" for i in range(10))])
+    assert len(places.lookup("Name 0")) == MAX_ALT_NAMES
+
+
+def test_complete_returns_canonical_names_once():
+    places = Gazetteer(["Bengaluru|Bangalore|BLR", "Bangkok|Krung Thep", "Berlin"])
+    assert places.complete("ban") == ["Bengaluru", "Bangkok"]
+    assert places.complete("b", limit=1) == ["Bengaluru"]
+    assert places.complete("zz") == []
+
+
+def test_known_places_skip_redis_and_the_llm(hyde_env, memory_redis, monkeypatch):
+    async def no_llm(locations, provider):
+        raise AssertionError(f"LLM called for {locations}")
+
+    monkeypatch.setattr(hyde_env, "GAZETTEER_ENABLED", True)
+    monkeypatch.setattr(hyde_env, "get_chat_completion_location_alt_names", no_llm)
+    results = asyncio.run(hyde_env.process_location_alt_names(["Bangalore", "NYC"]))
+    assert results == [{"name": "Bangalore", "alt_names": gazetteer.lookup("Bangalore")},
+                       {"name": "NYC", "alt_names": gazetteer.lookup("NYC")}]
+    assert memory_redis.keys("*") == []
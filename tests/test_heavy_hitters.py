@@ -0,0 +1,65 @@
+from heavy_hitters import CountMinSketch, HeavyHitterTracker, flush, get_top_k
+
+
+class _CountingRedis:
+    """Counts requests sent to the wrapped client (a pipeline ``exec`` is one request)."""
+
+    def __init__(self, client):
+        self.client = client
+        self.requests = 0
+
+    def pipeline(self):
+        pipeline = self.client.pipeline()
+        exec_ = pipeline.exec
+
+        def counted_exec():
+            self.requests += 1
+            return exec_()
+
+        pipeline.exec = counted_exec
+        return pipeline
+
+    def __getattr__(self, name):
+        self.requests += 1
+        return getattr(self.client, name)
+
+
+def test_flush_merges_all_families_in_one_request(memory_redis):
+    trackers = {family: HeavyHitterTracker(family, k=10) for family in ("skill", "location_alt_names")}
+    trackers["skill"].observe(["skill:python", "skill:python", "skill:rust"])
+    trackers["location_alt_names"].observe(["location_alt_names:berlin"])
+    redis = _CountingRedis(memory_redis)
+
+    assert flush(redis, trackers) == 3
+    assert redis.requests == 1
+    assert get_top_k(memory_redis, "skill", k=2) == [("skill:python", 2.0), ("skill:rust", 1.0)]
+    assert memory_redis.ttl(next(iter(memory_redis.keys("hh:skill:*")))) > 0
+
+    # Nothing new to merge: no request at all
+    assert flush(redis, trackers) == 0
+    assert redis.requests == 1
+
+
+def test_sketch_never_underestimates():
+    sketch = CountMinSketch(width=16, depth=3)
+    counts = {f"skill:s{i}": i % 5 + 1 for i in range(40)}
+    for item, count in counts.items():
+        sketch.add(item, count)
+    assert all(sketch.estimate(item) >= count for item, count in counts.items())
+
+    exact = CountMinSketch()
+    assert exact.add("skill:python") == 1
+    assert exact.add("skill:python", 2) == 3
+    assert exact.estimate("skill:python") == 3
+    assert exact.estimate("skill:rust") == 0
+
+
+def test_tracker_keeps_the_heaviest_candidates():
+    tracker = HeavyHitterTracker("skill", k=2)
+    tracker.observe(["skill:a", "skill:b", "skill:c", "", "skill:c", "skill:c", "skill:a"])
+
+    assert tracker.local_top_k() == [("skill:c", 3), ("skill:a", 2)]
+    # Only hits seen while an item was a candidate are flushed: "skill:a" was displaced
+    # by "skill:c" and its first hit dropped, "skill:c" entered on its second hit
+    assert tracker.take_unflushed() == {"skill:c": 2, "skill:a": 1}
+    assert tracker.take_unflushed() == {}
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import types
+
+import hyde_dimensions
+from hyde_dimensions import DIMENSIONS, agreement, extract
+from hyde_models import HydeResult
+
+SECTIONS = {
+    "location": {"regionBasedQuery": 1, "locationDetails": {"operator": "OR", "locations": [{"name": "Berlin"}]},
+                 "skillBasedQuery": 1, "skillDetails": {"operator": "AND", "skills": [{"name": "Stray"}]}},
+    "skill": {"skillBasedQuery": 1, "skillDetails": {"operator": "AND", "skills": [{"name": "Python"}, "Go"]}},
+    "sector": {"sectorBasedQuery": 0, "sectorDetails": {"operator": "OR", "sectors": [{"name": "Fintech"}]}},
+}
+
+
+class _FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def get_completion(self, provider, messages, **kwargs):
+        content = messages[0]["content"]
+        self.prompts.append(content)
+        name = next(name for name, (_, _, details_key, _) in DIMENSIONS.items() if details_key in content)
+        if name == "organisation":
+            raise TimeoutError("provider timed out")
+        text = json.dumps(SECTIONS[name]) if name in SECTIONS else "no json here"
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=text))],
+                                     usage=types.SimpleNamespace(prompt_tokens=10, completion_tokens=5))
+
+
+def test_dimensions_merge_into_one_response():
+    llm = _FakeLLM()
+    result, stats = asyncio.run(extract(llm, "gemini", "python developers in Berlin", hints={"skill": "\nHINT"}))
+
+    assert len(llm.prompts) == len(DIMENSIONS)
+    assert sum(prompt.endswith("\nHINT") for prompt in llm.prompts) == 1
+    response = result["response"]
+    # Each dimension contributes only its own flag and details; the stray skills block is dropped
+    assert response["skillDetails"]["skills"] == [{"name": "Python"}, "Go"]
+    assert response["locationDetails"]["locations"] == [{"name": "Berlin"}]
+    assert "organisationDetails" not in response and "dbQueryDetails" not in response
+    # Disabled sections do not add key components
+    assert result["query_breakdown"]["key_components"] == ["Berlin", "Python", "Go"]
+
+    assert {name: s["ok"] for name, s in stats.items()} == {
+        "location": True, "organisation": False, "sector": True, "skill": True, "db": False}
+    assert stats["skill"]["completion_tokens"] == 5
+
+    model, _ = HydeResult.from_dict(result)
+    assert [skill.name for skill in model.response.skills.items] == ["Python", "Go"]
+    assert not model.response.organisations.enabled
+
+
+def test_agreement_compares_enabled_sections():
+    a = {"response": {"skillBasedQuery": 1, "skillDetails": {"skills": [{"name": "Python"}, {"name": "Go"}]},
+                      "dbBasedQuery": 1, "dbQueryDetails": {"queries": [{"field": "city"}]}}}
+    b = {"response": {"skillBasedQuery": 1, "skillDetails": {"skills": ["python"]},
+                      "dbBasedQuery": 0, "dbQueryDetails": {"queries": [{"field": "city"}]}}}
+    scores = agreement(a, b)
+    assert scores["skill"] == 0.5
+    assert scores["db"] == 0.0
+    assert scores["location"] is None
+
+
+def test_usage_of_tolerates_missing_usage():
+    assert hyde_dimensions.usage_of(object()) == {"prompt_tokens": 0, "completion_tokens": 0}
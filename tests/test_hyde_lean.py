@@ -0,0 +1,87 @@
+import re
+
+import pytest
+
+from hyde_lean import expand, is_lean, lean_examples, to_lean
+from json_extract import extract_json_object
+from prompts.logicalHyde import exampleKeyword
+
+FULL = {
+    "query_breakdown": {"key_components": ["ignored"], "analysis": "prose the lean form drops"},
+    "response": {
+        "regionBasedQuery": 1,
+        "locationDetails": {"operator": "AND", "locations": [{"name": "Bangalore"}, {"name": "Pune", "alt_names": ["Poona"]}]},
+        "organisationBasedQuery": 1,
+        "organisationDetails": {"operator": "OR", "organizations": [
+            {"name": "Google", "temporal": "past"}, {"name": "Stripe", "temporal": "any"}]},
+        "sectorBasedQuery": 1,
+        "sectorDetails": {"operator": "AND", "sectors": [
+            {"name": "Startup", "temporal": "any", "companyStage": {"enabled": True, "sizeRange": {"min": 1, "max": 50}}}]},
+        "skillBasedQuery": 1,
+        "skillDetails": {"operator": "OR", "skills": [
+            {"name": "ML Engineer", "priority": "primary",
+             "regexPatterns": {"keywords": ["\\bml engineer\\b"], "fields": ["linkedinHeadline", "workExperience.title"]}},
+            {"name": "Python", "priority": "secondary",
+             "regexPatterns": {"keywords": ["python"], "fields": ["bio"]}},
+            {"name": "Go", "priority": "primary",
+             "regexPatterns": {"keywords": ["golang"], "fields": ["workExperience.title", "linkedinHeadline",
+                                                                  "workExperience.description", "bio"]}},
+        ]},
+        "dbBasedQuery": 1,
+        "dbQueryDetails": {"operator": "AND", "queries": [{"field": "education.dates", "regex": ".*2023.*",
+                                                           "description": "Graduated in 2023"}]},
+    },
+}
+
+
+def _criteria(full):
+    """What the lean form must preserve: enabled, non-empty sections minus db descriptions."""
+    response = full["response"]
+    kept = {}
+    for flag_key, details_key in (("regionBasedQuery", "locationDetails"), ("organisationBasedQuery", "organisationDetails"),
+                                  ("sectorBasedQuery", "sectorDetails"), ("skillBasedQuery", "skillDetails"),
+                                  ("dbBasedQuery", "dbQueryDetails")):
+        details = response.get(details_key) or {}
+        items = next((v for k, v in details.items() if k != "operator"), [])
+        if response.get(flag_key) and items:
+            if details_key == "dbQueryDetails":
+                items = [{k: v for k, v in item.items() if k != "description"} for item in items]
+            if details_key == "skillDetails":
+                items = [{**item, "regexPatterns": {**item["regexPatterns"], "fields": sorted(item["regexPatterns"]["fields"])}}
+                         if "regexPatterns" in item else item for item in items]
+            kept[details_key] = (details["operator"], items)
+    return kept
+
+
+def test_round_trip_keeps_every_criterion():
+    lean = to_lean(FULL)
+    assert is_lean(lean) and not is_lean(FULL)
+    assert lean["locations"][0] == "Bangalore"
+    assert lean["skills"][0] == {"name": "ML Engineer", "keywords": ["\\bml engineer\\b"], "match": "role"}
+    assert lean["skills"][1]["fields"] == ["bio"]
+    assert "match" not in lean["skills"][2] and "fields" not in lean["skills"][2]
+    assert lean["operators"] == {"locations": "AND", "skills": "OR"}
+
+    full = expand(lean)
+    assert _criteria(full) == _criteria(FULL)
+    assert full["query_breakdown"]["key_components"] == [
+        "Bangalore", "Pune", "Google", "Stripe", "Startup", "ML Engineer", "Python", "Go"]
+    assert full["response"]["organisationDetails"]["organizations"][1]["temporal"] == "any"
+
+
+def test_empty_lean_response_expands_to_an_empty_result():
+    full = expand({})
+    assert full["query_breakdown"]["key_components"] == []
+    assert not any(value for key, value in full["response"].items() if key.endswith("BasedQuery"))
+
+
+@pytest.mark.parametrize("raw", re.findall(r"<ideal_output>(.*?)</ideal_output>", exampleKeyword, re.S))
+def test_prompt_examples_survive_the_round_trip(raw):
+    full, _ = extract_json_object(raw)
+    assert _criteria(expand(to_lean(full))) == _criteria(full)
+
+
+def test_lean_examples_replace_every_ideal_output():
+    examples = lean_examples()
+    assert examples.count("<ideal_output>") == exampleKeyword.count("<ideal_output>")
+    assert "query_breakdown" not in examples
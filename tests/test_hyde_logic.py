@@ -0,0 +1,153 @@
+import asyncio
+import json
+import types
+
+import background_tasks
+from cache_metrics import metrics
+
+RESULT = {
+    "query_breakdown": {"key_components": ["python"], "analysis": ""},
+    "response": {"skillBasedQuery": 1, "skillDetails": {"operator": "AND", "skills": [
+        {"name": "Python", "relatedRoles": ["Data Engineer"]}]}},
+}
+
+
+def _hyde(h, calls):
+    async def completion(provider, **kwargs):
+        calls.append(provider)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(
+            message=types.SimpleNamespace(content=json.dumps(RESULT)))])
+
+    hyde = h.HydeReasoning("gemini", "gemini", fast_path=False, cascade=[])
+    hyde.llm.get_completion = completion
+    return hyde
+
+
+def _describe(monkeypatch, h, described):
+    async def descriptions(keywords, provider="x"):
+        described.extend(keywords)
+        return {k: f"about {k}" for k in keywords}
+
+    monkeypatch.setattr(h, "get_chat_completion_description", descriptions)
+
+
+def test_supplied_entities_bypass_step1_and_flags_skip_stages(hyde_env, monkeypatch):
+    h, calls, described = hyde_env, [], []
+    _describe(monkeypatch, h, described)
+
+    async def no_alt_names(locations, provider="x"):
+        raise AssertionError("location_alt_names is switched off")
+
+    monkeypatch.setattr(h, "process_location_alt_names", no_alt_names)
+
+    result = asyncio.run(_hyde(h, calls).analyze_query(
+        "ignored", analysis_flags={"location_alt_names": False, "colour": "blue"},
+        additional_context={"skills": ["Python"], "locations": ["Berlin"]}))
+
+    assert calls == []
+    assert result["query_breakdown"]["key_components"] == ["Berlin", "Python"]
+    assert result["response"]["regionBasedQuery"] == 1
+    assert "alt_names" not in result["response"]["locationDetails"]["locations"][0]
+    assert result["response"]["skillDetails"]["skills"][0]["description"] == "about Python"
+    assert described == ["Python"]
+
+
+def test_extract_flag_merges_supplied_entities_into_step1(hyde_env, monkeypatch):
+    h, calls, described = hyde_env, [], []
+    _describe(monkeypatch, h, described)
+
+    result = asyncio.run(_hyde(h, calls).analyze_query(
+        "python developers", analysis_flags={"extract": True, "skill_descriptions": False},
+        additional_context={"skills": ["python", "Go"]}))
+
+    assert calls == ["gemini"]
+    skills = result["response"]["skillDetails"]["skills"]
+    assert [skill["name"] for skill in skills] == ["Python", "Go"]
+    assert all("description" not in skill for skill in skills)
+    assert described == []
+
+
+def test_related_roles_are_described_by_the_job_within_the_wait(hyde_env, monkeypatch):
+    h, calls, described = hyde_env, [], []
+    _describe(monkeypatch, h, described)
+
+    async def scenario():
+        result = await _hyde(h, calls).analyze_query(
+            "python developers", alternative_skills=True,
+            analysis_flags={"skill_descriptions": False, "related_roles_wait": 2})
+        await background_tasks.drain(1)
+        return result
+
+    result = asyncio.run(scenario())
+    role = result["response"]["skillDetails"]["skills"][0]["relatedRoles"][0]
+    assert role == {"name": "Data Engineer", "description": "about Data Engineer",
+                    "cache_key": "skill:data engineer"}
+    assert described == ["Data Engineer"]
+
+
+def _step1(skills=("Python",), locations=("Berlin",)):
+    return {"query_breakdown": {"key_components": [], "analysis": ""}, "response": {
+        "skillBasedQuery": int(bool(skills)),
+        "skillDetails": {"operator": "AND", "skills": [{"name": name} for name in skills]},
+        "regionBasedQuery": int(bool(locations)),
+        "locationDetails": {"operator": "OR", "locations": [{"name": name} for name in locations]},
+    }}
+
+
+def test_cascade_rejection_reasons(hyde_env):
+    reject = hyde_env.HydeReasoning._cascade_rejection
+    query = "python developers in berlin"
+
+    assert reject(query, _step1()) is None
+    assert reject(query, {"error": "no json"}) == "no_response"
+    assert reject(query, _step1(skills=(), locations=())) == "empty"
+    assert reject(query, _step1(locations=())) == "missing_location"
+    broken = _step1()
+    broken["response"]["skillDetails"]["skills"] += [7, None, "", {"nameless": 1}]
+    assert reject(query, broken) == "schema"
+
+
+def _cascade(h, outputs, calls):
+    async def completion(provider, **kwargs):
+        calls.append(provider)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(
+            message=types.SimpleNamespace(content=json.dumps(outputs[provider])))])
+
+    hyde = h.HydeReasoning("gemini", "gemini", fast_path=False, cascade=["groq", "gemini"])
+    hyde.llm.get_completion = completion
+    return hyde
+
+
+def test_cascade_accepts_a_good_cheap_answer(hyde_env):
+    calls = []
+    hyde = _cascade(hyde_env, {"groq": _step1(), "gemini": _step1()}, calls)
+
+    result = asyncio.run(hyde._call_hyde_cascade("python developers in berlin"))
+    assert calls == ["groq"]
+    assert result == _step1()
+    step1 = metrics.take()["step1"]
+    assert step1["groq_accepted"] == 1 and "escalations" not in step1
+
+
+def test_cascade_escalates_a_rejected_answer_to_the_fallback(hyde_env):
+    calls = []
+    fallback = _step1(skills=("Python", "Django"))
+    hyde = _cascade(hyde_env, {"groq": _step1(locations=()), "gemini": fallback}, calls)
+
+    result = asyncio.run(hyde._call_hyde_cascade("python developers in berlin"))
+    assert calls == ["groq", "gemini"]
+    assert result == fallback
+    step1 = metrics.take()["step1"]
+    assert (step1["escalations"], step1["escalated_missing_location"], step1["groq_rejected"]) == (1, 1, 1)
+    assert step1["gemini_calls"] == 1
+
+
+def test_last_tier_answer_is_returned_even_when_rejected(hyde_env):
+    calls = []
+    hyde = _cascade(hyde_env, {"groq": _step1(locations=()), "gemini": _step1(locations=())}, calls)
+
+    result = asyncio.run(hyde._call_hyde_cascade("python developers in berlin"))
+    assert calls == ["groq", "gemini"]
+    assert result == _step1(locations=())
+    step1 = metrics.take()["step1"]
+    assert step1["escalations"] == 1 and step1["gemini_rejected"] == 1
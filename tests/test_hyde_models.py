@@ -0,0 +1,103 @@
+from hyde_models import AnalysisFlags, HydeResponse, HydeResult, Issues, RelatedRole
+
+
+def test_related_role_is_a_plain_name_until_enriched():
+    assert RelatedRole("Data Scientist").to_value() == "Data Scientist"
+
+
+def test_related_role_object_always_carries_a_description():
+    pending = RelatedRole("Data Scientist", cache_key="skill:data scientist")
+    assert pending.to_value() == {"name": "Data Scientist", "description": "", "cache_key": "skill:data scientist"}
+    done = RelatedRole("Data Scientist", description="Builds models", cache_key="skill:data scientist")
+    assert done.to_value()["description"] == "Builds models"
+
+
+def test_clean_result_round_trips_without_issues():
+    raw = {
+        "query_breakdown": {"key_components": ["python", "berlin"], "analysis": "skill and place", "note": 1},
+        "response": {
+            "regionBasedQuery": 1,
+            "locationDetails": {"operator": "OR", "locations": [{"name": "Berlin", "alt_names": ["Berlin, DE"]}]},
+            "organisationBasedQuery": 0,
+            "organisationDetails": {"operator": "AND", "organizations": []},
+            "sectorBasedQuery": 0,
+            "sectorDetails": {"operator": "OR", "sectors": []},
+            "skillBasedQuery": 1,
+            "skillDetails": {"operator": "AND", "skills": [
+                {"name": "Python", "temporal": "current", "relatedRoles": ["Developer"], "custom": True},
+            ]},
+            "dbBasedQuery": 0,
+            "dbQueryDetails": {"operator": "AND", "queries": []},
+            "unknownTop": 5,
+        },
+        "extra_key": 2,
+    }
+    result, issues = HydeResult.from_dict(raw)
+    assert issues == []
+    assert result.to_dict() == raw
+
+
+def test_drifted_result_is_repaired_and_issues_recorded():
+    result, issues = HydeResult.from_dict({
+        "query_breakdown": {"key_components": ["python", " ", 3]},
+        "response": {
+            "skillBasedQuery": "true",
+            "skillDetails": {"operator": "and", "skills": [
+                "Python",
+                {"name": "Go", "temporal": "Past", "relatedRoles": "Dev"},
+                {"priority": "high"},
+            ]},
+            "regionBasedQuery": 1,
+            "locationDetails": {"locations": []},
+            "dbBasedQuery": 1,
+            "dbQueryDetails": {"queries": [{"field": "headline"}]},
+            "sectorDetails": {"operator": "XOR", "sectors": []},
+        },
+    })
+    response = result.to_dict()["response"]
+    assert result.key_components == ["python"]
+    assert response["skillBasedQuery"] == 1
+    assert response["skillDetails"]["operator"] == "AND"
+    assert response["skillDetails"]["skills"] == [
+        {"name": "Python"}, {"name": "Go", "temporal": "past", "relatedRoles": ["Dev"]},
+    ]
+    assert response["regionBasedQuery"] == 0
+    assert response["dbBasedQuery"] == 0
+    assert response["sectorDetails"]["operator"] == "OR"
+    assert issues == [
+        "query_breakdown.key_components: dropped 2 empty or non-string item(s)",
+        "regionBasedQuery: enabled without any valid items; disabled",
+        "sectorDetails.operator: unknown operator 'XOR'; using OR",
+        "skillDetails.skills[2]: skill without a name; dropped",
+        "dbQueryDetails.queries[0]: db query on headline without a regex; dropped",
+        "dbBasedQuery: enabled without any valid items; disabled",
+    ]
+
+
+def test_non_object_response_becomes_empty():
+    result, issues = HydeResult.from_dict({"response": "oops"})
+    assert issues == ["response: not an object; using an empty response"]
+    assert result.to_dict() == HydeResult.empty().to_dict()
+    assert all(not section.enabled and not section.items for section in result.response.sections())
+
+
+def test_entities_merge_into_the_response():
+    issues = Issues()
+    result = HydeResult.empty()
+    supplied = HydeResponse.from_entities({"skills": ["Python", {"name": "Go"}], "locations": ["Berlin"]}, issues)
+    result.response.merge(supplied)
+    result.response.merge(HydeResponse.from_entities({"skills": ["python"]}, issues))
+    assert [skill.name for skill in result.response.skills.items] == ["Python", "Go"]
+    assert result.response.locations.enabled == 1
+    assert HydeResponse.from_entities({"skills": []}, issues) is None
+    assert issues == []
+
+
+def test_analysis_flags_parse_known_keys_and_report_the_rest():
+    flags, unknown = AnalysisFlags.from_dict(
+        {"location_alt_names": "false", "related_roles": 1, "related_roles_wait": "-2", "bogus": True})
+    assert (flags.location_alt_names, flags.skill_descriptions, flags.related_roles) == (False, True, True)
+    assert flags.related_roles_wait == 0.0
+    assert unknown == ["bogus"]
+    assert AnalysisFlags.from_dict(None, alternative_skills=True) == (AnalysisFlags(related_roles=True), [])
+    assert AnalysisFlags.from_dict("yes")[1] == ["hyde_analysis_flags"]
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+import jobs
+from cache_metrics import JOBS, metrics
+
+
+def test_jobs_are_handed_to_the_worker(monkeypatch):
+    invoked, ran = [], []
+    monkeypatch.setattr(jobs, "worker_function", lambda: "hyde-worker")
+    monkeypatch.setattr(jobs, "_invoke", lambda function_name, event: invoked.append((function_name, event)))
+    monkeypatch.setattr(jobs, "run", lambda kind, payload: ran.append(kind))
+    metrics.take()
+
+    async def request():
+        assert jobs.submit("refresh", {"family": "skill", "names": ["Python"], "provider": "gemini"}, "a")
+        await jobs.background_tasks.drain(1)
+
+    asyncio.run(request())
+    assert ran == []
+    assert invoked == [("hyde-worker", {"hyde_job": {
+        "kind": "refresh", "payload": {"family": "skill", "names": ["Python"], "provider": "gemini"}}})]
+    assert metrics.take()[JOBS] == {"refresh_handed_off": 1}
+
+
+def test_failed_hand_off_is_counted(monkeypatch):
+    def unavailable(function_name, event):
+        raise RuntimeError("throttled")
+
+    monkeypatch.setattr(jobs, "worker_function", lambda: "hyde-worker")
+    monkeypatch.setattr(jobs, "_invoke", unavailable)
+    metrics.take()
+
+    async def request():
+        jobs.submit("refresh", {"family": "skill", "names": ["Go"], "provider": "gemini"}, "b")
+        await jobs.background_tasks.drain(1)
+
+    asyncio.run(request())
+    assert metrics.take()[JOBS] == {"refresh_handoff_failures": 1}
+
+
+def test_stale_refresh_is_claimed_once_and_run_in_process_without_a_worker(hyde_env, memory_redis, monkeypatch):
+    refreshed = []
+
+    async def refresh(family, names, provider):
+        refreshed.append(names)
+
+    monkeypatch.setattr(hyde_env, "_refresh_entries", refresh)
+    hyde_env.local_cache.set("skill:python", {"description": "stale"})
+
+    async def hits():
+        hyde_env._schedule_refresh("skill", ["Python"])
+        await hyde_env.background_tasks.drain(1)
+        # The refresh lock is held: a later stale hit does not queue a second job
+        hyde_env._schedule_refresh("skill", ["Python"])
+        await hyde_env.background_tasks.drain(1)
+
+    asyncio.run(hits())
+    assert refreshed == [["Python"]]
+    assert memory_redis.get("refresh_lock:skill:python")
+    # The stale local copy is dropped so the refreshed entry is read back from Redis
+    assert hyde_env.local_cache.get("skill:python") is None
+    assert metrics.take()[JOBS] == {"refresh_in_process": 1, "refresh_runs": 1}
+
+
+def test_worker_event_runs_the_job(monkeypatch, memory_redis):
+    import lambda_handler
+
+    ran = []
+
+    async def run(kind, payload):
+        ran.append((kind, payload))
+
+    monkeypatch.setattr(lambda_handler, "redis_client", memory_redis)
+    monkeypatch.setattr(lambda_handler.jobs, "run", run)
+    event = {"hyde_job": {"kind": "refresh", "payload": {"family": "skill", "names": ["Rust"], "provider": "gemini"}}}
+    result = lambda_handler.lambda_handler(event, None)
+    assert result["statusCode"] == 200
+    assert ran == [("refresh", event["hyde_job"]["payload"])]
+
+
+def test_unknown_job_kind_raises():
+    with pytest.raises(ValueError):
+        asyncio.run(jobs.run("bogus", {}))
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from json_extract import JSONExtractionError, extract_json_object, try_extract_json_object
+
+RESULT = {
+    "query_breakdown": {"key_components": ["Berlin", "Python"], "analysis": "x"},
+    "response": {
+        "regionBasedQuery": 1,
+        "locationDetails": {"operator": "OR", "locations": [{"name": "Berlin"}, {"name": "San Francisco"}]},
+        "skillBasedQuery": 1,
+        "skillDetails": {"operator": "AND", "skills": [{"name": "Python"}, {"name": "Machine Learning"}]},
+        "dbBasedQuery": 1,
+        "dbQueryDetails": {"operator": "AND", "queries": [{"field": "education.school", "value": "IIT"}]},
+    },
+}
+BODY = json.dumps(RESULT)
+
+
+def _cut_after(marker: str) -> str:
+    return BODY[:BODY.index(marker) + len(marker)]
+
+
+def test_bare_object():
+    assert extract_json_object(BODY) == (RESULT, False)
+
+
+def test_fenced_object_with_prose():
+    text = f"Here you go:\n```json\n{json.dumps(RESULT, indent=2)}\n```\nAnything else?"
+    assert extract_json_object(text) == (RESULT, False)
+
+
+def test_trailing_brace_in_prose_falls_back_to_scan():
+    text = BODY + "\nNote: use {placeholders} carefully"
+    assert extract_json_object(text) == (RESULT, False)
+
+
+def test_cut_between_members_keeps_everything_written():
+    parsed, repaired = extract_json_object(_cut_after('{"name": "Python"}'))
+    assert repaired
+    assert parsed["response"]["skillDetails"]["skills"] == [{"name": "Python"}]
+    assert parsed["response"]["locationDetails"]["locations"] == RESULT["response"]["locationDetails"]["locations"]
+
+
+def test_cut_inside_location_name_is_dropped():
+    parsed, repaired = extract_json_object(_cut_after('"San Fra'))
+    assert repaired
+    names = [loc.get("name") for loc in parsed["response"]["locationDetails"]["locations"]]
+    assert "San Fra" not in names
+    assert "Berlin" in names
+
+
+def test_cut_inside_skill_name_is_dropped():
+    parsed, repaired = extract_json_object(_cut_after('"Machine Lea'))
+    assert repaired
+    names = [skill.get("name") for skill in parsed["response"]["skillDetails"]["skills"]]
+    assert "Machine Lea" not in names
+    assert names[0] == "Python"
+
+
+def test_cut_inside_db_field_is_dropped():
+    parsed, repaired = extract_json_object(_cut_after('"education.sch'))
+    assert repaired
+    queries = parsed["response"]["dbQueryDetails"].get("queries", [])
+    assert all(query.get("field") != "education.sch" for query in queries)
+    assert parsed["response"]["skillDetails"] == RESULT["response"]["skillDetails"]
+
+
+def test_cut_inside_key_drops_the_member():
+    parsed, repaired = extract_json_object('{"name": "Berlin", "alt_na')
+    assert (parsed, repaired) == ({"name": "Berlin"}, True)
+
+
+def test_cut_inside_number_drops_the_member():
+    parsed, repaired = extract_json_object('{"name": "Berlin", "radius_km": 12')
+    assert (parsed, repaired) == ({"name": "Berlin"}, True)
+    parsed, _ = extract_json_object('{"skillBasedQuery": 1, "regionBasedQuery": 1')
+    assert parsed == {"skillBasedQuery": 1}
+
+
+def test_escaped_quotes_are_not_string_ends():
+    parsed, _ = extract_json_object('{"analysis": "say \\"hi\\" {not a brace}", "n": 1}')
+    assert parsed == {"analysis": 'say "hi" {not a brace}', "n": 1}
+
+
+def test_cut_right_after_opener_leaves_an_empty_container():
+    assert extract_json_object('{"skills": [') == ({"skills": []}, True)
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "{\"a\": 1 2}"])
+def test_unrecoverable(text):
+    with pytest.raises(JSONExtractionError):
+        extract_json_object(text)
+    assert try_extract_json_object(text) is None
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+import lambda_handler
+
+
+@pytest.fixture
+def handler(monkeypatch, memory_redis):
+    writes = []
+    drains = []
+    monkeypatch.setattr(lambda_handler, "redis_client", memory_redis)
+    monkeypatch.setattr(lambda_handler, "get_search_document", lambda search_id, user_id=None: {"_id": search_id})
+    monkeypatch.setattr(lambda_handler, "update_search_document",
+                        lambda search_id, user_id=None, set_fields=None, **kwargs: writes.append(set_fields))
+
+    async def drain(timeout):
+        drains.append(timeout)
+        return 0
+
+    monkeypatch.setattr(lambda_handler.background_tasks, "drain", drain)
+    return lambda_handler, writes, drains
+
+
+EVENT = {"searchId": "search-1", "userId": "6797bf304791caa516f6da9e", "query": "python developers", "flags": {}}
+
+
+def test_failure_writes_the_error_and_drains(handler, monkeypatch):
+    module, writes, drains = handler
+
+    async def analyze_query(self, query, alternative_skills=False, analysis_flags=None,
+                            additional_context=None, on_progress=None, search_document=None):
+        raise RuntimeError("step 1 failed")
+
+    monkeypatch.setattr(module.HydeReasoning, "analyze_query", analyze_query)
+
+    result = asyncio.run(module._run(EVENT))
+    assert result["statusCode"] == 500
+    assert drains == [module.BACKGROUND_DRAIN_SECONDS]
+    assert [w.get("status") for w in writes] == [module.SearchStatus.ERROR]
+
+
+def test_success_passes_the_document_for_late_role_patches(handler, monkeypatch):
+    module, writes, drains = handler
+    seen = {}
+
+    async def analyze_query(self, query, alternative_skills=False, analysis_flags=None,
+                            additional_context=None, on_progress=None, search_document=None):
+        seen["document"] = search_document
+        return {"query_breakdown": {}, "response": {}}
+
+    monkeypatch.setattr(module.HydeReasoning, "analyze_query", analyze_query)
+
+    assert asyncio.run(module._run(EVENT))["statusCode"] == 200
+    assert seen["document"] == {"search_id": "search-1", "user_id": EVENT["userId"]}
+    assert [w["status"] for w in writes] == [module.SearchStatus.HYDE_COMPLETE]
+    assert drains == [module.BACKGROUND_DRAIN_SECONDS]
+
+
+def _completed_doc(status):
+    roles = [{"name": "Data Scientist", "description": "", "cache_key": "skill:data scientist"},
+             {"name": "ML Engineer", "description": "Already described"}]
+    return {"status": status, "hydeAnalysis": {"response": {"skillDetails": {
+        "operator": "AND", "skills": [{"name": "Python", "relatedRoles": roles}]}}}}
+
+
+def test_worker_patches_empty_role_descriptions_once_completed(handler, monkeypatch):
+    module, writes, _ = handler
+    docs = iter([_completed_doc(module.SearchStatus.HYDE_PARTIAL), _completed_doc(module.SearchStatus.HYDE_COMPLETE)])
+    monkeypatch.setattr(module, "get_search_document", lambda search_id, user_id=None: next(docs))
+    monkeypatch.setattr(module, "PATCH_POLL_SECONDS", 0)
+
+    document = {"search_id": "search-1", "user_id": "u"}
+    descriptions = {"Data Scientist": "Builds models", "ML Engineer": "Ships models"}
+    assert asyncio.run(module.patch_related_roles(document, descriptions))
+    roles = writes[0]["hydeAnalysis.response.skillDetails"]["skills"][0]["relatedRoles"]
+    assert [role["description"] for role in roles] == ["Builds models", "Already described"]
+
+
+def test_worker_drops_the_patch_when_the_search_failed(handler, monkeypatch):
+    module, writes, _ = handler
+    monkeypatch.setattr(module, "get_search_document",
+                        lambda search_id, user_id=None: _completed_doc(module.SearchStatus.ERROR))
+
+    document = {"search_id": "search-1", "user_id": "u"}
+    assert not asyncio.run(module.patch_related_roles(document, {"Data Scientist": "Builds models"}))
+    assert writes == []
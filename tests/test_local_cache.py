@@ -0,0 +1,59 @@
+from local_cache import _ENTRY_OVERHEAD_BYTES, LocalCache
+
+
+def _entry_size(key, payload_size):
+    return payload_size + len(key) + _ENTRY_OVERHEAD_BYTES
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = LocalCache(max_bytes=2 * _entry_size("skill:a", 100), max_entries=10, ttl_seconds=60)
+    cache.set("skill:a", "a", size=100)
+    cache.set("skill:b", "b", size=100)
+    assert cache.get("skill:a") == "a"  # b is now the least recently used
+
+    cache.set("skill:c", "c", size=100)
+    assert cache.get("skill:b") is None
+    assert cache.get_many(["skill:a", "skill:c"]) == {"skill:a": "a", "skill:c": "c"}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_entry_cap_and_oversized_values():
+    cache = LocalCache(max_bytes=10_000, max_entries=2, ttl_seconds=60)
+    for key in ("skill:a", "skill:b", "skill:c"):
+        cache.set(key, key, size=1)
+    assert cache.stats()["entries"] == 2
+    assert cache.get("skill:a") is None
+
+    cache.set("skill:huge", "x", size=10_000)
+    assert cache.get("skill:huge") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_expired_entries_are_misses():
+    cache = LocalCache(max_bytes=10_000, max_entries=10, ttl_seconds=60)
+    cache.set("skill:a", "a", size=1, ttl_seconds=0)
+    assert cache.get("skill:a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_pinned_entries_survive_lru_pressure_within_their_budget():
+    size = _entry_size("skill:a", 100)
+    cache = LocalCache(max_bytes=size, max_entries=10, ttl_seconds=60,
+                       pinned_max_bytes=size, pin_ttl_seconds=60)
+    assert cache.pin("skill:a", "a", size=100)
+    assert not cache.pin("skill:b", "b", size=100)  # pinned budget is full
+
+    cache.set("skill:c", "c", size=100)
+    cache.set("skill:d", "d", size=100)
+    assert cache.get("skill:a") == "a"
+    assert cache.get("skill:c") is None
+    assert cache.pinned_keys() == ["skill:a"]
+
+    # A refresh updates the pinned copy in place instead of moving it to the LRU
+    cache.set("skill:a", "a2", size=100)
+    assert cache.get("skill:a") == "a2"
+    assert cache.stats()["pinned_bytes"] == size
+
+    cache.delete("skill:a")
+    assert cache.pin("skill:b", "b", size=100)
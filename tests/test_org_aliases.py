@@ -0,0 +1,85 @@
+import asyncio
+
+import background_tasks
+import org_aliases
+from cache_codec import decode_value, encode_value
+from hyde_models import Organization
+from local_cache import LocalCache
+
+
+def _org(name, aliases):
+    return Organization(name=name, aliases=list(aliases))
+
+
+def _apply(redis, cache, organisations):
+    async def run():
+        changed = org_aliases.apply(redis, cache, organisations)
+        await background_tasks.drain(1)
+        return changed
+
+    return asyncio.run(run())
+
+
+def test_single_generated_alias_is_not_persisted_as_verified(memory_redis):
+    cache = LocalCache()
+    org = _org("Acme Robotics", ["Acme Bots"])
+    _apply(memory_redis, cache, [org])
+    assert org.aliases == ["Acme Bots"]
+    stored = decode_value(memory_redis.get("org_aliases:acme robotics"))
+    assert stored["aliases"] == []
+    assert stored["candidates"] == {"Acme Bots": 1}
+
+
+def test_alias_is_promoted_after_repeated_queries(memory_redis):
+    cache = LocalCache()
+    for _ in range(org_aliases.PROMOTE_AFTER):
+        _apply(memory_redis, cache, [_org("Acme Robotics", ["Acme Bots"])])
+    stored = decode_value(memory_redis.get("org_aliases:acme robotics"))
+    assert stored["aliases"] == ["Acme Bots"]
+    assert "Acme Bots" not in stored["candidates"]
+
+
+def test_verified_aliases_come_before_generated_ones(memory_redis):
+    memory_redis.set("org_aliases:acme robotics", encode_value(
+        {"name": "Acme Robotics", "aliases": ["Acme Inc"], "candidates": {}, "updated_at": 0}))
+    org = _org("Acme Robotics", ["Hallucinated Co", "acme inc"])
+    _apply(memory_redis, LocalCache(), [org])
+    assert org.aliases == ["Acme Inc", "Hallucinated Co"]
+    stored = decode_value(memory_redis.get("org_aliases:acme robotics"))
+    assert stored["aliases"] == ["Acme Inc"]
+
+
+def test_lexicon_aliases_are_trusted(memory_redis):
+    org = _org("Google", [])
+    _apply(memory_redis, LocalCache(), [org])
+    assert "Alphabet" in org.aliases
+    assert "Alphabet" in decode_value(memory_redis.get("org_aliases:google"))["aliases"]
+
+
+def test_legacy_entry_without_candidates(memory_redis):
+    memory_redis.set("org_aliases:acme robotics", encode_value({"name": "Acme Robotics", "aliases": ["Acme Inc"]}))
+    org = _org("Acme Robotics", [])
+    _apply(memory_redis, LocalCache(), [org])
+    assert org.aliases == ["Acme Inc"]
+
+
+def test_hints_read_the_local_tier_and_warm_it_in_the_background(memory_redis):
+    memory_redis.set("org_aliases:google", encode_value({"name": "Google", "aliases": ["Alphabet"]}))
+    cache = LocalCache()
+    # A long query: the unigram must not be crowded out by longer n-grams
+    query = "senior staff machine learning infrastructure engineers with distributed systems depth who worked at google"
+
+    async def run():
+        first = org_aliases.hints(memory_redis, cache, query)
+        await background_tasks.drain(1)
+        return first, org_aliases.hints(memory_redis, cache, query)
+
+    first, second = asyncio.run(run())
+    assert first == ""
+    assert "- Google: Alphabet" in second
+
+
+def test_merge_aliases_dedupes_and_caps():
+    merged = org_aliases.merge_aliases("Meta", ["Facebook", "meta"], ["facebook", *[f"a{i}" for i in range(10)]])
+    assert merged[0] == "Facebook"
+    assert len(merged) == org_aliases.MAX_ALIASES
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import time
+
+from cache_policy import LOCATION_FAMILY, SKILL_FAMILY, unwrap_value
+from prewarm import Checkpoint, MockProvider, Prewarmer, RateLimiter
+
+
+def _skill(redis, norm):
+    return unwrap_value(SKILL_FAMILY, json.loads(redis.get(f"{SKILL_FAMILY}:{norm}")))[0]
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(memory_redis, tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    mock = MockProvider()
+
+    async def flaky_describe(keywords, provider):
+        if "Rust" in keywords:
+            raise RuntimeError("provider timeout")
+        return await mock.describe(keywords, provider)
+
+    records = [{"query": "rust devs", "result": {"response": {"skillDetails": {"skills": [{"name": "Rust"}]}}}}]
+    first = Prewarmer(memory_redis, flaky_describe, mock.alt_names, batch_size=1, checkpoint=Checkpoint(path))
+    asyncio.run(first.run(records, ["Python"], ["Berlin"]))
+    assert first.stats["failed_batches"] == 1
+    assert memory_redis.get("skill:rust") is None
+
+    resumed = Prewarmer(memory_redis, mock.describe, mock.alt_names, batch_size=1, checkpoint=Checkpoint(path))
+    calls_before = dict(mock.calls)
+    asyncio.run(resumed.run(records, ["Python"], ["Berlin"]))
+    # Only the failed batch runs again; Python and Berlin are checkpointed as done
+    assert mock.calls["describe"] - calls_before["describe"] == 1
+    assert mock.calls["alt_names"] == calls_before["alt_names"]
+    assert _skill(memory_redis, "rust")["description"] == "Mock description for Rust."
+    assert resumed.stats[SKILL_FAMILY] == 1 and resumed.stats[LOCATION_FAMILY] == 0
+
+
+def test_rate_limiter_spaces_out_call_starts():
+    limiter = RateLimiter(rate=50)
+
+    async def five_calls():
+        await asyncio.gather(*[limiter.acquire() for _ in range(5)])
+
+    t0 = time.monotonic()
+    asyncio.run(five_calls())
+    assert time.monotonic() - t0 >= 4 / 50 * 0.9
+
+
+def test_rate_limiter_without_a_rate_never_waits():
+    limiter = RateLimiter()
+
+    async def many_calls():
+        await asyncio.gather(*[limiter.acquire() for _ in range(100)])
+
+    t0 = time.monotonic()
+    asyncio.run(many_calls())
+    assert time.monotonic() - t0 < 0.05
+
+
+def test_existing_entries_are_skipped_unless_forced(memory_redis):
+    memory_redis.set("skill:python", json.dumps({"description": "curated", "embeddings": [0.5]}))
+    mock = MockProvider()
+
+    prewarmer = Prewarmer(memory_redis, mock.describe, mock.alt_names)
+    asyncio.run(prewarmer.fill(SKILL_FAMILY, ["Python", "Rust"]))
+    assert prewarmer.stats["skipped_cached"] == 1
+    assert json.loads(memory_redis.get("skill:python")) == {"description": "curated", "embeddings": [0.5]}
+
+    # An entry written by someone else after the pending check is not overwritten (NX)
+    memory_redis.set("skill:go", json.dumps({"description": "racing writer"}))
+    assert not prewarmer._write(SKILL_FAMILY, "go", {"description": "pre-warm"}, "Go")
+    assert json.loads(memory_redis.get("skill:go")) == {"description": "racing writer"}
+
+    forced = Prewarmer(memory_redis, mock.describe, mock.alt_names, force=True)
+    asyncio.run(forced.fill(SKILL_FAMILY, ["Python"]))
+    value = _skill(memory_redis, "python")
+    assert value["description"] == "Mock description for Python."
+    assert value["embeddings"] == [0.5]
@@ -0,0 +1,49 @@
+import pytest
+
+from hyde_models import HydeResult
+from profile_schema import resolve, validate_db_queries
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("education.school", ("education.school", "valid")),
+    ("education.schoolName", ("education.school", "mapped")),
+    ("Education.Field_Of-Study", ("education.field_of_study", "mapped")),
+    ("accomplishments.Certificatons.certificateName", ("accomplishments.Certifications.certificateName", "mapped")),
+    ("experience.titel", ("workExperience.title", "mapped")),
+    ("foo.bar", (None, "unknown")),
+])
+def test_resolve(name, expected):
+    assert resolve(name) == expected
+
+
+def _db_section(*fields):
+    result, issues = HydeResult.from_dict({"response": {"dbBasedQuery": 1, "dbQueryDetails": {
+        "queries": [{"field": field, "regex": "x"} for field in fields]}}})
+    return result.response.db_queries, issues
+
+
+def test_validate_maps_and_drops_fields():
+    section, issues = _db_section("education.school", "education.fieldOfStudy", "foo.bar")
+    counts = validate_db_queries(section, issues)
+    assert counts == {"valid": 1, "mapped": 1, "dropped": 1, "unknown": 1}
+    assert [query.field for query in section.items] == ["education.school", "education.field_of_study"]
+    assert section.enabled == 1
+    assert issues == [
+        "dbQueryDetails.queries[1]: mapped field 'education.fieldOfStudy' to 'education.field_of_study'",
+        "dbQueryDetails.queries[2]: unknown field 'foo.bar'; dropped",
+    ]
+
+
+def test_validate_keeps_unknown_fields_when_asked():
+    section, issues = _db_section("foo.bar")
+    counts = validate_db_queries(section, issues, keep_unknown=True)
+    assert counts["dropped"] == 0
+    assert [query.field for query in section.items] == ["foo.bar"]
+    assert issues == ["dbQueryDetails.queries[0]: unknown field 'foo.bar'; kept"]
+
+
+def test_section_without_queryable_fields_is_disabled():
+    section, issues = _db_section("foo.bar", "nope")
+    validate_db_queries(section, issues)
+    assert section.items == [] and section.enabled == 0
+    assert issues[-1] == "dbBasedQuery: no queryable fields left; disabled"
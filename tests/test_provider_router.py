@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+import provider_router
+from provider_router import complexity, pick, resolve, tiers
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("groq_llama", "groq_oss"),
+    ("gpt-4o", "openai4o"),
+    ("Gemini", "gemini"),
+    ("GPT-4.1-mini", "azure-gpt-4.1-mini"),
+    ("claude-3-5-sonnet-20240620", "anthropic_sonnet"),
+    ("azure_gpt_5_mini", "azure-gpt-5-mini"),
+    ("foo", "azure-gpt-4.1-mini"),
+    (None, "azure-gpt-4.1-mini"),
+])
+def test_resolve(name, expected):
+    assert resolve(name) == expected
+
+
+def test_complexity_orders_queries():
+    simple = complexity("python developers")
+    hard = complexity("ex-google ml engineers in bangalore with 5+ years, not at startups")
+    assert 0 < simple < 1 / 3 < hard < 1
+    assert pick(simple, {}) == tiers()[0]
+
+
+def test_pick_hands_over_from_a_rejected_tier():
+    first, second = tiers()[:2]
+    stats = {first: {"calls": 100, "ms": 500, "reject_rate": 0.39}}
+    assert pick(0.1, stats) == second
+    # Too few calls to trust
+    assert pick(0.1, {first: {"calls": 5, "ms": 500, "reject_rate": 0.9}}) == first
+
+
+@pytest.fixture
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(provider_router, "_stats", {})
+    monkeypatch.setattr(provider_router, "_loaded_at", 0.0)
+
+
+def test_failed_load_is_not_retried_per_query(monkeypatch, fresh_stats):
+    calls = []
+
+    def failing(redis, hours=provider_router.STATS_HOURS):
+        calls.append(redis)
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(provider_router, "load_stats", failing)
+
+    async def queries():
+        for _ in range(5):
+            assert provider_router.learned_stats("redis") == {}
+            await provider_router.background_tasks.drain(1)
+
+    asyncio.run(queries())
+    assert len(calls) == 1
+
+
+def test_no_coroutine_is_built_outside_a_loop(monkeypatch, fresh_stats):
+    built = []
+    monkeypatch.setattr(provider_router.asyncio, "to_thread", lambda *args: built.append(args))
+    assert provider_router.learned_stats("redis") == {}
+    assert built == []
+    # Not claimed either: the next call inside a loop still loads
+    assert provider_router._loaded_at == 0.0
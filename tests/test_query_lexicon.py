@@ -0,0 +1,109 @@
+import pytest
+
+import query_lexicon
+from hyde_models import HydeResult
+
+
+def _response(query):
+    result, confidence, _ = query_lexicon.analyse(query)
+    assert result is not None, query
+    return result["response"], confidence
+
+
+def _names(section):
+    return [item["name"] for item in section[next(k for k in section if k != "operator")]]
+
+
+def test_simple_query_is_answered_with_full_confidence():
+    response, confidence = _response("python developers in berlin")
+    assert confidence == 1.0
+    assert _names(response["locationDetails"]) == ["Berlin"]
+    assert response["skillDetails"]["operator"] == "AND"
+    assert _names(response["skillDetails"]) == ["Python", "Software Developer"]
+
+
+def test_result_validates_without_issues():
+    result, _, _ = query_lexicon.analyse("ex-google PMs in bangalore")
+    _, issues = HydeResult.from_dict(result)
+    assert not issues
+
+
+def test_temporal_markers():
+    response, _ = _response("ex-google engineers")
+    assert response["organisationDetails"]["organizations"][0]["temporal"] == "past"
+    response, _ = _response("people who worked at google")
+    assert response["organisationDetails"]["organizations"][0]["temporal"] == "any"
+    response, _ = _response("engineers at google")
+    assert response["organisationDetails"]["organizations"][0]["temporal"] == "current"
+
+
+def test_or_between_alternatives_of_one_section():
+    response, _ = _response("python or golang")
+    assert response["skillDetails"]["operator"] == "OR"
+    response, _ = _response("engineers from google or meta")
+    assert response["organisationDetails"]["operator"] == "OR"
+    assert response["skillDetails"]["operator"] == "AND"
+
+
+def test_or_joining_only_part_of_a_section_falls_back():
+    # (Java OR Python) AND Developer cannot be one skill operator
+    assert query_lexicon.analyse("java or python developers") == (None, 0.0, [])
+
+
+def test_and_between_organisations_is_kept():
+    response, _ = _response("worked at google and meta")
+    assert response["organisationDetails"]["operator"] == "AND"
+
+
+def test_organisations_without_connective_default_to_or():
+    response, _ = _response("ex google meta engineers")
+    assert response["organisationDetails"]["operator"] == "OR"
+
+
+def test_or_across_sections_falls_back():
+    assert query_lexicon.analyse("google or python")[0] is None
+
+
+def test_mixed_connectives_fall_back():
+    assert query_lexicon.analyse("python and django or golang developers")[0] is None
+
+
+def test_locations_stay_or():
+    response, _ = _response("python developers in berlin and munich")
+    assert response["locationDetails"]["operator"] == "OR"
+    assert _names(response["locationDetails"]) == ["Berlin", "Munich"]
+
+
+@pytest.mark.parametrize("query", [
+    "python developers not in berlin",
+    "engineers with 5 years of experience",
+    "senior python developers",
+])
+def test_blockers_fall_back(query):
+    result, confidence, unknown = query_lexicon.analyse(query)
+    assert result is None and confidence == 0.0 and unknown
+
+
+def test_unknown_words_lower_confidence():
+    result, confidence, unknown = query_lexicon.analyse("python developers in berlin fintech")
+    assert result is not None
+    assert unknown == ["fintech"]
+    assert confidence == pytest.approx(0.8)
+
+
+def test_scan_longest_match_first():
+    matches, unknown, blockers = query_lexicon.scan("machine learning engineers in new delhi")
+    assert [term.name for term, _ in matches][-1] == "Delhi"
+    assert not unknown and not blockers
+
+
+def test_short_keywords_are_word_anchored():
+    import re
+
+    response, _ = _response("swift and aws developers")
+    keywords = {item["name"]: item["regexPatterns"]["keywords"] for item in response["skillDetails"]["skills"]}
+    assert keywords["Swift"] == ["swift", r"\bios\b"]
+    assert r"\baws\b" in keywords["AWS"]
+    pattern = "|".join(keywords["Swift"])
+    assert re.search(pattern, "iOS developer", re.I)
+    assert not re.search(pattern, "Studios and radios", re.I)
@@ -0,0 +1,67 @@
+import re
+
+import pytest
+
+from hyde_models import HydeResult
+from regex_safety import MAX_PATTERN_LENGTH, merge_patterns, vet_pattern, vet_skill_patterns
+
+
+@pytest.mark.parametrize("pattern, reason", [
+    (r"(\w+\s?)+ engineer", "nested unbounded quantifiers"),
+    ("(a+)+b", "nested unbounded quantifiers"),
+    ("(a|ab)*c", "repeated alternation with overlapping branches"),
+    (r"(x)\1", "backreference"),
+    ("a*", "matches the empty string (would match every profile)"),
+    ("  .*  ", "empty pattern"),
+    ("x" * (MAX_PATTERN_LENGTH + 1), f"longer than {MAX_PATTERN_LENGTH} characters"),
+])
+def test_unsafe_patterns_are_rejected(pattern, reason):
+    assert vet_pattern(pattern) == (None, reason)
+
+
+@pytest.mark.parametrize("pattern, safe", [
+    ("c++", r"c\+\+"),
+    ("c#(", r"c#\("),
+    (".*ai research.*", "ai research"),
+    (r"\bml\b", r"\bml\b"),
+])
+def test_safe_patterns_are_kept_or_rewritten(pattern, safe):
+    assert vet_pattern(pattern)[0] == safe
+
+
+def test_merged_alternation_matches_like_the_keywords():
+    keywords = ["data scien", "data scientist", "machine learning", "ml ops", r"\bnlp\b", "a|b"]
+    combined = merge_patterns(keywords)
+    # "data scientist" contains "data scien" and is dropped from the OR
+    assert "scientist" not in combined
+    for text in ("senior data scientist", "machine learning lead", "ml ops", "nlp", "b", "web dev"):
+        assert bool(re.search(combined, text)) == any(re.search(k, text) for k in keywords), text
+    assert merge_patterns([]) is None
+
+
+def test_inline_flags_are_scoped_to_their_keyword():
+    assert vet_pattern("(?i)python") == ("(?i:python)", "scoped flags as '(?i:python)'")
+    assert vet_pattern("py(?i)thon") == (None, "inline global flags")
+    assert vet_pattern("(?a)python") == (None, "inline global flags")
+    safe = [vet_pattern(k)[0] for k in ("Django", "(?i)python", "Flask")]
+    combined = merge_patterns(safe)
+    # The flag no longer applies to the keywords after it, and the alternation compiles
+    assert re.search(combined, "PYTHON")
+    assert not re.search(combined, "flask") and re.search(combined, "Flask")
+
+
+def test_vet_skill_patterns_rewrites_in_place_and_notes_rejections():
+    result, issues = HydeResult.from_dict({"response": {"skillBasedQuery": 1, "skillDetails": {"skills": [
+        {"name": "C++", "regexPatterns": {"keywords": ["c++", r"(\w+\s?)+ dev", "cpp"]}},
+        {"name": "Go"},
+    ]}}})
+    assert issues == []
+    rejected = vet_skill_patterns(result.response.skills.items, issues)
+    patterns = result.response.skills.items[0].regex_patterns
+    assert rejected == 1
+    assert patterns.keywords == [r"c\+\+", "cpp"]
+    assert re.search(patterns.combined, "cpp") and re.search(patterns.combined, "c++")
+    assert issues == [
+        r"skillDetails.skills[0].regexPatterns: 'c++': rewritten as literal 'c\\+\\+'",
+        r"skillDetails.skills[0].regexPatterns: '(\\w+\\s?)+ dev': rejected (nested unbounded quantifiers)",
+    ]
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import time
+import types
+
+import pytest
+
+import background_tasks
+import speculation
+from cache_metrics import metrics
+
+
+def test_generation_in_scheduled_work_is_not_counted_as_speculation():
+    async def scenario():
+        async def refresh(names):
+            speculation.record_generation(names)
+
+        async def work(names):
+            speculation.record_generation(names)
+            # e.g. a stale refresh queued by the lookup the speculative batch runs
+            background_tasks.schedule("test:refresh", refresh(["django"]))
+
+        run = speculation.Speculation()
+        run.start("skill", ["python"], work)
+        await background_tasks.wait_for(run.tasks["skill"], None)
+        await background_tasks.wait_for("test:refresh", None)
+        return run
+
+    run = asyncio.run(scenario())
+    assert run.llm_calls == 1
+    assert run.generated == {"skill": {"python"}}
+
+
+def test_reconcile_counts_and_bounded_wait():
+    async def scenario():
+        async def slow(names):
+            await asyncio.sleep(5)
+
+        run = speculation.Speculation()
+        run.start("skill", ["python", "rust"], slow)
+        started = time.perf_counter()
+        counts = await run.reconcile({"skill": ["Python"]}, timeout=0.05)
+        waited = time.perf_counter() - started
+        await background_tasks.drain(0)
+        return counts, waited
+
+    metrics.take()
+    counts, waited = asyncio.run(scenario())
+    assert waited < 1
+    assert counts["speculated"] == 2 and counts["used"] == 1 and counts["wasted"] == 1
+    assert metrics.take()["speculation"]["used"] == 1
+
+
+RESULT = {
+    "query_breakdown": {"key_components": [], "analysis": ""},
+    "response": {"skillBasedQuery": 1, "skillDetails": {"operator": "AND", "skills": [{"name": "Python"}]}},
+}
+
+
+def test_structure_is_published_before_speculation_finishes(hyde_env, monkeypatch):
+    h = hyde_env
+    monkeypatch.setattr(h, "SPECULATION_ENABLED", True)
+    monkeypatch.setattr(h, "SPECULATION_WAIT_SECONDS", 0.3)
+
+    async def slow_descriptions(keywords, provider="x"):
+        await asyncio.sleep(0.3)
+        return {k: f"about {k}" for k in keywords}
+
+    monkeypatch.setattr(h, "get_chat_completion_description", slow_descriptions)
+
+    async def completion(provider, **kwargs):
+        await asyncio.sleep(0.01)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(
+            message=types.SimpleNamespace(content=json.dumps(RESULT)))])
+
+    events = []
+
+    async def on_progress(stage, payload):
+        events.append((stage, time.perf_counter()))
+
+    async def scenario():
+        hyde = h.HydeReasoning("gemini", "gemini", cascade=[])
+        hyde.llm.get_completion = completion
+        started = time.perf_counter()
+        result = await hyde.analyze_query("python developers", on_progress=on_progress)
+        await background_tasks.drain(1)
+        return started, result
+
+    started, result = asyncio.run(scenario())
+    structure_at = dict(events)["structure"]
+    assert structure_at - started < 0.25
+    assert result["response"]["skillDetails"]["skills"][0]["description"].lower() == "about python"
+    # Reconciled: the enrichment stage reused the speculative batch
+    assert metrics.take()["speculation"]["used"] == 1
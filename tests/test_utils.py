@@ -0,0 +1,49 @@
+import pytest
+
+from utils import legacy_normalize_text, normalize_text
+
+
+@pytest.mark.parametrize("text, key", [
+    ("  Senior   Python/Django ", "senior python django"),
+    ("C#/.NET", "c net"),
+    ("São Paulo", "sao paulo"),
+    ("Zürich", "zurich"),
+    ("München  (DE)", "munchen de"),
+    ("Straße", "strasse"),
+    ("Łódź", "lodz"),
+    ("Ｐｙｔｈｏｎ", "python"),
+])
+def test_latin_input_folds_to_ascii(text, key):
+    assert normalize_text(text) == key
+
+
+@pytest.mark.parametrize("text, key", [
+    ("İstanbul", "istanbul"),
+    ("ISTANBUL", "istanbul"),
+    ("Diyarbakır", "diyarbakir"),
+    ("DIYARBAKIR", "diyarbakir"),
+])
+def test_turkish_dotted_and_dotless_i_share_a_key(text, key):
+    assert normalize_text(text) == key
+
+
+@pytest.mark.parametrize("text, key", [
+    ("東京", "東京"),
+    ("서울", "서울"),
+    ("Москва", "москва"),
+    ("हिन्दी", "हिन्दी"),
+    ("北京・上海", "北京 上海"),
+])
+def test_other_scripts_are_kept(text, key):
+    assert normalize_text(text) == key
+
+
+def test_ascii_keys_match_the_legacy_normalisation():
+    for text in ("Python Developer", "node.js", "AWS  Lambda!", "", None):
+        assert normalize_text(text) == legacy_normalize_text(text)
+
+
+def test_legacy_normalisation_of_non_ascii_names():
+    assert legacy_normalize_text("São Paulo") == "s o paulo"
+    assert legacy_normalize_text("İstanbul") == "i stanbul"
+    assert legacy_normalize_text("東京") == ""
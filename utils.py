@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import re
+import unicodedata
 
 # --- Constants ---
 VALID_STAGES = ["LOW", "MEDIUM", "STRONG", "VERY_STRONG"]
@@ -121,16 +123,52 @@ def get_start_of_current_week_utc():
     return start.replace(hour=0, minute=0, second=0, microsecond=0)
 
 
+_NON_ALNUM_ASCII = re.compile(r'[^a-z0-9\s]')
+_MULTI_SPACE = re.compile(r'\s+')
+# Combining accents left on a Latin base letter by NFKD ("São" -> "Sa" + U+0303 + "o").
+# Marks on other scripts (Devanagari vowel signs, Cyrillic breve, ...) are kept.
+_LATIN_DIACRITICS = re.compile(r'(?<=[A-Za-z])[\u0300-\u036f]+')
+# Latin letters that NFKD does not decompose into an ASCII base
+_TRANSLITERATIONS = str.maketrans({
+    "ß": "ss", "ẞ": "ss", "æ": "ae", "Æ": "ae", "œ": "oe", "Œ": "oe",
+    "ø": "o", "Ø": "o", "đ": "d", "Đ": "d", "ð": "d", "Ð": "d", "þ": "th", "Þ": "th",
+    "ł": "l", "Ł": "l", "ħ": "h", "Ħ": "h", "ı": "i", "ŧ": "t", "Ŧ": "t",
+})
+
+
+@lru_cache(maxsize=8192)
+def _fold_char(ch: str) -> str:
+    """Keep letters, digits and combining marks of any script; everything else becomes a space."""
+    return ch if unicodedata.category(ch)[0] in "LNM" else " "
+
+
+def legacy_normalize_text(text: str) -> str:
+    """
+    The original ASCII-only key normalisation: every character outside [a-z0-9] becomes a
+    space, so "São Paulo" -> "s o paulo" and CJK names collapse to "". Only used to find
+    entries written before Unicode normalisation; never use it for new keys.
+    """
+    if not text:
+        return ""
+    text = _NON_ALNUM_ASCII.sub(' ', text.strip().lower())
+    return _MULTI_SPACE.sub(' ', text).strip()
+
+
 def normalize_text(text: str) -> str:
     """
     Convert text to a normalized form to ensure consistent Redis keys.
     Used by both Hyde and Fetch lambdas for consistent key generation.
 
     - Converts to lowercase
+    - Folds accented Latin letters to ASCII ("São Paulo" -> "sao paulo", "Zürich" -> "zurich")
+    - Keeps letters of other scripts (CJK, Devanagari, Cyrillic, ...) instead of dropping them
     - Removes special characters (except spaces)
     - Replaces multiple spaces with single space
     - Removes leading/trailing whitespace
 
+    Pure-ASCII input produces exactly the same key as before, so existing English keys
+    are unchanged; see ``legacy_normalize_text`` for the keys of non-ASCII names.
+
     Args:
         text: The text to normalize
 
@@ -139,9 +177,12 @@ def normalize_text(text: str) -> str:
     """
     if not text:
         return ""
-    text = text.strip().lower()
-    # Replace special characters (including :) with spaces
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-    # Replace multiple spaces with single space
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
\ No newline at end of file
+    if text.isascii():
+        return legacy_normalize_text(text)
+    # NFKD also folds compatibility forms (full-width letters, ligatures, superscripts)
+    text = unicodedata.normalize("NFKD", text.strip())
+    text = _LATIN_DIACRITICS.sub('', text).translate(_TRANSLITERATIONS)
+    # Recompose what is left (Hangul syllables, Indic clusters) so keys stay compact
+    text = unicodedata.normalize("NFC", text).casefold()
+    text = "".join([c if c.isascii() and (c.isalnum() or c.isspace()) else _fold_char(c) for c in text])
+    return _MULTI_SPACE.sub(' ', text).strip()
\ No newline at end of file